@@ -9,15 +9,28 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import concurrent.futures
+import os
+import time
+
+from openstack import _log
 from openstack import proxy
 from openstack import resource
 from openstack import exceptions
+from openstack import utils
+
+from openstack.resource import _normalize_status
 
 from opentelekom import otc_proxy
 
 from opentelekom.cce.v3 import cluster as _cluster
 from opentelekom.cce.v3 import cluster_node as _cluster_node
 from opentelekom.cce.v3 import cluster_cert as _cluster_cert
+from opentelekom.cce.v3 import cluster_job as _cluster_job
+from opentelekom.cce.v3 import inventory as _inventory
+from opentelekom.cce.v3 import kubeconfig as _kubeconfig
+from opentelekom.cce.v3 import node_batch as _node_batch
+from opentelekom.cce.v3 import rolling as _rolling
 
 
 class Proxy(otc_proxy.OtcProxy):
@@ -168,6 +181,128 @@ class Proxy(otc_proxy.OtcProxy):
             cluster_id=cluster.id,
         )
 
+    def set_cert_cache(self, cache):
+        """Replace the certificate cache used by :meth:`get_kubeconfig`,
+        e.g. by :func:`~opentelekom.cce.v3.kubeconfig.cert_cache` with an
+        explicit directory and key. ``None`` switches caching off.
+        """
+        self._cert_cache = cache
+
+    def _get_cert_cache(self):
+        if not hasattr(self, '_cert_cache'):
+            self._cert_cache = _kubeconfig.cert_cache()
+        return self._cert_cache
+
+    def get_kubeconfig(self, cluster, context=None, path=None,
+                       refresh_before=86400):
+        """Render a kubeconfig for the cluster.
+
+        The certificate bundle is cached encrypted on disk per cluster uid
+        and only fetched again if the client certificate expires within
+        ``refresh_before`` seconds. Without cache key (see
+        :func:`~opentelekom.cce.v3.kubeconfig.cert_cache`) it is fetched on
+        every call.
+
+        :param cluster: key id or an instance of
+            :class:`~otcextensions.sdk.cce.v3.cluster.Cluster`
+        :param str context: kubeconfig context to use, e.g. ``internal``
+            or ``external``. Default is the current context of the bundle.
+        :param str path: optional file to write the kubeconfig to
+            (readable by the user only).
+        :param int refresh_before: seconds before certificate expiry to
+            fetch a new certificate bundle.
+        :returns: the kubeconfig as yaml text
+        """
+        cluster = self._get_resource(_cluster.Cluster, cluster)
+        cache = self._get_cert_cache()
+        found, body = (False, None) if cache is None else \
+            cache.get(_kubeconfig.CERT_NAMESPACE, cluster.id)
+        if not found:
+            body = _kubeconfig.certificate_body(self.get_cluster_certs(cluster))
+            expiry = _kubeconfig.cert_expiry(body)
+            if cache is not None and expiry is not None:
+                ttl = expiry - time.time() - refresh_before
+                if ttl > 0:
+                    cache.set(_kubeconfig.CERT_NAMESPACE, cluster.id, body, ttl)
+
+        kubeconfig = _kubeconfig.render(body, context)
+        if path is not None:
+            with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                    0o600), 'w') as configfile:
+                configfile.write(kubeconfig)
+        return kubeconfig
+
+
+    # ======== Jobs ========
+    @staticmethod
+    def _job_id(job):
+        """Job id of a job, or of the job a cluster/node operation returned"""
+        if isinstance(job, (_cluster.Cluster, _cluster_node.ClusterNode)):
+            if not job.status_info or not job.status_info.job_id:
+                raise exceptions.InvalidRequest(
+                    "{res} {id} carries no job id".format(
+                        res=job.__class__.__name__, id=job.id))
+            return job.status_info.job_id
+        return job
+
+    def get_cluster_job(self, job):
+        """Get a CCE job.
+
+        :param job: job id, an instance of
+            :class:`~opentelekom.cce.v3.cluster_job.ClusterJob`, or the
+            cluster/node returned by a create or delete request.
+
+        :returns: instance of
+            :class:`~opentelekom.cce.v3.cluster_job.ClusterJob`
+        """
+        return self._get(_cluster_job.ClusterJob, self._job_id(job))
+
+    def wait_for_job(self, job, status='Success', failures=None,
+                     interval=5, wait=1800):
+        """Wait for a CCE job (incl. its sub jobs) to finish by polling the
+        small job record instead of the cluster or node list.
+
+        :param job: job id, an instance of
+            :class:`~opentelekom.cce.v3.cluster_job.ClusterJob`, or the
+            cluster/node returned by a create or delete request.
+        :param status: Desired job status.
+        :param failures: Statuses that would be interpreted as failures.
+        :param interval: Number of seconds to wait before to consecutive
+                         checks.
+        :param wait: Maximum number of seconds to wait before the change.
+        :returns: the finished job
+        :raises: :class:`~openstack.exceptions.ResourceTimeout` if the job
+                 did not finish in time.
+        :raises: :class:`~openstack.exceptions.ResourceFailure` if the job
+                 failed; the message names the failed sub jobs.
+        """
+        log = _log.setup_logging(__name__)
+        failures = ['Failed'] if failures is None else failures
+        failure_states = [_normalize_status(f) for f in failures]
+        end_status = _normalize_status(status)
+        job_id = self._job_id(job)
+
+        for count in utils.iterate_timeout(
+                timeout=wait,
+                message="Timeout waiting for job {id} to transition to {status}".format(
+                    id=job_id, status=status),
+                wait=interval):
+            job = self.get_cluster_job(job_id)
+            job_status = _normalize_status(job.status)
+            if job_status == end_status:
+                return job
+            if job_status in failure_states:
+                failed = [sub.spec.resource_name or sub.id for sub in job.sub_jobs()
+                    if _normalize_status(sub.status) in failure_states]
+                raise exceptions.ResourceFailure(
+                    "Job {id} ({type}) failed: {reason} {failed}".format(
+                        id=job_id, type=job.spec.type if job.spec else None,
+                        reason=job.status_info.reason,
+                        failed=", ".join(map(str, failed))))
+            finished, total = job.progress()
+            log.debug("Job %s is %s, %d/%d sub jobs finished",
+                job_id, job.status, finished, total)
+
 
     # ======== Cluster Nodes ========
     def cluster_nodes(self, cluster):
@@ -263,6 +398,116 @@ class Proxy(otc_proxy.OtcProxy):
             **attrs
         )
 
+    def node_inventory(self, clusters=None, max_parallel=8):
+        """Snapshot of all nodes of all (or the given) clusters, with the
+        node lists fetched concurrently.
+
+        :param clusters: optional list of cluster ids or
+            :class:`~otcextensions.sdk.cce.v3.cluster.Cluster` instances;
+            default are all clusters of the project.
+        :param int max_parallel: maximum number of concurrent list requests.
+        :returns: a columnar table of the nodes. Clusters whose nodes could
+            not be listed are reported in ``errors`` of the table.
+        :rtype: :class:`~opentelekom.cce.v3.inventory.NodeInventory`
+        """
+        if clusters is None:
+            clusters = list(self.clusters())
+        else:
+            clusters = [self._get_resource(_cluster.Cluster, cluster)
+                for cluster in clusters]
+
+        def _cluster_inventory(cluster):
+            part = _inventory.NodeInventory()
+            for node in self.cluster_nodes(cluster):
+                part.append_node(cluster, node)
+            return part
+
+        inventory = _inventory.NodeInventory()
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, min(max_parallel, len(clusters) or 1))) as executor:
+            futures = {executor.submit(_cluster_inventory, cluster): cluster
+                for cluster in clusters}
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    inventory.extend(future.result())
+                except exceptions.SDKException as ex:
+                    inventory.errors[futures[future].id] = ex
+        return inventory
+
+    def create_cluster_nodes(self, cluster, specs, max_parallel=4):
+        """Add many nodes to the cluster with few requests.
+
+        Every entry of specs is one create request; use ``spec.count`` to
+        create several equal nodes with a single request. The requests are
+        issued in parallel.
+
+        :param cluster: The value can be the ID of a cluster
+             or a :class:`~otcextensions.sdk.cce.v3.cluster.Cluster`
+             instance.
+        :param specs: list of attribute dicts as for
+            :meth:`create_cluster_node`.
+        :param int max_parallel: maximum number of concurrent create requests.
+        :returns: the batch handle to wait for with :meth:`wait_for_node_batch`.
+            Failed create requests are reported in ``errors`` of the batch.
+        :rtype: :class:`~opentelekom.cce.v3.node_batch.ClusterNodeBatch`
+        """
+        log = _log.setup_logging(__name__)
+        cluster = self._get_resource(_cluster.Cluster, cluster)
+        # remember the existing nodes to recognize the new ones later
+        known_ids = [node.id for node in self.cluster_nodes(cluster)]
+        batch = _node_batch.ClusterNodeBatch(cluster.id, specs, known_ids)
+
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, min(max_parallel, len(batch.specs) or 1))) as executor:
+            futures = {
+                executor.submit(self.create_cluster_node, cluster, **attrs): index
+                for index, attrs in enumerate(batch.specs)}
+            for future in concurrent.futures.as_completed(futures):
+                index = futures[future]
+                try:
+                    batch.requests[index] = future.result()
+                except exceptions.SDKException as ex:
+                    log.debug("Node creation %d in cluster %s failed: %s",
+                        index, cluster.id, ex)
+                    batch.errors[index] = ex
+        return batch
+
+    def wait_for_node_batch(self, batch, status="Active", failures=None,
+                            interval=15, wait=1200, attribute='status'):
+        """Wait with one shared poll loop until all nodes of a batch have
+        appeared and reached either the given or a failure status.
+
+        :param batch: the :class:`~opentelekom.cce.v3.node_batch.ClusterNodeBatch`
+            returned by :meth:`create_cluster_nodes`.
+        :param status: Desired status.
+        :param failures: Statuses that would be interpreted as failures.
+        :param interval: Number of seconds to wait between checks.
+        :param wait: Maximum number of seconds to wait.
+        :returns: the batch with the final node states; failed nodes are
+            reported by ``failed`` and ``ok`` of the batch instead of raising.
+        :raises: :class:`~openstack.exceptions.ResourceTimeout` if the
+            nodes did not appear or transition in time.
+        """
+        failures = ['Error'] if failures is None else failures
+        failure_states = [_normalize_status(f) for f in failures]
+        batch.failures = failures
+        batch.attribute = attribute
+        end_status = _normalize_status(status)
+
+        def _pending(node):
+            node_status = _normalize_status(getattr(node, attribute))
+            return node_status != end_status and node_status not in failure_states
+
+        for count in utils.iterate_timeout(
+                timeout=wait,
+                message="{batch} Timeout waiting to transition to {status}".format(
+                    batch=batch, status=status),
+                wait=interval):
+            batch.update(self.cluster_nodes(batch.cluster_id))
+            if batch.resolved and not list(filter(_pending, batch.nodes.values())):
+                return batch
+        return batch
+
     def wait_for_status_cluster_nodes(self, cluster, status="Active", failures=None, interval=15, wait=1200, attribute='status'):
         def _all_nodes_selector():
             return self.cluster_nodes(cluster)
@@ -270,37 +515,138 @@ class Proxy(otc_proxy.OtcProxy):
         return super().wait_for_status_all(_all_nodes_selector, status, 
             failures, interval, wait, attribute)
 
-    def wait_for_status_nodes(self, cluster, nodes, status="Active", failures=None, interval=15, wait=1200, attribute='status'):
-        node_ids = set(map( lambda node: node.id if isinstance(node, _cluster_node.ClusterNode) else node,
-            nodes ))
-        
-        def _nodes_by_id_selector():
-            return filter( lambda node: node.id in node_ids, 
-                self.cluster_nodes(cluster))
-
-        return super().wait_for_status_all(_nodes_by_id_selector, status, 
-            failures, interval, wait, attribute)
+    def _wait_nodes_selector(self, cluster, nodes, get_ratio=0.25):
+        """Build the refresh function for the node waiters, which chooses
+        per call between one GET per waited node and a single full node
+        list. The first call always lists (it also measures the cluster
+        size and list cost); afterwards the per-node GETs are used if the
+        waited set is small: by the measured cost of both strategies, or
+        by the share of the cluster size as long as no GET was measured.
+        As long as a waited node was not seen yet, the nodes are listed.
+        Nodes not found anymore are left out, the same way the list does.
+        """
+        wanted = set(node.id if isinstance(node, _cluster_node.ClusterNode) else node
+            for node in nodes)
+        # the nodes seen by the last refresh, in list order
+        present = []
+        # the nodes seen before, but not found by a GET any more
+        vanished = set()
+        cost = {'list': None, 'get': None, 'size': None}
+
+        def _use_get():
+            if cost['size'] is None or not wanted <= set(present) | vanished:
+                return False
+            if cost['get'] is None:
+                return len(present) <= cost['size'] * get_ratio
+            return len(present) * cost['get'] < cost['list']
+
+        def _get_nodes():
+            observed = []
+            for node_id in present:
+                try:
+                    observed.append(self.get_cluster_node(cluster, node_id))
+                except exceptions.ResourceNotFound:
+                    vanished.add(node_id)
+            return observed
+
+        def _list_nodes():
+            all_nodes = list(self.cluster_nodes(cluster))
+            cost['size'] = len(all_nodes)
+            return [node for node in all_nodes if node.id in wanted]
+
+        def _nodes_selector():
+            if not wanted:
+                return []
+            start = time.monotonic()
+            if _use_get():
+                calls = len(present)
+                observed = _get_nodes()
+                if calls:
+                    cost['get'] = (time.monotonic() - start) / calls
+            else:
+                observed = _list_nodes()
+                cost['list'] = time.monotonic() - start
+            present[:] = [node.id for node in observed]
+            return observed
+
+        return _nodes_selector
 
+    def wait_for_status_nodes(self, cluster, nodes, status="Active", failures=None, interval=15, wait=1200, attribute='status'):
+        return super().wait_for_status_all(self._wait_nodes_selector(cluster, nodes),
+            status, failures, interval, wait, attribute)
 
+    @staticmethod
+    def _match_labels(node, labels):
+        node_labels = (node.metadata.labels if node.metadata else None) or {}
+        return all(node_labels.get(key) == value for key, value in labels.items())
 
-    def delete_cluster_nodes(self, cluster, ignore_missing=True):
-        """Delete nodes selected by list_func from the cluster.
+    def delete_cluster_nodes(self, cluster, ignore_missing=True,
+                             max_parallel=1, labels=None, selector=None,
+                             nodes=None):
+        """Delete nodes from the cluster, all or selected ones.
 
         :param cluster: The value can be the ID of a cluster
              or a :class:`~otcextensions.sdk.cce.v3.cluster.Cluster`
              instance.
-        :param node: The value can be the ID of a cluster node
-             or a :class:`~otcextensions.sdk.cce.v3.cluster_node.ClusterNode`
-             instance.
         :param bool ignore_missing: When set to ``False``
             :class:`~openstack.exceptions.ResourceNotFound` will be raised when
             the node does not exist.
             When set to ``True``, no exception will be set when attempting to
             delete a nonexistent cluster node.
+        :param int max_parallel: maximum number of concurrent delete requests.
+            With more than one, failed deletes are reported in the result
+            instead of being raised.
+        :param dict labels: only delete nodes with all these metadata labels.
+        :param selector: only delete nodes for which this callable returns
+            True.
+        :param nodes: explicit node ids or
+            :class:`~otcextensions.sdk.cce.v3.cluster_node.ClusterNode`
+            instances to delete instead of all nodes; saves the node list
+            request if no labels or selector are given.
+        :returns: the aggregated result, iterating over the deleted nodes
+            as input for :meth:`wait_for_delete_nodes`.
+        :rtype: :class:`~opentelekom.cce.v3.node_batch.ClusterNodeDeleteResult`
         """
         cluster = self._get_resource(_cluster.Cluster, cluster)
-        for node in self.cluster_nodes(cluster):
-            self.delete_cluster_node(cluster.id, node)
+        if nodes is None:
+            nodes = list(self.cluster_nodes(cluster))
+        elif labels or selector is not None:
+            node_ids = set(node.id if isinstance(node, _cluster_node.ClusterNode) else node
+                for node in nodes)
+            nodes = [node for node in self.cluster_nodes(cluster) if node.id in node_ids]
+        else:
+            nodes = [self._get_resource(_cluster_node.ClusterNode, node,
+                cluster_id=cluster.id) for node in nodes]
+        if labels:
+            nodes = [node for node in nodes if self._match_labels(node, labels)]
+        if selector is not None:
+            nodes = list(filter(selector, nodes))
+
+        result = _node_batch.ClusterNodeDeleteResult(cluster.id)
+        if max_parallel <= 1:
+            for node in nodes:
+                self.delete_cluster_node(cluster.id, node,
+                    ignore_missing=ignore_missing)
+                result.deleted.append(node)
+            return result
+
+        log = _log.setup_logging(__name__)
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(max_parallel, len(nodes) or 1)) as executor:
+            futures = {
+                executor.submit(self.delete_cluster_node, cluster.id, node,
+                    ignore_missing=ignore_missing): node
+                for node in nodes}
+            for future in concurrent.futures.as_completed(futures):
+                node = futures[future]
+                try:
+                    future.result()
+                    result.deleted.append(node)
+                except exceptions.SDKException as ex:
+                    log.debug("Delete of node %s in cluster %s failed: %s",
+                        node.id, cluster.id, ex)
+                    result.errors[node.id] = ex
+        return result
 
     def wait_for_delete_cluster_nodes(self, cluster, interval=15, wait=1200, attribute='status'):
         def _all_nodes_selector():
@@ -309,11 +655,58 @@ class Proxy(otc_proxy.OtcProxy):
         return super().wait_for_delete_all(_all_nodes_selector, interval, wait, attribute)
 
     def wait_for_delete_nodes(self, cluster, nodes, interval=15, wait=1200, attribute='status'):
-        node_ids = set(map(
-            lambda node: node.id if isinstance(node, _cluster_node.ClusterNode) else node,
-            nodes ))            
-        def _nodes_by_id_selector():
-            return filter( lambda node: node.id in node_ids, 
-                self.cluster_nodes(cluster))
-
-        return super().wait_for_delete_all(_nodes_by_id_selector, interval, wait, attribute)
+        return super().wait_for_delete_all(self._wait_nodes_selector(cluster, nodes),
+            interval, wait, attribute)
+
+    def rolling_replace_nodes(self, cluster, nodes, spec, surge=1,
+                              max_unavailable=0, state_file=None,
+                              failures=None, interval=15, wait=7200):
+        """Replace nodes of a cluster wave by wave, e.g. to rotate node
+        images or flavors, without dropping below the original capacity.
+
+        Replacements are created with ``spec.count`` per wave and old nodes
+        are deleted as soon as enough replacements are active; creates and
+        deletes of subsequent waves overlap.
+
+        :param cluster: The value can be the ID of a cluster
+             or a :class:`~otcextensions.sdk.cce.v3.cluster.Cluster`
+             instance.
+        :param nodes: the nodes (ids or instances of
+            :class:`~otcextensions.sdk.cce.v3.cluster_node.ClusterNode`)
+            to replace.
+        :param dict spec: create attributes for the replacement nodes as
+            for :meth:`create_cluster_node`; a name is mandatory, it
+            identifies the replacements.
+        :param int surge: maximum number of nodes above the original count.
+        :param int max_unavailable: maximum number of active nodes below
+            the original count.
+        :param str state_file: file to persist the progress. If the file
+            exists, the rollout recorded there is resumed, ignoring nodes
+            and spec. It is removed after completion.
+        :param failures: replacement statuses interpreted as failures.
+        :param interval: Number of seconds between two observations.
+        :param wait: Maximum number of seconds for the whole rollout.
+        :returns: the final state of the rollout
+        :rtype: :class:`~opentelekom.cce.v3.rolling.RolloutState`
+        :raises: :class:`~openstack.exceptions.ResourceFailure` if a
+            replacement node fails, vanishes, or does not appear in the
+            node list.
+        """
+        cluster = self._get_resource(_cluster.Cluster, cluster)
+        if state_file is not None and os.path.exists(state_file):
+            state = _rolling.RolloutState.load(state_file)
+            if state.cluster_id != cluster.id:
+                raise exceptions.InvalidRequest(
+                    "State file {path} belongs to cluster {cluster}".format(
+                        path=state_file, cluster=state.cluster_id))
+        else:
+            state = _rolling.RolloutState(cluster.id,
+                old_ids=[node.id if isinstance(node, _cluster_node.ClusterNode) else node
+                    for node in nodes],
+                known_ids=[node.id for node in self.cluster_nodes(cluster)],
+                spec=spec)
+
+        engine = _rolling.RollingReplace(self, state, surge=surge,
+            max_unavailable=max_unavailable, state_file=state_file,
+            failures=failures)
+        return engine.run(interval=interval, wait=wait)
@@ -10,12 +10,49 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 # import six
+import io
+
 from openstack import exceptions
 from openstack import utils
 
 from openstack import resource
 from opentelekom import otc_resource
 
+try:
+    # optional: incremental parsing of large list responses
+    import ijson
+except ImportError:
+    ijson = None
+
+
+class _ChunkReader(io.RawIOBase):
+    '''File-like adapter over the decoded body chunks of a streamed response'''
+
+    def __init__(self, response, chunk_size=65536):
+        self._chunks = response.iter_content(chunk_size=chunk_size)
+        self._buffer = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def _response_stream(response):
+    # the body is already read, e.g. by debug logging
+    if getattr(response, '_content_consumed', False) or response.raw is None:
+        return io.BytesIO(response.content or b'')
+    return _ChunkReader(response)
+
 class MetadataSpec(resource.Resource):
     # Properties
     #: the name of the cluster
@@ -29,13 +66,16 @@ class MetadataSpec(resource.Resource):
     #: status structure
     #==== get/fetch fields
     #: *Type:str
-    created_at = resource.Body('creationTimeStamp')
+    created_at = resource.Body('creationTimestamp')
     #: Update time
     #: *Type:str
-    updated_at = resource.Body('updateTimeStamp')
+    updated_at = resource.Body('updateTimestamp')
 
 
 class Cce2Resource(otc_resource.OtcResource):
+    #: parse non-paginated list responses incrementally if ijson is installed
+    stream_list = True
+
     # Properties
     #: specification
     metadata = resource.Body('metadata', type=MetadataSpec)
@@ -113,48 +153,62 @@ class Cce2Resource(otc_resource.OtcResource):
         # swift objects
         total_yielded = 0
         while uri:
+            # resources are yielded while the (large) body is still parsed
+            streamed = (ijson is not None and cls.stream_list and
+                cls.resources_key and not paginated)
             # Copy query_params due to weird mock unittest interactions
             response = session.get(
                 uri,
                 headers={"Accept": "application/json"},
                 params=query_params.copy(),
-                microversion=microversion)
+                microversion=microversion,
+                stream=streamed)
             exceptions.raise_from_response(response)
-            data = response.json()
+            if streamed:
+                data = {}
+                resources = ijson.items(_response_stream(response),
+                    cls.resources_key + '.item', use_float=True)
+            else:
+                data = response.json()
 
-            # Discard any existing pagination keys
-            query_params.pop('marker', None)
-            query_params.pop('limit', None)
+                if cls.resources_key:
+                    resources = data[cls.resources_key]
+                else:
+                    resources = data
 
-            if cls.resources_key:
-                resources = data[cls.resources_key]
-            else:
-                resources = data
+                # CCE list result patch start
+                if not resources:
+                    resources = []
+                # CCE list result patch end
 
-            # CCE list result patch start
-            if not resources:
-                resources = []
-            # CCE list result patch end
+                if not isinstance(resources, list):
+                    resources = [resources]
 
-            if not isinstance(resources, list):
-                resources = [resources]
+            # Discard any existing pagination keys
+            query_params.pop('marker', None)
+            query_params.pop('limit', None)
 
             marker = None
-            for raw_resource in resources:
-                # Do not allow keys called "self" through. Glance chose
-                # to name a key "self", so we need to pop it out because
-                # we can't send it through cls.existing and into the
-                # Resource initializer. "self" is already the first
-                # argument and is practically a reserved word.
-                raw_resource.pop("self", None)
-
-                value = cls.existing(
-                    microversion=microversion,
-                    connection=session._get_connection(),
-                    **raw_resource)
-                marker = value.id
-                yield value
-                total_yielded += 1
+            try:
+                for raw_resource in resources:
+                    # Do not allow keys called "self" through. Glance chose
+                    # to name a key "self", so we need to pop it out because
+                    # we can't send it through cls.existing and into the
+                    # Resource initializer. "self" is already the first
+                    # argument and is practically a reserved word.
+                    raw_resource.pop("self", None)
+
+                    value = cls.existing(
+                        microversion=microversion,
+                        connection=session._get_connection(),
+                        **raw_resource)
+                    marker = value.id
+                    yield value
+                    total_yielded += 1
+            finally:
+                if streamed:
+                    # release the connection also if the caller stops early
+                    response.close()
 
             if resources and paginated:
                 uri, next_params = cls._get_next_link(
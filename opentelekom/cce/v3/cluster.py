@@ -74,6 +74,8 @@ class StatusSpec(otc_resource.OtcSubResource):
     status = resource.Body('phase')
     #: Access address of the kube-apiserver in the cluster.
     endpoints = resource.Body('endpoints', type=dict)
+    #: Id of the job of a create/delete request.
+    job_id = resource.Body('jobID')
 
 
 class Cluster(cce_resource.Cce2Resource):
@@ -77,7 +77,7 @@ class ClusterCertificate(otc_resource.OtcResource):
     #: contexts
     contexts = resource.Body('contexts', type=list, list_type=ContextListSpec)
     #: Context information.
-    current_context = resource.Body('current_context')
+    current_context = resource.Body('current-context')
 
     def _prepare_request(self, requires_id=True, prepend_key=True,
         base_path=None):
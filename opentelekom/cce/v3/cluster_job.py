@@ -0,0 +1,64 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from openstack import resource
+from openstack.resource import _normalize_status
+from opentelekom import otc_resource
+from opentelekom.cce.v3 import cce_resource
+
+class JobSpec(otc_resource.OtcSubResource):
+    # Properties
+    #: Job type, e.g. CreateCluster, CreateNode, DeleteCluster
+    type = resource.Body('type')
+    #: Id of the cluster the job works on
+    cluster_id = resource.Body('clusterUID')
+    #: Id of the resource the job works on
+    resource_id = resource.Body('resourceID')
+    #: Name of the resource the job works on
+    resource_name = resource.Body('resourceName')
+    #: Sub jobs (raw job structures, see :meth:`ClusterJob.sub_jobs`)
+    sub_jobs = resource.Body('subJobs', type=list)
+
+class JobStatusSpec(otc_resource.OtcSubResource):
+    # Properties
+    #: Job status: Initializing, Running, Success, Failed
+    status = resource.Body('phase')
+    #: Reason of the job status
+    reason = resource.Body('reason')
+
+class ClusterJob(cce_resource.Cce2Resource):
+    """ The lightweight job record of a CCE create/delete operation """
+    base_path = '/jobs'
+
+    allow_create = False
+    allow_fetch = True
+    allow_commit = False
+    allow_delete = False
+    allow_list = False
+
+    # Properties
+    #: specification
+    spec = resource.Body('spec', type=JobSpec)
+    #: status
+    status_info = resource.Body('status', type=JobStatusSpec)
+
+    def sub_jobs(self):
+        """ The sub jobs as :class:`ClusterJob` instances """
+        if not self.spec or not self.spec.sub_jobs:
+            return []
+        return [ClusterJob.existing(**raw) for raw in self.spec.sub_jobs]
+
+    def progress(self):
+        """ Tuple (finished, total) of the sub jobs """
+        sub_jobs = self.sub_jobs()
+        finished = [job for job in sub_jobs
+            if _normalize_status(job.status) in ('success', 'failed')]
+        return len(finished), len(sub_jobs)
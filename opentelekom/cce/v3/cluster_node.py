@@ -73,6 +73,8 @@ class StatusSpec(otc_resource.OtcSubResource):
     private_ip = resource.Body('privateIP')
     #: Status.
     status = resource.Body('phase')
+    #: Id of the job of a create/delete request.
+    job_id = resource.Body('jobID')
 
 class ClusterNode(cce_resource.Cce2Resource):
 
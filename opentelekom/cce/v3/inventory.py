@@ -0,0 +1,147 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Columnar node inventory of a CCE fleet, created by
+:meth:`~opentelekom.cce.v3._proxy.Proxy.node_inventory`::
+
+    inventory = conn.cce2.node_inventory()
+    inventory.count_by('flavor', 'status')
+    # {('s2.large.1', 'Active'): 12, ('s2.xlarge.2', 'Error'): 1}
+    inventory.filter(status='Active').count_by('availability_zone')
+"""
+import collections
+import sys
+
+
+#: the columns of a node inventory
+COLUMNS = ('cluster_id', 'cluster_name', 'node_id', 'node_name', 'flavor',
+           'availability_zone', 'status', 'created_at')
+
+# columns with few distinct values, which are interned to save memory
+_INTERNED = ('cluster_id', 'cluster_name', 'flavor', 'availability_zone',
+             'status')
+
+
+class NodeInventory(object):
+    """ A node table stored column-wise: one list per column, so
+    aggregations run over the needed columns only.
+
+    :param dict columns: column name to value list, all of the same length.
+    """
+
+    def __init__(self, columns=None):
+        columns = columns or {}
+        self._columns = {name: list(columns.get(name, [])) for name in COLUMNS}
+        #: exception per cluster id whose nodes could not be listed
+        self.errors = {}
+
+    def append_node(self, cluster, node):
+        """ Add a row for a cluster node resource """
+        spec = node.spec
+        values = {
+            'cluster_id': cluster.id,
+            'cluster_name': cluster.name,
+            'node_id': node.id,
+            'node_name': node.name,
+            'flavor': spec.flavor if spec else None,
+            'availability_zone': spec.availability_zone if spec else None,
+            'status': node.status,
+            'created_at': node.metadata.created_at if node.metadata else None,
+        }
+        for name in COLUMNS:
+            value = values[name]
+            if name in _INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            self._columns[name].append(value)
+
+    def extend(self, other):
+        """ Append all rows of another inventory """
+        for name in COLUMNS:
+            self._columns[name].extend(other._columns[name])
+        self.errors.update(other.errors)
+
+    def __len__(self):
+        return len(self._columns['node_id'])
+
+    def column(self, name):
+        """ The values of a column (not a copy) """
+        return self._columns[name]
+
+    def rows(self):
+        """ Iterate the rows as dicts """
+        for values in zip(*(self._columns[name] for name in COLUMNS)):
+            yield dict(zip(COLUMNS, values))
+
+    def _mask(self, **equals):
+        mask = [True] * len(self)
+        for name, expected in equals.items():
+            if callable(expected):
+                mask = [m and expected(value)
+                    for m, value in zip(mask, self._columns[name])]
+            else:
+                mask = [m and value == expected
+                    for m, value in zip(mask, self._columns[name])]
+        return mask
+
+    def filter(self, **equals):
+        """ Select the rows matching all given column values; a value may
+        also be a predicate callable
+
+        :rtype: :class:`NodeInventory`
+        """
+        mask = self._mask(**equals)
+        return NodeInventory({name: [value for value, keep
+            in zip(self._columns[name], mask) if keep] for name in COLUMNS})
+
+    def count(self, **equals):
+        """ Number of rows matching all given column values """
+        return sum(self._mask(**equals))
+
+    def count_by(self, *names):
+        """ Row count per distinct value combination of the given columns
+
+        :returns: dict with a value (one column) or a value tuple (several
+            columns) as key
+        """
+        if len(names) == 1:
+            return dict(collections.Counter(self._columns[names[0]]))
+        return dict(collections.Counter(
+            zip(*(self._columns[name] for name in names))))
+
+    def group_by(self, name):
+        """ Split the inventory by the values of a column
+
+        :returns: dict of value to :class:`NodeInventory`
+        """
+        indices = collections.defaultdict(list)
+        for index, value in enumerate(self._columns[name]):
+            indices[value].append(index)
+        groups = {}
+        for value, rows in indices.items():
+            groups[value] = NodeInventory({column: [self._columns[column][i]
+                for i in rows] for column in COLUMNS})
+        return groups
+
+    def to_dict(self):
+        """ Columns as dict of lists, e.g. for json output """
+        return {name: list(values) for name, values in self._columns.items()}
+
+    def to_pandas(self):
+        """ Convert to a :class:`pandas.DataFrame` (requires pandas) """
+        try:
+            import pandas
+        except ImportError:
+            raise ImportError("to_pandas requires the pandas package")
+        return pandas.DataFrame(self._columns, columns=list(COLUMNS))
+
+    def __repr__(self):
+        return "NodeInventory(nodes=%d, errors=%d)" % (len(self), len(self.errors))
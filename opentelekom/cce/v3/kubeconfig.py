@@ -0,0 +1,143 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Kubeconfig rendering from CCE cluster certificates, and the encrypted
+on-disk certificate cache used by
+:meth:`~opentelekom.cce.v3._proxy.Proxy.get_kubeconfig`.
+"""
+import base64
+import calendar
+import os
+
+import appdirs
+import yaml
+
+try:
+    import keyring
+except ImportError:
+    keyring = None
+
+from cryptography import fernet
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+
+from openstack import _log
+from openstack import exceptions
+
+from opentelekom import otc_cache
+
+
+#: cache namespace of the certificate bundles
+CERT_NAMESPACE = "cce-cert"
+
+#: keyring service and user name of the generated cache key
+KEYRING_SERVICE = "opentelekom"
+KEYRING_USER = "cce-cert-cache"
+
+
+def certificate_body(cert):
+    """ The raw (json) attributes of a
+    :class:`~opentelekom.cce.v3.cluster_cert.ClusterCertificate` """
+    return dict(cert._body.attributes)
+
+
+def cert_expiry(body):
+    """ Epoch seconds when the first client certificate of the bundle
+    expires, None if the bundle contains no client certificate """
+    expiries = []
+    for user in body.get('users') or []:
+        data = (user.get('user') or {}).get('client-certificate-data')
+        if not data:
+            continue
+        cert = x509.load_pem_x509_certificate(base64.b64decode(data),
+            default_backend())
+        not_valid_after = getattr(cert, 'not_valid_after_utc', None)
+        if not_valid_after is not None:
+            expiries.append(int(not_valid_after.timestamp()))
+        else:
+            # cryptography < 42 only has the naive UTC datetime
+            expiries.append(calendar.timegm(cert.not_valid_after.utctimetuple()))
+    return min(expiries) if expiries else None
+
+
+def render(body, context=None):
+    """ Render a kubeconfig from a certificate bundle
+
+    :param dict body: the raw certificate bundle
+    :param str context: name of the context to select, e.g. ``internal``
+        or ``external``; default is the current context of the bundle.
+    :returns: the kubeconfig as yaml text
+    :raises: :class:`~openstack.exceptions.SDKException` for an
+        unknown context
+    """
+    contexts = body.get('contexts') or []
+    names = [ctx.get('name') for ctx in contexts]
+    if context is None:
+        context = body.get('current-context') or (names[0] if names else None)
+    if context not in names:
+        raise exceptions.SDKException(
+            "Unknown kubeconfig context {context}, available: {names}".format(
+                context=context, names=", ".join(filter(None, names))))
+
+    config = {
+        'apiVersion': 'v1',
+        'kind': 'Config',
+        'preferences': {},
+        'clusters': body.get('clusters') or [],
+        'users': body.get('users') or [],
+        'contexts': contexts,
+        'current-context': context,
+    }
+    return yaml.safe_dump(config, default_flow_style=False)
+
+
+def default_cache_dir():
+    """ ``OTC_CERT_CACHE_DIR`` or the per-user cache directory """
+    return os.environ.get('OTC_CERT_CACHE_DIR') or os.path.join(
+        appdirs.user_cache_dir('opentelekom'), 'cce-certs')
+
+
+def _keyring_key():
+    """ The cache key from the user keyring, generated on first use;
+    None without keyring package or usable keyring backend """
+    if keyring is None:
+        return None
+    try:
+        key = keyring.get_password(KEYRING_SERVICE, KEYRING_USER)
+        if key is None:
+            key = fernet.Fernet.generate_key().decode('ascii')
+            keyring.set_password(KEYRING_SERVICE, KEYRING_USER, key)
+        return key
+    except keyring.errors.KeyringError as ex:
+        _log.setup_logging(__name__).debug("No keyring for the certificate cache: %s", ex)
+        return None
+
+
+def cert_cache(path=None, key=None):
+    """ An encrypted disk cache for certificate bundles
+
+    The key is never stored next to the cache: it is given, taken from
+    ``OTC_CERT_CACHE_KEY`` or kept in the user keyring (with the optional
+    ``keyring`` package).
+
+    :param str path: cache directory, default :func:`default_cache_dir`.
+    :param key: fernet key, default see above.
+    :returns: the cache, or None if no key is available; certificates are
+        then fetched on every use instead of stored unencrypted.
+    :rtype: :class:`~opentelekom.otc_cache.DiskCache`
+    """
+    key = key or os.environ.get('OTC_CERT_CACHE_KEY') or _keyring_key()
+    if not key:
+        return None
+    path = path or default_cache_dir()
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return otc_cache.DiskCache(path, encryption=fernet.Fernet(key))
@@ -0,0 +1,162 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from openstack.resource import _normalize_status
+
+
+def _spec_count(attrs):
+    spec = attrs.get('spec') or {}
+    count = spec.get('count') if isinstance(spec, dict) else spec.count
+    return int(count or 1)
+
+
+def _spec_name(attrs):
+    if 'name' in attrs:
+        return attrs['name']
+    metadata = attrs.get('metadata') or {}
+    return metadata.get('name') if isinstance(metadata, dict) else metadata.name
+
+
+class ClusterNodeBatch(object):
+    """ Handle of a bulk node creation, created by
+    :meth:`~opentelekom.cce.v3._proxy.Proxy.create_cluster_nodes`
+
+    CCE reports only one node for a create request with ``spec.count`` > 1,
+    so the members of a batch are resolved from the node list: a new
+    node belongs to the spec with the returned uid, or else to the spec
+    whose name is the prefix of the generated node name.
+    """
+
+    def __init__(self, cluster_id, specs, known_ids=()):
+        #: the cluster the nodes are created in
+        self.cluster_id = cluster_id
+        #: the create attributes, one entry per create request
+        self.specs = list(specs)
+        #: created node (as returned by the API) per spec index
+        self.requests = {}
+        #: create exception per spec index
+        self.errors = {}
+        #: spec index per resolved node id
+        self.node_index = {}
+        #: latest observed state per resolved node id
+        self.nodes = {}
+        #: failure statuses and status attribute, as last waited for by
+        #: :meth:`~opentelekom.cce.v3._proxy.Proxy.wait_for_node_batch`
+        self.failures = ['Error']
+        self.attribute = 'status'
+        self._known_ids = set(known_ids)
+
+    @property
+    def expected_count(self):
+        """ Number of nodes expected from the successful create requests """
+        return sum(_spec_count(self.specs[index]) for index in self.requests)
+
+    @property
+    def node_ids(self):
+        return list(self.node_index.keys())
+
+    @property
+    def resolved(self):
+        """ True if all expected nodes are visible in the node list """
+        return len(self.node_index) >= self.expected_count
+
+    def nodes_of(self, index):
+        """ The resolved nodes created by the spec with the given index """
+        return [self.nodes[node_id] for node_id, spec_index
+            in self.node_index.items() if spec_index == index
+            and node_id in self.nodes]
+
+    def _remaining(self, index):
+        return _spec_count(self.specs[index]) - \
+            list(self.node_index.values()).count(index)
+
+    def _match(self, node):
+        for index, created in self.requests.items():
+            if created.id and created.id == node.id:
+                return index
+        for index in sorted(self.requests.keys()):
+            name = _spec_name(self.specs[index])
+            if name and (node.name == name or
+                    (node.name or "").startswith(name + "-")) and \
+                    self._remaining(index) > 0:
+                return index
+        return None
+
+    def update(self, nodes):
+        """ Assign new nodes to their spec and refresh the observed states
+
+        :param nodes: the current node list of the cluster
+        """
+        for node in nodes:
+            if node.id in self._known_ids:
+                continue
+            if node.id not in self.node_index:
+                index = self._match(node)
+                if index is None:
+                    # created by somebody else
+                    self._known_ids.add(node.id)
+                    continue
+                self.node_index[node.id] = index
+            self.nodes[node.id] = node
+
+    def failed_nodes(self, failures=None):
+        """ The resolved nodes in one of the failure statuses,
+        by default the ones of the last wait """
+        failures = [_normalize_status(f) for f in (failures or self.failures)]
+        return [node for node in self.nodes.values()
+            if _normalize_status(getattr(node, self.attribute)) in failures]
+
+    @property
+    def failed(self):
+        """ The resolved nodes which failed while waiting """
+        return self.failed_nodes()
+
+    @property
+    def ok(self):
+        """ True if all create requests succeeded and no node failed """
+        return not self.errors and not self.failed
+
+    def __repr__(self):
+        return "ClusterNodeBatch(cluster={cluster}, nodes={resolved}/{expected}, errors={errors})".format(
+            cluster=self.cluster_id, resolved=len(self.node_index),
+            expected=self.expected_count, errors=len(self.errors))
+
+
+class ClusterNodeDeleteResult(object):
+    """ Aggregated per-node result of
+    :meth:`~opentelekom.cce.v3._proxy.Proxy.delete_cluster_nodes`.
+
+    Iterating the result yields the nodes with an accepted delete
+    request, so it can be passed directly to
+    :meth:`~opentelekom.cce.v3._proxy.Proxy.wait_for_delete_nodes`.
+    """
+
+    def __init__(self, cluster_id):
+        #: the cluster the nodes are deleted from
+        self.cluster_id = cluster_id
+        #: nodes with an accepted delete request
+        self.deleted = []
+        #: delete exception per node id
+        self.errors = {}
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def __iter__(self):
+        return iter(self.deleted)
+
+    def __len__(self):
+        return len(self.deleted)
+
+    def __repr__(self):
+        return "ClusterNodeDeleteResult(cluster={cluster}, deleted={deleted}, errors={errors})".format(
+            cluster=self.cluster_id, deleted=len(self.deleted), errors=len(self.errors))
@@ -0,0 +1,280 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Rolling replacement of CCE cluster nodes, see
+:meth:`~opentelekom.cce.v3._proxy.Proxy.rolling_replace_nodes`.
+
+The rollout is driven by the observed node list only: every poll
+resolves the replacement nodes (new nodes named like the replacement
+spec), then deletes as many old nodes as the capacity allows and
+creates as many replacements as the surge allows. Creates and deletes
+of subsequent waves therefore overlap. The progress is persisted in a
+state file after every action, so a crashed rollout continues where
+it stopped.
+"""
+import copy
+import json
+import os
+import tempfile
+
+from openstack import _log
+from openstack import exceptions
+from openstack import utils
+
+from openstack.resource import _normalize_status
+
+from opentelekom.cce.v3 import node_batch as _node_batch
+
+
+class RolloutState(object):
+    """ Persistent progress of a rolling node replacement """
+
+    def __init__(self, cluster_id, old_ids, known_ids, spec, requested=0,
+                 new_ids=None, deleted_ids=None):
+        #: the cluster of the rollout
+        self.cluster_id = cluster_id
+        #: ids of the nodes to replace
+        self.old_ids = list(old_ids)
+        #: ids of all nodes existing before the rollout
+        self.known_ids = list(known_ids)
+        #: create attributes of the replacement nodes
+        self.spec = spec
+        #: number of replacement nodes requested so far
+        self.requested = requested
+        #: ids of the replacement nodes seen so far
+        self.new_ids = list(new_ids or [])
+        #: ids of the old nodes with an issued delete
+        self.deleted_ids = list(deleted_ids or [])
+
+    def to_dict(self):
+        return {
+            'cluster_id': self.cluster_id,
+            'old_ids': self.old_ids,
+            'known_ids': self.known_ids,
+            'spec': self.spec,
+            'requested': self.requested,
+            'new_ids': self.new_ids,
+            'deleted_ids': self.deleted_ids,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def save(self, path):
+        # readable by the user only, the spec may contain login data
+        descriptor, tmpname = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(descriptor, 'w') as statefile:
+                json.dump(self.to_dict(), statefile)
+            os.replace(tmpname, path)
+        except BaseException:
+            os.unlink(tmpname)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as statefile:
+            return cls.from_dict(json.load(statefile))
+
+
+class RollingReplace(object):
+    """ The rollout engine
+
+    :param proxy: the CCE proxy
+    :param state: the :class:`RolloutState` to start or continue with
+    :param int surge: maximum number of nodes above the original node count
+    :param int max_unavailable: maximum number of nodes below the original
+        node count of available (active) nodes
+    :param str state_file: optional file the state is persisted to
+    :param failures: replacement node statuses treated as failure
+    :param int max_parallel: maximum number of concurrent deletes
+    :param int max_unseen_rounds: observations without progress after
+        which requested replacements still missing in the node list
+        count as failed
+    """
+
+    def __init__(self, proxy, state, surge=1, max_unavailable=0,
+                 state_file=None, failures=None, max_parallel=4,
+                 max_unseen_rounds=10):
+        if surge + max_unavailable < 1:
+            raise exceptions.InvalidRequest(
+                "Rolling replace needs surge or max_unavailable > 0")
+        self.name = _node_batch._spec_name(state.spec)
+        if not self.name:
+            raise exceptions.InvalidRequest(
+                "Rolling replace needs a name for the replacement nodes")
+        self.proxy = proxy
+        self.state = state
+        self.surge = surge
+        self.max_unavailable = max_unavailable
+        self.state_file = state_file
+        self.failures = [_normalize_status(f) for f in (failures or ['Error'])]
+        self.max_parallel = max_parallel
+        self.max_unseen_rounds = max_unseen_rounds
+        # observations since a requested replacement last showed up
+        self._unseen_rounds = 0
+        self.log = _log.setup_logging(__name__)
+
+    def _save(self):
+        if self.state_file is not None:
+            self.state.save(self.state_file)
+
+    @staticmethod
+    def _active(node):
+        return _normalize_status(node.status) == 'active'
+
+    def _is_replacement(self, node):
+        return node.name == self.name or (node.name or "").startswith(self.name + "-")
+
+    def _observe(self):
+        state = self.state
+        present = {}
+        known = set(state.known_ids)
+        for node in self.proxy.cluster_nodes(state.cluster_id):
+            present[node.id] = node
+            if node.id not in known and node.id not in state.new_ids and \
+                    self._is_replacement(node):
+                state.new_ids.append(node.id)
+        # replacements created before a crash, but not yet recorded
+        state.requested = max(state.requested, len(state.new_ids))
+        return present
+
+    def _delete_nodes(self, node_ids):
+        result = self.proxy.delete_cluster_nodes(self.state.cluster_id,
+            max_parallel=self.max_parallel, nodes=node_ids)
+        # nodes gone in the meantime are fine
+        errors = {node_id: error for node_id, error in result.errors.items()
+            if not isinstance(error, exceptions.ResourceNotFound)}
+        if errors:
+            raise exceptions.SDKException(
+                "Rolling replace failed to delete nodes: {errors}".format(
+                    errors=errors))
+
+    def _delete(self, node_ids):
+        self.state.deleted_ids.extend(node_ids)
+        # persist first, the deletes are repeated on resume if needed
+        self._save()
+        self._delete_nodes(node_ids)
+
+    def _create(self, count):
+        attrs = copy.deepcopy(self.state.spec)
+        attrs.setdefault('spec', {})['count'] = count
+        # persist first: a crash after the request must not create the
+        # replacements twice on resume
+        self.state.requested += count
+        self._save()
+        try:
+            self.proxy.create_cluster_node(self.state.cluster_id, **attrs)
+        except exceptions.HttpException as ex:
+            # rejected by the API, so nothing was created
+            if ex.status_code is not None and 400 <= ex.status_code < 500:
+                self.state.requested -= count
+                self._save()
+            raise
+
+    def resume(self):
+        """ Repeat deletes which might have been lost by a crash """
+        state = self.state
+        if not state.deleted_ids:
+            return
+        present = self._observe()
+        pending = [node_id for node_id in state.deleted_ids if node_id in present
+            and _normalize_status(present[node_id].status) != 'deleting']
+        if pending:
+            self._delete_nodes(pending)
+
+    def step(self):
+        """ Observe the cluster once and issue the possible deletes and
+        creates
+
+        :returns: True if the rollout is complete
+        """
+        state = self.state
+        target = len(state.old_ids)
+        seen = len(state.new_ids)
+        present = self._observe()
+
+        failed = [present[node_id] for node_id in state.new_ids
+            if node_id in present and
+            _normalize_status(present[node_id].status) in self.failures]
+        if failed:
+            self._save()
+            raise exceptions.ResourceFailure(
+                "Replacement nodes {names} failed".format(
+                    names=", ".join(node.name for node in failed)))
+        # only old nodes are deleted, so a replacement seen before is gone
+        # because it failed
+        vanished = [node_id for node_id in state.new_ids if node_id not in present]
+        if vanished:
+            self._save()
+            raise exceptions.ResourceFailure(
+                "Replacement nodes {ids} vanished".format(ids=", ".join(vanished)))
+        if state.requested > len(state.new_ids) and len(state.new_ids) == seen:
+            self._unseen_rounds += 1
+            if self._unseen_rounds > self.max_unseen_rounds:
+                self._save()
+                raise exceptions.ResourceFailure(
+                    "{count} requested replacement nodes did not appear".format(
+                        count=state.requested - len(state.new_ids)))
+        else:
+            self._unseen_rounds = 0
+
+        active_new = [node_id for node_id in state.new_ids
+            if node_id in present and self._active(present[node_id])]
+        remaining_old = [node_id for node_id in state.old_ids if node_id in present]
+        if not remaining_old and len(active_new) >= target:
+            return True
+
+        # delete as many old nodes as the available capacity allows
+        undeleted_old = [node_id for node_id in remaining_old
+            if node_id not in state.deleted_ids]
+        available = len(active_new) + len([node_id for node_id in undeleted_old
+            if self._active(present[node_id])])
+        deletable = available - (target - self.max_unavailable)
+        if deletable > 0 and undeleted_old:
+            to_delete = undeleted_old[:deletable]
+            self.log.debug("Rolling replace: deleting %s", to_delete)
+            self._delete(to_delete)
+            undeleted_old = undeleted_old[len(to_delete):]
+
+        # create as many replacements as the surge allows
+        missing = target - state.requested
+        creatable = min(missing,
+            target + self.surge - len(undeleted_old) - state.requested)
+        if creatable > 0:
+            self.log.debug("Rolling replace: creating %d nodes", creatable)
+            self._create(creatable)
+            self._unseen_rounds = 0
+
+        self._save()
+        return False
+
+    def run(self, interval=15, wait=7200):
+        """ Run the rollout to completion
+
+        :returns: the final :class:`RolloutState`
+        :raises: :class:`~openstack.exceptions.ResourceTimeout` if the
+            rollout does not complete in time. The state is kept, so the
+            rollout can be resumed later.
+        """
+        self.resume()
+        for count in utils.iterate_timeout(
+                timeout=wait,
+                message="Timeout in rolling replace of {count} nodes in cluster {cluster}".format(
+                    count=len(self.state.old_ids), cluster=self.state.cluster_id),
+                wait=interval):
+            if self.step():
+                if self.state_file is not None and os.path.exists(self.state_file):
+                    os.remove(self.state_file)
+                return self.state
+        return self.state
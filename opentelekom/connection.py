@@ -18,9 +18,15 @@ from openstack import service_description
 
 from openstack import exceptions
 
+from opentelekom import otc_broker
+from opentelekom import otc_endpoints
+
 
 def connect_from_ansible(module):
-    """ The method contains also a temporary fix for rdsv3 endpoint """
+    """ The method contains also a temporary fix for rdsv3 endpoint.
+    If ``OTC_BROKER_SOCKET`` names the socket of a running connection
+    broker (see :mod:`opentelekom.otc_broker`), the authentication held
+    by the broker is reused. """
     # FIXME
     cloud_config = module.params.pop('cloud', None)
     try:
@@ -38,7 +44,7 @@ def connect_from_ansible(module):
             # For 'interface' parameter, fail if we receive a non-default value
             if module.params['interface'] != 'public':
                 module.fail_json(msg=fail_message.format(param='interface'))
-            cloud_conn = Connection(**cloud_config)
+            cloud_conn = otc_broker.connect(cloud_config)
         else:
             auth_dict = {
                 'cloud': cloud_config,
@@ -51,7 +57,7 @@ def connect_from_ansible(module):
                 'api_timeout': module.params['api_timeout'],
                 'interface': module.params['interface'],
             }    
-            cloud_conn = Connection(**auth_dict)
+            cloud_conn = otc_broker.connect(auth_dict)
 
         return cloud_conn
 
@@ -60,44 +66,41 @@ def connect_from_ansible(module):
         module.fail_json(msg=str(e))
 
 
-def _patch_config(prop, value, config, **params):
-    if config:
-        if prop not in config.config:
-            config.config[prop] = value
-    else:
-        if prop not in params:
-            params[prop] = value
-    return params
-
 class Connection(connection.Connection):
     """ This class intercepts the openstack connection and 
     injects some (still needed) workarounds for endpoints and version detection
     for Open Telekom Cloud """
 
 
-    def __init__(self, config=None, **params):
+    def __init__(self, config=None, endpoint_table=None, **params):
+        """ The endpoint and version workarounds come from a precomputed,
+        region-aware :class:`~opentelekom.otc_endpoints.EndpointTable`
+        (default: the process-wide table). Explicitly configured values
+        always have priority. """
+        super().__init__(config=config, **params)
 
-        # FIXME: Endpoint override workarounds: add here   
-        #_patch_config(config, 'rdsv3_endpoint_override',
-        #    "https://rds.eu-de.otc.t-systems.com/v3/%(project_id)s", **params)
-        params = _patch_config('ccev2.0_endpoint_override',
-            "https://cce.eu-de.otc.t-systems.com/api/v3/projects/%(project_id)s", 
-            config, **params)
+        # the table is expanded only once per region, and the proxies are
+        # created lazily, so it is sufficient to complete the config here
+        if endpoint_table is None:
+            endpoint_table = otc_endpoints.default_table()
+        for prop, value in endpoint_table.config_for(self.config.region_name).items():
+            self.config.config.setdefault(prop, value)
 
-        # FIXME: vpc peerings require endpoint vpc2.0 WITHOUT project_id
-        # we introduce an artificial peervpc endpoint as workaround
-        params = _patch_config('peervpc_endpoint_override',
-            "https://vpc.eu-de.otc.t-systems.com/v2.0", 
-            config, **params)
-        params = _patch_config('peervpc_api_version', "2", config, **params)
+        self._otc_request_hooks = []
 
-        # FIXME: Version detection workarounds: add here
-        params = _patch_config('vpc_api_version', "1", config, **params)
-        params = _patch_config('vpc2.0_api_version', "2", config, **params)
-        params = _patch_config('ccev2.0_api_version', "3", config, **params)
+    def add_request_hook(self, hook):
+        """Register a callable getting a
+        :class:`~opentelekom.otc_instrumentation.RequestEvent` for every
+        request issued by the Open Telekom Cloud proxies of this connection
 
-        # hand over patched config to openstack.Connection
-        super().__init__(config=config, **params)
+        :param hook: callable with the event as only parameter, e.g. a
+            :class:`~opentelekom.otc_instrumentation.RequestStatsCollector`
+        """
+        self._otc_request_hooks.append(hook)
+
+    def remove_request_hook(self, hook):
+        """Unregister a request hook"""
+        self._otc_request_hooks.remove(hook)
 
 
     # FIXME: remove if registration bug of (at least since) 0.27.0 is fixed
@@ -22,4 +22,7 @@ class Flavor(otc_resource.OtcResource):
      # capabilities
     allow_list = True
 
+    # flavors change very seldom, so cache them
+    cache_ttl = 600
+
     # no Properties
\ No newline at end of file
@@ -9,12 +9,29 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
-from openstack import proxy
+import concurrent.futures
+import threading
+
+from openstack import _log
+from openstack import exceptions
+from opentelekom import otc_proxy
+from opentelekom.dns.v2 import crawl as _crawl
 from opentelekom.dns.v2 import recordset as _rs
+from opentelekom.dns.v2 import recordset_index as _recordset_index
 from opentelekom.dns.v2 import zone as _zone
+from opentelekom.dns.v2 import zone_file as _zone_file
+from opentelekom.dns.v2 import zone_sync as _zone_sync
+
 
+class Proxy(otc_proxy.OtcProxy):
 
-class Proxy(proxy.Proxy):
+    def __init__(self, session, **kwargs):
+        super().__init__(session, **kwargs)
+        # local recordset indexes by zone id and zone indexes by zone
+        # type, see reconcile_recordsets and the find methods
+        self._recordset_indexes = {}
+        self._zone_indexes = {}
+        self._indexes_lock = threading.Lock()
 
     # ======== Zones ========
     def zones(self, **query):
@@ -48,7 +65,9 @@ class Proxy(proxy.Proxy):
         """
         if not attrs.get('project_id'):
             attrs['project_id'] = self.get_project_id()
-        return self._create(_zone.Zone, prepend_key=False, **attrs)
+        zone = self._create(_zone.Zone, prepend_key=False, **attrs)
+        self._indexed_zone(zone)
+        return zone
 
     def get_zone(self, zone, **attrs):
         """Get a zone
@@ -78,7 +97,9 @@ class Proxy(proxy.Proxy):
         """
         if not attrs.get('project_id'):
             attrs['project_id'] = self.get_project_id()
-        return self._delete(_zone.Zone, zone, ignore_missing=ignore_missing, **attrs)
+        result = self._delete(_zone.Zone, zone, ignore_missing=ignore_missing, **attrs)
+        self._unindexed_zone(zone)
+        return result
 
     def update_zone(self, zone, **attrs):
         """Update zone attributes
@@ -92,12 +113,19 @@ class Proxy(proxy.Proxy):
         """
         if not attrs.get('project_id'):
             attrs['project_id'] = self.get_project_id()
-        return self._update(_zone.Zone, zone, **attrs)
+        zone = self._update(_zone.Zone, zone, **attrs)
+        self._indexed_zone(zone)
+        return zone
 
     def find_zone(self, name_or_id, type, ignore_missing=True, **attrs):
         """Find a single zone
 
+        Without further filters, the zone is looked up in the local zone
+        index of the type, which is listed once per ``max_age`` of
+        :meth:`zone_index`. Names missing in the index are searched by API.
+
         :param name_or_id: The name or ID of a zone
+        :param type: the zone type, ``public`` or ``private``
         :param bool ignore_missing: When set to ``False``
             :class:`~openstack.exceptions.ResourceNotFound` will be raised
             when the zone does not exist.
@@ -105,11 +133,26 @@ class Proxy(proxy.Proxy):
             to delete a nonexistent zone.
 
         :returns: :class:`~openstack.dns.v2.zone.Zone`
+        :raises: :class:`~openstack.exceptions.DuplicateResource` if
+            several zones have the name, e.g. private zones of different VPCs
         """
         #if not attrs.get('project_id'):
         #    attrs['project_id'] = self.get_project_id()
+        if not attrs:
+            index = self.zone_index(type)
+            if index.expired:
+                index.load(self.zones(type=type))
+            found = index.by_id(name_or_id)
+            if found is None:
+                found = index.get(name_or_id)
+            if found is not None:
+                return found
         attrs.update({ 'type': type })    
-        return self._find(_zone.Zone, name_or_id, ignore_missing, **attrs)
+        found = self._find(_zone.Zone, name_or_id, ignore_missing, **attrs)
+        if found is not None and len(attrs) == 1:
+            # e.g. created by someone else after the listing
+            self.zone_index(type).put(found)
+        return found
 
     def abandon_zone(self, zone, **attrs):
         """Abandon Zone
@@ -149,6 +192,35 @@ class Proxy(proxy.Proxy):
             query.update({'zone_id': zone.id})
         return self._list(_rs.Recordset, **query)
 
+    def crawl_recordsets(self, zones=None, max_parallel=8, page_size=None,
+                         queue_size=1000, **query):
+        """List the recordsets of many zones in parallel, e.g. for audits
+
+        Unlike :meth:`recordsets` without zone, which pages through the
+        global recordset listing one page at a time, every zone is paged
+        by its own worker, and the next page is requested while the
+        current one is consumed.
+
+        :param zones: iterable of zone ids or
+            :class:`~openstack.dns.v2.zone.Zone` instances; all zones
+            matching the query if not given
+        :param int max_parallel: maximum number of zones listed concurrently
+        :param int page_size: recordsets per page (``limit``), the service
+            default if not given
+        :param int queue_size: maximum number of recordsets listed ahead
+        :param dict query: query parameters of :meth:`zones`, e.g. ``type``
+        :returns: a generator of :class:`~opentelekom.dns.v2.crawl.CrawlResult`
+            tagged with the zone; the zones interleave. A failing zone does
+            not stop the crawl, but yields one result with ``error`` set.
+        """
+        if zones is None:
+            zones = self.zones(**query)
+        else:
+            zones = [self._get_resource(_zone.Zone, zone) for zone in zones]
+        params = {'limit': page_size} if page_size else {}
+        return _crawl.crawl(lambda zone: self.recordsets(zone, **params), zones,
+            max_parallel=max_parallel, queue_size=queue_size)
+
     def create_recordset(self, zone, **attrs):
         """Create a new recordset in the zone
 
@@ -164,7 +236,9 @@ class Proxy(proxy.Proxy):
         attrs.update({'zone_id': zone.id})
         if not attrs.get('project_id'):
             attrs['project_id'] = self.get_project_id()
-        return self._create(_rs.Recordset, prepend_key=False, **attrs)
+        recordset = self._create(_rs.Recordset, prepend_key=False, **attrs)
+        self._indexed_recordset(zone.id, recordset)
+        return recordset
 
     def update_recordset(self, recordset, zone, **attrs):
         """Update Recordset attributes
@@ -178,7 +252,9 @@ class Proxy(proxy.Proxy):
         if not attrs.get('project_id'):
             attrs['project_id'] = self.get_project_id()
         zone = self._get_resource(_zone.Zone, zone)
-        return self._update(_rs.Recordset, recordset, zone_id=zone.id, **attrs)
+        recordset = self._update(_rs.Recordset, recordset, zone_id=zone.id, **attrs)
+        self._indexed_recordset(zone.id, recordset)
+        return recordset
 
     def get_recordset(self, recordset, zone):
         """Get a recordset
@@ -196,16 +272,44 @@ class Proxy(proxy.Proxy):
     def find_recordset(self, name_or_id, zone, ignore_missing=True, **attrs):
         """Get a recordset
 
+        Without filters other than ``type``, the recordset is looked up
+        in the local recordset index of the zone, which is listed once per
+        ``max_age`` of :meth:`recordset_index`. Names missing in the index
+        are searched by API.
+
         :param zone: The value can be the ID of a zone
              or a :class:`~openstack.dns.v2.zone.Zone` instance.
         :param recordset: The value can be the ID of a recordset
              or a :class:`~openstack.dns.v2.recordset.Recordset` instance.
         :returns: Recordset instance
         :rtype: :class:`~openstack.dns.v2.recordset.Recordset`
+        :raises: :class:`~openstack.exceptions.DuplicateResource` if the
+            name has recordsets of several types and no type is given
         """
         zone = self._get_resource(_zone.Zone, zone)
-        return self._find(_rs.Recordset, name_or_id,
+        indexed = not set(attrs) - {'type'}
+        if indexed:
+            index = self.recordset_index(zone)
+            if index.expired:
+                index.load(self.recordsets(zone))
+            type = attrs.get('type')
+            found = index.by_id(name_or_id)
+            if found is None:
+                matches = [index.get(name_or_id, type)] if type else index.named(name_or_id)
+                matches = [match for match in matches if match is not None]
+                if len(matches) > 1:
+                    raise exceptions.DuplicateResource(
+                        "More than one Recordset exists with the name '{name}'.".format(
+                            name=name_or_id))
+                found = matches[0] if matches else None
+            if found is not None and (not type or found.type == type.upper()):
+                return found
+        found = self._find(_rs.Recordset, name_or_id,
             zone_id=zone.id, ignore_missing=ignore_missing, **attrs)
+        if found is not None and indexed:
+            # e.g. created by someone else after the listing
+            self._indexed_recordset(zone.id, found)
+        return found
     
     def delete_recordset(self, recordset, zone=None, ignore_missing=True, **attrs):
         """Delete a zone
@@ -229,5 +333,206 @@ class Proxy(proxy.Proxy):
                 _rs.Recordset, recordset, zone_id=zone.id)
         if not attrs.get('project_id'):
             attrs['project_id'] = self.get_project_id()
-        return self._delete(_rs.Recordset, recordset,
-                            ignore_missing=ignore_missing, **attrs)
+        result = self._delete(_rs.Recordset, recordset,
+                              ignore_missing=ignore_missing, **attrs)
+        self._unindexed_recordset(recordset)
+        return result
+
+    # ======== Zone files ========
+    def _named_zone(self, zone):
+        """ The zone with its name, fetched only if given by id """
+        zone = self._get_resource(_zone.Zone, zone)
+        if not zone.name:
+            zone = self.get_zone(zone)
+        return zone
+
+    def export_zone_file(self, zone):
+        """Export the recordsets of a zone as BIND zone file
+
+        :param zone: The value can be the ID of a zone
+             or a :class:`~openstack.dns.v2.zone.Zone` instance.
+        :returns: the zone file text, names relative to the zone
+        :rtype: str
+        """
+        zone = self._named_zone(zone)
+        return _zone_file.export_zone_file(self.recordsets(zone), origin=zone.name,
+            default_ttl=zone.ttl)
+
+    def _apply_recordset_changes(self, zone, changes, max_parallel=8):
+        """ Apply planned changes in parallel, recording the outcome on
+        each change """
+        log = _log.setup_logging(__name__)
+
+        def _apply(change):
+            if change.action == _zone_sync.DELETE:
+                return self.delete_recordset(change.current)
+            if change.action == _zone_sync.UPDATE:
+                return self.update_recordset(change.current, zone,
+                    ttl=change.desired.ttl or change.current.ttl,
+                    records=change.desired.records)
+            attrs = {}
+            if change.desired.ttl is not None:
+                attrs['ttl'] = change.desired.ttl
+            return self.create_recordset(zone, name=change.desired.name,
+                type=change.desired.type, records=change.desired.records, **attrs)
+
+        # deletions first, a name may change its type (e.g. to CNAME)
+        for action in (_zone_sync.DELETE, _zone_sync.UPDATE, _zone_sync.CREATE):
+            todo = [change for change in changes if change.action == action]
+            if not todo:
+                continue
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=max(1, min(max_parallel, len(todo)))) as executor:
+                futures = {executor.submit(_apply, change): change for change in todo}
+                for future in concurrent.futures.as_completed(futures):
+                    change = futures[future]
+                    try:
+                        change.result = future.result()
+                        change.outcome = _zone_sync.APPLIED
+                    except exceptions.SDKException as ex:
+                        log.debug("Recordset %s %s of zone %s failed: %s",
+                            change.action, change.key, zone.name, ex)
+                        change.outcome = _zone_sync.FAILED
+                        change.error = ex
+
+    def sync_zone_file(self, zone, zone_file, prune=True, dry_run=False,
+                       max_parallel=8):
+        """Make the recordsets of a zone match a BIND zone file
+
+        The recordsets are listed once and compared by (name, type) with
+        the zone file; only the differences are created, updated or
+        deleted, with parallel requests. SOA and apex NS records are
+        managed by the DNS service and left untouched.
+
+        :param zone: The value can be the ID of a zone
+             or a :class:`~openstack.dns.v2.zone.Zone` instance.
+        :param str zone_file: the zone file text; relative names are
+            relative to the zone
+        :param bool prune: delete recordsets missing in the zone file
+        :param bool dry_run: only plan the changes
+        :param int max_parallel: maximum number of concurrent requests
+        :returns: the changes and their outcome; failed changes do not stop
+            the others
+        :rtype: :class:`~opentelekom.dns.v2.zone_sync.ZoneSyncReport`
+        """
+        zone = self._named_zone(zone)
+        desired = _zone_file.parse_zone_file(zone_file, origin=zone.name)
+        changes = _zone_sync.plan_changes(zone.name, self.recordsets(zone),
+            desired, prune=prune)
+        if not dry_run:
+            self._apply_recordset_changes(zone, changes, max_parallel=max_parallel)
+        return _zone_sync.ZoneSyncReport(zone.name, changes, dry_run=dry_run)
+
+    # ======== Local indexes ========
+    def recordset_index(self, zone, max_age=300.0):
+        """The local recordset index of a zone used by
+        :meth:`reconcile_recordsets` and :meth:`find_recordset`, created
+        empty on first use
+
+        :param zone: The value can be the ID of a zone
+             or a :class:`~openstack.dns.v2.zone.Zone` instance.
+        :param float max_age: seconds after which a new index lists the
+            zone again, even if the zone serial did not change
+        :rtype: :class:`~opentelekom.dns.v2.recordset_index.RecordsetIndex`
+        """
+        zone = self._get_resource(_zone.Zone, zone)
+        with self._indexes_lock:
+            index = self._recordset_indexes.get(zone.id)
+            if index is None:
+                index = self._recordset_indexes[zone.id] = \
+                    _recordset_index.RecordsetIndex(zone.id, max_age=max_age)
+            return index
+
+    def zone_index(self, type, max_age=300.0):
+        """The local zone index of a zone type used by :meth:`find_zone`,
+        created empty on first use
+
+        :param type: the zone type, ``public`` or ``private``
+        :param float max_age: seconds after which a new index lists the
+            zones again
+        :rtype: :class:`~opentelekom.dns.v2.recordset_index.ZoneIndex`
+        """
+        with self._indexes_lock:
+            index = self._zone_indexes.get(type)
+            if index is None:
+                index = self._zone_indexes[type] = \
+                    _recordset_index.ZoneIndex(type, max_age=max_age)
+            return index
+
+    def invalidate_indexes(self):
+        """Drop all local zone and recordset indexes, e.g. after changes
+        by other clients"""
+        with self._indexes_lock:
+            self._recordset_indexes.clear()
+            self._zone_indexes.clear()
+
+    def _indexed_zone(self, zone):
+        index = self._zone_indexes.get(zone.zone_type)
+        if index is not None:
+            index.put(zone)
+
+    def _unindexed_zone(self, zone):
+        zone_id = getattr(zone, 'id', zone)
+        for index in list(self._zone_indexes.values()):
+            index.remove(zone_id)
+        with self._indexes_lock:
+            self._recordset_indexes.pop(zone_id, None)
+
+    def _indexed_recordset(self, zone_id, recordset):
+        index = self._recordset_indexes.get(zone_id)
+        if index is not None:
+            index.put(recordset)
+
+    def _unindexed_recordset(self, recordset):
+        recordset_id = getattr(recordset, 'id', recordset)
+        for index in list(self._recordset_indexes.values()):
+            index.remove(recordset_id)
+
+    # ======== Declarative recordsets ========
+
+    def reconcile_recordsets(self, zone, desired, prune=True, max_parallel=8,
+                             max_age=300.0):
+        """Make the recordsets of a zone match a desired state
+
+        Meant to be called repeatedly with the full desired state. The
+        current recordsets come from a local index; it is listed again
+        only if the zone serial changed or the index is older than
+        max_age, otherwise the zone is fetched once to read the serial.
+        The differences are computed locally and applied in parallel, so
+        a matching state costs no write. After own writes the next call
+        lists the zone again, as the new serial cannot be attributed to
+        them. SOA and apex NS recordsets are
+        managed by the DNS service and left untouched.
+
+        :param zone: The value can be the ID of a zone
+             or a :class:`~openstack.dns.v2.zone.Zone` instance.
+        :param desired: the desired recordsets, see
+            :func:`~opentelekom.dns.v2.zone_sync.desired_entries`
+        :param bool prune: delete recordsets which are not desired
+        :param int max_parallel: maximum number of concurrent requests
+        :param float max_age: maximum age of the index in seconds
+        :returns: the changes and their outcome, empty if nothing changed
+        :rtype: :class:`~opentelekom.dns.v2.zone_sync.ZoneSyncReport`
+        """
+        zone = self.get_zone(zone)
+        index = self.recordset_index(zone, max_age=max_age)
+        with index.lock:
+            if not index.is_current(zone.serial):
+                # the serial is read before the listing, so later changes
+                # show up as a new serial
+                index.load(self.recordsets(zone), serial=zone.serial)
+            changes = _zone_sync.plan_changes(zone.name, index.values(),
+                _zone_sync.desired_entries(desired, zone.name), prune=prune)
+            if not changes:
+                return _zone_sync.ZoneSyncReport(zone.name, changes)
+
+            # the recordset calls keep the index up to date, but the index
+            # keeps the serial read before the writes: the serials are
+            # timestamps and the write responses carry none, so a foreign
+            # change in between cannot be told apart from the own ones.
+            # The next call lists the zone once again.
+            self._apply_recordset_changes(zone, changes, max_parallel=max_parallel)
+            if any(change.outcome == _zone_sync.FAILED for change in changes):
+                # the zone state after a failure is unknown
+                index.invalidate()
+        return _zone_sync.ZoneSyncReport(zone.name, changes)
@@ -0,0 +1,111 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Parallel listing of the recordsets of many zones, see
+:meth:`~opentelekom.dns.v2._proxy.Proxy.crawl_recordsets`::
+
+    for result in conn.dns.crawl_recordsets(type='private'):
+        if result.error:
+            print(result.zone.name, "failed:", result.error)
+        else:
+            print(result.zone.name, result.recordset.name)
+
+Every zone is paged by its own worker following the ``links.next`` of
+the responses. The workers hand the recordsets over through a bounded
+queue, so the next page of a zone is already requested while the
+current one is consumed, and a slow consumer throttles the workers.
+"""
+import concurrent.futures
+import queue
+import threading
+
+from openstack import _log
+
+
+class CrawlResult(object):
+    """ A recordset tagged with its zone, or the error the listing of
+    the zone raised """
+
+    def __init__(self, zone, recordset=None, error=None):
+        self.zone = zone
+        self.recordset = recordset
+        self.error = error
+
+    def __repr__(self):
+        if self.error is not None:
+            return "CrawlResult(%s, error=%r)" % (self.zone.name, self.error)
+        return "CrawlResult(%s, %s %s)" % (self.zone.name, self.recordset.name,
+            self.recordset.type)
+
+
+# marks the end of the results of one zone
+_DONE = object()
+
+
+def crawl(list_recordsets, zones, max_parallel=8, queue_size=1000):
+    """ List the recordsets of the zones in parallel and yield them as
+    they arrive
+
+    :param list_recordsets: callable getting a zone and returning an
+        iterator of its recordsets, paging on demand
+    :param zones: iterable of :class:`~opentelekom.dns.v2.zone.Zone`
+    :param int max_parallel: maximum number of zones listed concurrently
+    :param int queue_size: maximum number of recordsets listed ahead of
+        the consumer
+    :returns: a generator of :class:`CrawlResult`; the results of the
+        zones interleave, a failed zone yields one result with ``error``
+        after its recordsets listed so far
+    """
+    log = _log.setup_logging(__name__)
+    zones = list(zones)
+    results = queue.Queue(maxsize=max(1, queue_size))
+    stopped = threading.Event()
+
+    def _put(item):
+        # give up if the consumer is gone
+        while not stopped.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _list(zone):
+        try:
+            if stopped.is_set():
+                return
+            for recordset in list_recordsets(zone):
+                if not _put(CrawlResult(zone, recordset=recordset)):
+                    return
+        except Exception as ex:
+            log.debug("Recordset listing of zone %s failed: %s", zone.name, ex)
+            _put(CrawlResult(zone, error=ex))
+        finally:
+            _put(_DONE)
+
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, min(max_parallel, len(zones) or 1)))
+    try:
+        for zone in zones:
+            executor.submit(_list, zone)
+        pending = len(zones)
+        while pending:
+            item = results.get()
+            if item is _DONE:
+                pending -= 1
+            else:
+                yield item
+    finally:
+        # also on an early close of the generator
+        stopped.set()
+        executor.shutdown(wait=True)
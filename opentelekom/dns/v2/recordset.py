@@ -15,7 +15,7 @@ from openstack import resource
 from opentelekom import otc_resource
 
 
-class Recordset(otc_resource.OtcResource):
+class Recordset(otc_resource.NextLinkMixin, otc_resource.OtcResource):
     """DNS Recordset Resource"""
     #resource_key = 'recordset'
     resources_key = 'recordsets'
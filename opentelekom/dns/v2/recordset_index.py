@@ -0,0 +1,235 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Local indexes of zones and recordsets, kept by the DNS proxy for
+:meth:`~opentelekom.dns.v2._proxy.Proxy.reconcile_recordsets`,
+:meth:`~opentelekom.dns.v2._proxy.Proxy.find_recordset` and
+:meth:`~opentelekom.dns.v2._proxy.Proxy.find_zone`.
+
+An index is loaded by a full listing and afterwards updated with the
+results of the own create, update and delete calls. It is listed again
+after ``max_age`` seconds; a recordset index also if the zone serial
+differs from the serial at load time.
+"""
+import threading
+import time
+
+from openstack import exceptions
+
+from opentelekom.dns.v2 import zone_sync as _zone_sync
+
+
+def _recordset_key(recordset):
+    return _zone_sync.recordset_key(recordset.name, recordset.type)
+
+
+def _zone_name(name):
+    return _zone_sync.recordset_key(name, '')[0]
+
+
+def _zone_key(zone):
+    return (_zone_name(zone.name), zone.id)
+
+
+class _ResourceIndex(object):
+    """ Resources by key and by id
+
+    :param key: function returning the unique key of a resource
+    :param float max_age: seconds after which the index is listed again
+    """
+
+    def __init__(self, key, max_age=300.0):
+        self._key = key
+        self.max_age = max_age
+        #: time of the last full listing (monotonic seconds)
+        self.loaded = None
+        #: number of full listings
+        self.listings = 0
+        self._lock = threading.Lock()
+        self._by_key = {}
+        self._by_id = {}
+
+    @property
+    def expired(self):
+        return self.loaded is None or time.monotonic() - self.loaded > self.max_age
+
+    def _add(self, resource):
+        self._discard(resource.id)
+        self._by_key[self._key(resource)] = resource
+        self._by_id[resource.id] = resource
+
+    def _discard(self, id):
+        previous = self._by_id.pop(id, None)
+        if previous is not None:
+            self._by_key.pop(self._key(previous), None)
+        return previous
+
+    def _clear(self):
+        self._by_key = {}
+        self._by_id = {}
+
+    def load(self, resources):
+        """ Replace the index by a full listing """
+        resources = list(resources)
+        with self._lock:
+            self._clear()
+            for resource in resources:
+                self._add(resource)
+            self.loaded = time.monotonic()
+            self.listings += 1
+
+    def put(self, resource):
+        """ Add or replace a resource, e.g. after an own change """
+        with self._lock:
+            self._add(resource)
+
+    def remove(self, resource):
+        """ Drop a resource (or id), e.g. after an own deletion
+
+        :returns: the dropped resource, None if not indexed
+        """
+        with self._lock:
+            return self._discard(getattr(resource, 'id', resource))
+
+    def invalidate(self):
+        """ Force a full listing on the next use """
+        with self._lock:
+            self.loaded = None
+
+    def by_id(self, id):
+        return self._by_id.get(id)
+
+    def values(self):
+        with self._lock:
+            return list(self._by_key.values())
+
+    def __contains__(self, id):
+        return id in self._by_id
+
+    def __len__(self):
+        return len(self._by_key)
+
+
+class RecordsetIndex(_ResourceIndex):
+    """ The recordsets of one zone by (name, type), by name and by id
+
+    :param str zone_id: id of the zone
+    :param float max_age: seconds after which the index is listed again,
+        even if the zone serial did not change
+    """
+
+    def __init__(self, zone_id, max_age=300.0):
+        super().__init__(_recordset_key, max_age=max_age)
+        self.zone_id = zone_id
+        #: the zone serial the index corresponds to
+        self.serial = None
+        #: serializes the reconciliations of the zone
+        self.lock = threading.RLock()
+        self._by_name = {}
+
+    def _add(self, recordset):
+        super()._add(recordset)
+        name, type = self._key(recordset)
+        self._by_name.setdefault(name, {})[type] = recordset
+
+    def _discard(self, id):
+        previous = super()._discard(id)
+        if previous is not None:
+            name, type = self._key(previous)
+            types = self._by_name.get(name, {})
+            types.pop(type, None)
+            if not types:
+                self._by_name.pop(name, None)
+        return previous
+
+    def _clear(self):
+        super()._clear()
+        self._by_name = {}
+
+    def load(self, recordsets, serial=None):
+        """ Replace the index by a full listing of the zone """
+        # a recordset going away must be created again if desired
+        super().load(recordset for recordset in recordsets
+            if recordset.status != 'PENDING_DELETE')
+        self.serial = serial
+
+    def invalidate(self):
+        super().invalidate()
+        self.serial = None
+
+    def is_current(self, serial):
+        """ True if the index is valid for the given zone serial """
+        return not self.expired and serial is not None and serial == self.serial
+
+    def get(self, name, type):
+        return self._by_key.get(_zone_sync.recordset_key(name, type))
+
+    def named(self, name):
+        """ The recordsets of a name, of any type """
+        return list(self._by_name.get(_zone_sync.recordset_key(name, '')[0], {}).values())
+
+    def __repr__(self):
+        return "RecordsetIndex({zone_id}, recordsets={count}, serial={serial})".format(
+            zone_id=self.zone_id, count=len(self._by_key), serial=self.serial)
+
+
+class ZoneIndex(_ResourceIndex):
+    """ The zones of one zone type (``public`` or ``private``) by name
+    and by id. Private zones of the same name may exist for different
+    VPCs, so a name can have several zones.
+
+    :param str zone_type: the zone type
+    :param float max_age: seconds after which the index is listed again
+    """
+
+    def __init__(self, zone_type, max_age=300.0):
+        super().__init__(_zone_key, max_age=max_age)
+        self.zone_type = zone_type
+        self._by_name = {}
+
+    def _add(self, zone):
+        super()._add(zone)
+        self._by_name.setdefault(_zone_name(zone.name), {})[zone.id] = zone
+
+    def _discard(self, id):
+        previous = super()._discard(id)
+        if previous is not None:
+            name = _zone_name(previous.name)
+            zones = self._by_name.get(name, {})
+            zones.pop(previous.id, None)
+            if not zones:
+                self._by_name.pop(name, None)
+        return previous
+
+    def _clear(self):
+        super()._clear()
+        self._by_name = {}
+
+    def named(self, name):
+        """ The zones of a name """
+        return list(self._by_name.get(_zone_name(name), {}).values())
+
+    def get(self, name):
+        """ The zone of a name, None if not indexed
+
+        :raises: :class:`~openstack.exceptions.DuplicateResource` if
+            several zones have the name
+        """
+        zones = self.named(name)
+        if len(zones) > 1:
+            raise exceptions.DuplicateResource(
+                "More than one Zone exists with the name '{name}'.".format(name=name))
+        return zones[0] if zones else None
+
+    def __repr__(self):
+        return "ZoneIndex({zone_type}, zones={count})".format(
+            zone_type=self.zone_type, count=len(self._by_key))
@@ -17,7 +17,7 @@ from openstack import resource
 
 from opentelekom import otc_resource
 
-class Zone(otc_resource.OtcResource):
+class Zone(otc_resource.NextLinkMixin, otc_resource.OtcResource):
     """DNS ZONE Resource"""
     resources_key = 'zones'
     base_path = '/zones'
@@ -0,0 +1,254 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Parser and exporter of BIND (RFC 1035) zone files, used by
+:meth:`~opentelekom.dns.v2._proxy.Proxy.sync_zone_file` and
+:meth:`~opentelekom.dns.v2._proxy.Proxy.export_zone_file`.
+
+Supported are ``$ORIGIN`` and ``$TTL``, ``@``, relative and omitted
+owner names, optional TTL and class, TTL units (``1h30m``), comments and
+records continued in parentheses. ``$INCLUDE`` and ``$GENERATE`` are not.
+"""
+import collections
+import re
+
+from openstack import exceptions
+
+
+_CLASSES = ('IN', 'CH', 'HS')
+
+# record types with a domain name in their data, and its field position
+_NAME_FIELDS = {
+    'CNAME': 0,
+    'NS': 0,
+    'PTR': 0,
+    'MX': 1,
+    'SRV': 3,
+}
+
+_TTL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+_TTL = re.compile(r'^(\d+[smhdw]?)+$', re.IGNORECASE)
+_TTL_PART = re.compile(r'(\d+)([smhdw]?)', re.IGNORECASE)
+
+
+class ZoneEntry(object):
+    """ The records of one name and type in a zone, i.e. the desired
+    state of one recordset """
+
+    def __init__(self, name, type, ttl=None, records=None):
+        #: the absolute, lower case name with trailing dot
+        self.name = name
+        #: the upper case record type
+        self.type = type
+        #: the TTL in seconds, None for the zone default
+        self.ttl = ttl
+        #: the record data strings
+        self.records = list(records or [])
+
+    @property
+    def key(self):
+        return (self.name, self.type)
+
+    def __eq__(self, other):
+        if not isinstance(other, ZoneEntry):
+            return NotImplemented
+        return (self.key, self.ttl, self.records) == \
+            (other.key, other.ttl, other.records)
+
+    def __repr__(self):
+        return "ZoneEntry({name}, {type}, ttl={ttl}, records={records})".format(
+            name=self.name, type=self.type, ttl=self.ttl, records=self.records)
+
+
+def parse_ttl(value):
+    """ Seconds of a TTL like ``3600`` or ``1h30m`` """
+    if not _TTL.match(value):
+        raise ValueError("Invalid TTL: " + value)
+    return sum(int(number) * _TTL_UNITS[(unit or 's').lower()]
+        for number, unit in _TTL_PART.findall(value))
+
+
+def absolute_name(name, origin):
+    """ The absolute, lower case form of a zone file name """
+    if name == '@':
+        if not origin:
+            raise ValueError("'@' without $ORIGIN")
+        return origin
+    if name.endswith('.'):
+        return name.lower()
+    if not origin:
+        raise ValueError("Relative name {name} without $ORIGIN".format(name=name))
+    return (name + '.' + origin).lower()
+
+
+def relative_name(name, origin):
+    """ The shortest zone file form of an absolute name """
+    if not origin:
+        return name
+    if name == origin:
+        return '@'
+    if name.endswith('.' + origin):
+        return name[:-len(origin) - 1]
+    return name
+
+
+def _tokens(line):
+    """ Split a zone file line into tokens, without the comment. Quoted
+    strings stay one token including the quotes. """
+    tokens = []
+    position = 0
+    length = len(line)
+    while position < length:
+        char = line[position]
+        if char.isspace():
+            position += 1
+        elif char == ';':
+            break
+        elif char in '()':
+            tokens.append(char)
+            position += 1
+        elif char == '"':
+            end = position + 1
+            while end < length and line[end] != '"':
+                end += 2 if line[end] == '\\' else 1
+            if end >= length:
+                raise ValueError("Unterminated quoted string")
+            tokens.append(line[position:end + 1])
+            position = end + 1
+        else:
+            end = position
+            while end < length and not line[end].isspace() and line[end] not in ';()"':
+                end += 1
+            tokens.append(line[position:end])
+            position = end
+    return tokens
+
+
+def _logical_lines(text):
+    """ Yield (line number, starts with blank, tokens), joining records
+    continued in parentheses """
+    pending = None
+    for number, line in enumerate(text.splitlines(), 1):
+        try:
+            tokens = _tokens(line)
+        except ValueError as ex:
+            raise exceptions.SDKException(
+                "Zone file line {number}: {error}".format(number=number, error=ex))
+        if pending is not None:
+            pending[2].extend(tokens)
+        elif tokens:
+            pending = [number, line[:1].isspace(), tokens, 0]
+        else:
+            continue
+        pending[3] += tokens.count('(') - tokens.count(')')
+        if pending[3] <= 0:
+            yield pending[0], pending[1], [token for token in pending[2]
+                if token not in '()']
+            pending = None
+    if pending is not None:
+        raise exceptions.SDKException(
+            "Zone file line {number}: unbalanced parentheses".format(number=pending[0]))
+
+
+def _record_data(type, fields, origin):
+    position = _NAME_FIELDS.get(type)
+    if position is not None and position < len(fields):
+        fields = list(fields)
+        fields[position] = absolute_name(fields[position], origin)
+    return ' '.join(fields)
+
+
+def parse_zone_file(text, origin=None, default_ttl=None):
+    """ Parse a zone file into its recordsets
+
+    :param str text: the zone file content
+    :param str origin: the initial ``$ORIGIN``, e.g. the zone name
+    :param int default_ttl: TTL of records without one before ``$TTL``
+    :returns: :class:`~collections.OrderedDict` of :class:`ZoneEntry`
+        by (name, type), in the order of the file
+    :raises: :class:`~openstack.exceptions.SDKException` on syntax errors
+    """
+    if origin:
+        origin = absolute_name(origin if origin.endswith('.') else origin + '.', None)
+    entries = collections.OrderedDict()
+    owner = None
+    for number, continued, tokens in _logical_lines(text):
+        try:
+            keyword = tokens[0].upper()
+            if keyword == '$ORIGIN':
+                origin = absolute_name(tokens[1], origin)
+                continue
+            if keyword == '$TTL':
+                default_ttl = parse_ttl(tokens[1])
+                continue
+            if keyword.startswith('$'):
+                raise ValueError("Unsupported directive " + tokens[0])
+
+            if not continued:
+                owner = absolute_name(tokens.pop(0), origin)
+            elif owner is None:
+                raise ValueError("Record without owner name")
+            ttl = None
+            # TTL and class may come in either order
+            while tokens and (tokens[0].upper() in _CLASSES or _TTL.match(tokens[0])):
+                token = tokens.pop(0)
+                if token.upper() not in _CLASSES:
+                    ttl = parse_ttl(token)
+            if len(tokens) < 2:
+                raise ValueError("Record without type or data")
+            type = tokens[0].upper()
+            data = _record_data(type, tokens[1:], origin)
+        except (IndexError, ValueError) as ex:
+            raise exceptions.SDKException(
+                "Zone file line {number}: {error}".format(number=number,
+                    error=ex if str(ex) else "incomplete"))
+
+        entry = entries.get((owner, type))
+        if entry is None:
+            entry = entries[(owner, type)] = ZoneEntry(owner, type,
+                ttl if ttl is not None else default_ttl)
+        elif entry.ttl is None:
+            # like BIND, the first TTL of a recordset applies
+            entry.ttl = ttl
+        if data not in entry.records:
+            entry.records.append(data)
+    return entries
+
+
+def export_zone_file(entries, origin=None, default_ttl=None):
+    """ Write recordsets as a zone file
+
+    :param entries: iterable of :class:`ZoneEntry` or of
+        :class:`~opentelekom.dns.v2.recordset.Recordset` instances
+    :param str origin: the ``$ORIGIN``, names below it are written relative
+    :param int default_ttl: the ``$TTL``, omitted in the records using it
+    :rtype: str
+    """
+    lines = []
+    if origin:
+        origin = absolute_name(origin if origin.endswith('.') else origin + '.', None)
+        lines.append("$ORIGIN " + origin)
+    if default_ttl is not None:
+        lines.append("$TTL {ttl}".format(ttl=default_ttl))
+
+    def _order(entry):
+        # SOA first, then by name
+        return (entry.type != 'SOA', entry.name.lower(), entry.type)
+
+    for entry in sorted(entries, key=_order):
+        name = relative_name(entry.name.lower(), origin)
+        ttl = "" if entry.ttl is None or entry.ttl == default_ttl else " {ttl}".format(
+            ttl=entry.ttl)
+        for data in entry.records:
+            lines.append("{name}{ttl} IN {type} {data}".format(
+                name=name, ttl=ttl, type=entry.type.upper(), data=data))
+    return "\n".join(lines) + "\n"
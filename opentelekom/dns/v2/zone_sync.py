@@ -0,0 +1,212 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Change planning of the zone synchronisation of the DNS proxy, e.g.
+:meth:`~opentelekom.dns.v2._proxy.Proxy.sync_zone_file`.
+
+Recordsets are matched by (name, type); only differing recordsets cause
+a request, so a sync costs one listing plus one call per change.
+"""
+import collections
+import collections.abc
+import re
+
+from opentelekom.dns.v2 import zone_file as _zone_file
+
+
+#: a recordset missing in the zone
+CREATE = 'create'
+#: a recordset with other records or TTL in the zone
+UPDATE = 'update'
+#: a recordset not desired any more
+DELETE = 'delete'
+
+#: outcome of an applied change
+APPLIED = 'applied'
+#: outcome of a failed change
+FAILED = 'failed'
+
+
+def recordset_key(name, type):
+    """ The (name, type) identity of a recordset """
+    name = name.lower()
+    return (name if name.endswith('.') else name + '.', type.upper())
+
+
+# a quoted string (kept as it is), an unquoted word or a stray quote
+_DATA_TOKEN = re.compile(r'"(?:\\.|[^"\\])*"|[^\s"]+|"')
+
+
+def _normalized(type, records):
+    """ Record data compared regardless of order and of whitespace outside
+    of quoted strings; names are compared case insensitive """
+    normalized = (' '.join(_DATA_TOKEN.findall(data)) for data in records or [])
+    if type in _zone_file._NAME_FIELDS:
+        normalized = (data.lower() for data in normalized)
+    return sorted(normalized)
+
+
+def _managed(key, zone_name):
+    """ SOA and apex NS recordsets are maintained by the DNS service """
+    name, type = key
+    return type == 'SOA' or (type == 'NS' and name == zone_name)
+
+
+def desired_entries(desired, zone_name):
+    """ The :class:`~opentelekom.dns.v2.zone_file.ZoneEntry` of a desired
+    state given as Python data
+
+    :param desired: iterable of ``ZoneEntry`` or of dicts with name, type,
+        records and an optional ttl; or a mapping of (name, type) to
+        ``ZoneEntry``, to a records list or to a dict with records and ttl.
+        Names are absolute (trailing dot), ``@`` or relative to the zone.
+    :param str zone_name: the zone name
+    :rtype: list of :class:`~opentelekom.dns.v2.zone_file.ZoneEntry`
+    """
+    origin = recordset_key(zone_name, '')[0]
+
+    def _entry(name, type, ttl, records):
+        if isinstance(records, str):
+            records = [records]
+        return _zone_file.ZoneEntry(_zone_file.absolute_name(name, origin),
+            type.upper(), ttl, records)
+
+    entries = []
+    if isinstance(desired, collections.abc.Mapping):
+        for (name, type), value in desired.items():
+            if isinstance(value, _zone_file.ZoneEntry):
+                entries.append(value)
+            elif isinstance(value, collections.abc.Mapping):
+                entries.append(_entry(name, type, value.get('ttl'), value['records']))
+            else:
+                entries.append(_entry(name, type, None, value))
+        return entries
+    for value in desired:
+        if isinstance(value, _zone_file.ZoneEntry):
+            entries.append(value)
+        else:
+            entries.append(_entry(value['name'], value['type'], value.get('ttl'),
+                value['records']))
+    return entries
+
+
+class RecordsetChange(object):
+    """ One planned change of a zone sync """
+
+    def __init__(self, action, key, desired=None, current=None):
+        #: one of :data:`CREATE`, :data:`UPDATE` or :data:`DELETE`
+        self.action = action
+        #: the (name, type) of the recordset
+        self.key = key
+        #: the desired :class:`~opentelekom.dns.v2.zone_file.ZoneEntry`
+        self.desired = desired
+        #: the existing :class:`~opentelekom.dns.v2.recordset.Recordset`
+        self.current = current
+        #: :data:`APPLIED` or :data:`FAILED`, None if not applied
+        self.outcome = None
+        #: the recordset returned by the DNS service
+        self.result = None
+        #: the exception of a failed change
+        self.error = None
+
+    def __repr__(self):
+        text = "RecordsetChange({action}, {name}, {type}".format(
+            action=self.action, name=self.key[0], type=self.key[1])
+        if self.error is not None:
+            text += ", error={error!r}".format(error=self.error)
+        return text + ")"
+
+
+def plan_changes(zone_name, current, desired, prune=True):
+    """ The minimal changes turning the current into the desired recordsets
+
+    :param str zone_name: the zone name, to recognise the apex
+    :param current: iterable of the existing
+        :class:`~opentelekom.dns.v2.recordset.Recordset` instances
+    :param desired: iterable of :class:`~opentelekom.dns.v2.zone_file.ZoneEntry`
+        (or a mapping of them, e.g. a parsed zone file)
+    :param bool prune: delete recordsets which are not desired
+    :returns: list of :class:`RecordsetChange`, deletions first
+    """
+    zone_name = recordset_key(zone_name, '')[0]
+    if isinstance(desired, collections.abc.Mapping):
+        desired = desired.values()
+    wanted = collections.OrderedDict()
+    for entry in desired:
+        key = recordset_key(entry.name, entry.type)
+        if not _managed(key, zone_name):
+            wanted[key] = entry
+    existing = collections.OrderedDict()
+    for recordset in current:
+        key = recordset_key(recordset.name, recordset.type)
+        if not _managed(key, zone_name):
+            existing[key] = recordset
+
+    changes = []
+    if prune:
+        changes.extend(RecordsetChange(DELETE, key, current=recordset)
+            for key, recordset in existing.items() if key not in wanted)
+    for key, entry in wanted.items():
+        recordset = existing.get(key)
+        if recordset is None:
+            changes.append(RecordsetChange(CREATE, key, desired=entry))
+        elif _normalized(key[1], entry.records) != _normalized(key[1], recordset.records) \
+                or (entry.ttl is not None and entry.ttl != recordset.ttl):
+            changes.append(RecordsetChange(UPDATE, key, desired=entry, current=recordset))
+    return changes
+
+
+class ZoneSyncReport(object):
+    """ The planned and applied changes of a zone sync """
+
+    def __init__(self, zone, changes, dry_run=False):
+        self.zone = zone
+        #: all :class:`RecordsetChange` of the sync
+        self.changes = changes
+        #: True if the changes were only planned
+        self.dry_run = dry_run
+
+    def _with(self, action):
+        return [change for change in self.changes if change.action == action]
+
+    @property
+    def created(self):
+        return self._with(CREATE)
+
+    @property
+    def updated(self):
+        return self._with(UPDATE)
+
+    @property
+    def deleted(self):
+        return self._with(DELETE)
+
+    @property
+    def errors(self):
+        """ Exception per (name, type) of the failed changes """
+        return collections.OrderedDict((change.key, change.error)
+            for change in self.changes if change.outcome == FAILED)
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def __iter__(self):
+        return iter(self.changes)
+
+    def __len__(self):
+        return len(self.changes)
+
+    def __repr__(self):
+        return "ZoneSyncReport({zone}, created={created}, updated={updated}, deleted={deleted}, errors={errors})".format(
+            zone=self.zone, created=len(self.created), updated=len(self.updated),
+            deleted=len(self.deleted), errors=len(self.errors))
@@ -9,10 +9,23 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import collections
+import concurrent.futures
+import os
+import tempfile
+import threading
 
 from opentelekom.kms.v1 import cmk as _cmk
+from opentelekom.kms.v1 import data_key as _data_key
+from opentelekom.kms.v1 import envelope as _envelope
+from opentelekom.kms.v1 import key_bulk as _key_bulk
+from opentelekom.kms.v1 import random_data as _random_data
+from opentelekom.kms.v1 import random_pool as _random_pool
+from opentelekom.kms.v1 import materials as _materials
 #from opentelekom.dms.v1.0 import subscription as _subscription
 from opentelekom import otc_proxy
+from openstack import _log
+from openstack import exceptions
 from openstack import resource
 
 
@@ -117,3 +130,414 @@ class Proxy(otc_proxy.OtcProxy):
         """
         key_obj = self._get_key_obj(key, **params)
         return key_obj.cancel_delete(self, key_id=key_obj.key_id, sequence=key_obj.sequence)
+
+    # ======== Bulk key state changes ========
+    def _key_states(self, keys):
+        """ key_state per key id; one key listing for keys without state """
+        states = {}
+        for key in keys:
+            if not isinstance(key, str) and key.key_state is not None:
+                states[key.key_id] = int(key.key_state)
+        if any(self._key_id(key) not in states for key in keys):
+            for key in self.keys():
+                states.setdefault(key.key_id,
+                    int(key.key_state) if key.key_state is not None else None)
+        return states
+
+    def _bulk_key_action(self, name, keys, action, required, max_parallel,
+                         max_retries, backoff):
+        log = _log.setup_logging(__name__)
+        keys = list(keys)
+        report = _key_bulk.KeyStateReport(name)
+        states = self._key_states(keys)
+        gate = _key_bulk.RateLimitGate()
+        lock = threading.Lock()
+
+        todo = []
+        for key in keys:
+            key_id = self._key_id(key)
+            if key_id in report.outcomes:
+                continue
+            state = states.get(key_id)
+            if state is not None and not required(state):
+                report.outcomes[key_id] = _key_bulk.KeyStateOutcome(key_id,
+                    _key_bulk.SKIPPED)
+            else:
+                # placeholder to keep the requested order
+                report.outcomes[key_id] = None
+                todo.append(key)
+
+        def _run(key):
+            for attempt in range(max_retries + 1):
+                gate.wait()
+                try:
+                    return action(key)
+                except exceptions.HttpException as ex:
+                    if ex.status_code != 429 or attempt >= max_retries:
+                        raise
+                    with lock:
+                        report.throttled += 1
+                    gate.block(backoff * 2 ** attempt)
+
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, min(max_parallel, len(todo) or 1))) as executor:
+            futures = {executor.submit(_run, key): self._key_id(key) for key in todo}
+            for future in concurrent.futures.as_completed(futures):
+                key_id = futures[future]
+                try:
+                    report.outcomes[key_id] = _key_bulk.KeyStateOutcome(key_id,
+                        _key_bulk.CHANGED, key=future.result())
+                except exceptions.SDKException as ex:
+                    log.debug("Key %s of bulk %s failed: %s", key_id, name, ex)
+                    report.outcomes[key_id] = _key_bulk.KeyStateOutcome(key_id,
+                        _key_bulk.FAILED, error=ex)
+        return report
+
+    def enable_keys(self, keys, max_parallel=4, max_retries=5, backoff=1.0):
+        """Enable many keys; enabled keys are skipped
+
+        The key states are taken from the given key objects, or else from
+        a single key listing. The changes run in parallel; a rate limit
+        response (429) pauses all workers with exponential backoff.
+
+        :param keys: iterable of key ids or instances of
+                     :class:`~openstack.kms.v1.cmk.CustomrMasterKey`
+        :param int max_parallel: maximum number of concurrent requests
+        :param int max_retries: retries of a rate limited request
+        :param float backoff: first pause in seconds after a rate limit
+        :rtype: :class:`~opentelekom.kms.v1.key_bulk.KeyStateReport`
+        """
+        return self._bulk_key_action('enable', keys, self.enable_key,
+            lambda state: state != _key_bulk.ENABLED,
+            max_parallel, max_retries, backoff)
+
+    def disable_keys(self, keys, max_parallel=4, max_retries=5, backoff=1.0):
+        """Disable many keys; disabled keys are skipped, see
+        :meth:`enable_keys`
+
+        :rtype: :class:`~opentelekom.kms.v1.key_bulk.KeyStateReport`
+        """
+        return self._bulk_key_action('disable', keys, self.disable_key,
+            lambda state: state != _key_bulk.DISABLED,
+            max_parallel, max_retries, backoff)
+
+    def schedule_delete_keys(self, keys, pending_days=7, max_parallel=4,
+                             max_retries=5, backoff=1.0):
+        """Schedule the deletion of many keys; keys already scheduled for
+        deletion are skipped, see :meth:`enable_keys`
+
+        :param pending_days: Pending days before deletion, allow 7 to 1096
+        :rtype: :class:`~opentelekom.kms.v1.key_bulk.KeyStateReport`
+        """
+        return self._bulk_key_action('schedule_delete', keys,
+            lambda key: self.schedule_delete_key(key, pending_days=pending_days),
+            lambda state: state != _key_bulk.PENDING_DELETION,
+            max_parallel, max_retries, backoff)
+
+    def cancel_delete_keys(self, keys, max_parallel=4, max_retries=5, backoff=1.0):
+        """Cancel the deletion of many keys; keys not scheduled for
+        deletion are skipped, see :meth:`enable_keys`
+
+        :rtype: :class:`~opentelekom.kms.v1.key_bulk.KeyStateReport`
+        """
+        return self._bulk_key_action('cancel_delete', keys, self.cancel_delete_key,
+            lambda state: state == _key_bulk.PENDING_DELETION,
+            max_parallel, max_retries, backoff)
+
+    # ======== Data keys ========
+    @staticmethod
+    def _key_id(key):
+        return key if isinstance(key, str) else key.key_id
+
+    def create_datakey(self, key, datakey_length=256, encryption_context=None, **params):
+        """Generate a data key protected by a customer master key
+
+        :param key: key id or an instance of :class:`~openstack.kms.v1.cmk.CustomrMasterKey`
+        :param int datakey_length: bit length of the data key
+        :param dict encryption_context: additional authenticated data the
+                                        data key is bound to
+        :param dict params: Keyword arguments which will be used to create
+                            the data key. sequence is allowed.
+        :rtype: :class:`~opentelekom.kms.v1.data_key.DataKey` with the
+                plain and the encrypted key
+        """
+        return self._create(_data_key.DataKey, key_id=self._key_id(key),
+            datakey_length=datakey_length, encryption_context=encryption_context,
+            **params)
+
+    def decrypt_datakey(self, key, cipher_text, datakey_cipher_length=32,
+                        encryption_context=None, **params):
+        """Decrypt a data key
+
+        :param key: key id or an instance of :class:`~openstack.kms.v1.cmk.CustomrMasterKey`
+        :param str cipher_text: the hex encoded encrypted data key
+        :param int datakey_cipher_length: byte length of the plain data key
+        :param dict encryption_context: the context used for the creation
+        :param dict params: Keyword arguments which will be used to decrypt
+                            the data key. sequence is allowed.
+        :rtype: :class:`~opentelekom.kms.v1.data_key.DataKey` with the
+                plain key
+        """
+        data_key = _data_key.DataKey.new(key_id=self._key_id(key),
+            cipher_text=cipher_text, datakey_cipher_length=datakey_cipher_length,
+            encryption_context=encryption_context, **params)
+        return data_key.decrypt(self)
+
+    def encrypt_datakey(self, key, plaintext, encryption_context=None, **params):
+        """Encrypt a plain data key
+
+        :param key: key id or an instance of :class:`~openstack.kms.v1.cmk.CustomrMasterKey`
+        :param bytes plaintext: the plain data key
+        :param dict encryption_context: additional authenticated data the
+                                        data key is bound to
+        :param dict params: Keyword arguments which will be used to encrypt
+                            the data key. sequence is allowed.
+        :rtype: :class:`~opentelekom.kms.v1.data_key.DataKey` with the
+                encrypted key
+        """
+        data_key = _data_key.DataKey.new(key_id=self._key_id(key),
+            plain_text=bytes(plaintext).hex(),
+            encryption_context=encryption_context, **params)
+        return data_key.encrypt(self)
+
+    def _bulk_datakeys(self, items, call, max_parallel, identity):
+        """Run call once per distinct item in parallel and return the
+        results in the order of the items"""
+        log = _log.setup_logging(__name__)
+        items = list(items)
+        unique = collections.OrderedDict()
+        for item in items:
+            unique.setdefault(identity(item), item)
+
+        outcomes = {}
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, min(max_parallel, len(unique) or 1))) as executor:
+            futures = {executor.submit(call, item): ident
+                for ident, item in unique.items()}
+            for future in concurrent.futures.as_completed(futures):
+                ident = futures[future]
+                try:
+                    outcomes[ident] = _data_key.DataKeyResult(unique[ident],
+                        data_key=future.result())
+                except exceptions.SDKException as ex:
+                    log.debug("Bulk data key operation failed: %s", ex)
+                    outcomes[ident] = _data_key.DataKeyResult(unique[ident], error=ex)
+        return [outcomes[identity(item)] for item in items]
+
+    def decrypt_datakeys(self, key, cipher_texts, datakey_cipher_length=32,
+                         encryption_context=None, max_parallel=8):
+        """Decrypt many data keys with parallel KMS calls, e.g. to unwrap
+        the stored data keys of a service on startup.
+
+        Identical cipher texts are decrypted only once.
+
+        :param key: key id or an instance of :class:`~openstack.kms.v1.cmk.CustomrMasterKey`
+        :param cipher_texts: iterable of hex encoded encrypted data keys
+        :param int datakey_cipher_length: byte length of the plain data keys
+        :param dict encryption_context: the context used for the creation
+        :param int max_parallel: maximum number of concurrent KMS calls
+        :returns: list of :class:`~opentelekom.kms.v1.data_key.DataKeyResult`
+                  in the order of cipher_texts; a failed item has its
+                  ``error`` set and does not stop the others.
+        """
+        return self._bulk_datakeys(cipher_texts,
+            lambda cipher_text: self.decrypt_datakey(key, cipher_text,
+                datakey_cipher_length=datakey_cipher_length,
+                encryption_context=encryption_context),
+            max_parallel, identity=lambda cipher_text: cipher_text.lower())
+
+    def encrypt_datakeys(self, key, plaintexts, encryption_context=None,
+                         max_parallel=8):
+        """Encrypt many plain data keys with parallel KMS calls.
+
+        Identical plain keys are encrypted only once.
+
+        :param key: key id or an instance of :class:`~openstack.kms.v1.cmk.CustomrMasterKey`
+        :param plaintexts: iterable of plain data keys (bytes)
+        :param dict encryption_context: additional authenticated data the
+                                        data keys are bound to
+        :param int max_parallel: maximum number of concurrent KMS calls
+        :returns: list of :class:`~opentelekom.kms.v1.data_key.DataKeyResult`
+                  in the order of plaintexts; a failed item has its
+                  ``error`` set and does not stop the others.
+        """
+        return self._bulk_datakeys(plaintexts,
+            lambda plaintext: self.encrypt_datakey(key, plaintext,
+                encryption_context=encryption_context),
+            max_parallel, identity=bytes)
+
+    def materials_manager(self, key, **limits):
+        """A local data key cache for envelope encryption with few KMS calls
+
+        :param key: key id or an instance of :class:`~openstack.kms.v1.cmk.CustomrMasterKey`
+        :param dict limits: max_age, max_messages, max_bytes, capacity and
+                            datakey_length of
+                            :class:`~opentelekom.kms.v1.materials.CachingMaterialsManager`
+        :rtype: :class:`~opentelekom.kms.v1.materials.CachingMaterialsManager`
+        """
+        return _materials.CachingMaterialsManager(self, self._key_id(key), **limits)
+
+    # ======== Random numbers ========
+    def gen_random(self, length=32, **params):
+        """Generate random bytes in KMS
+
+        Lengths above 1024 bytes are split into several KMS requests.
+
+        :param int length: number of random bytes
+        :param dict params: Keyword arguments which will be used to
+                            generate the random bytes. sequence is allowed.
+        :rtype: bytes
+        """
+        chunks = []
+        remaining = length
+        while remaining > 0:
+            size = min(remaining, _random_data.RandomData.max_length)
+            chunks.append(self._create(_random_data.RandomData,
+                random_data_length=size * 8, **params).data)
+            remaining -= size
+        return b"".join(chunks)
+
+    def random_pool(self, **sizes):
+        """A thread-safe pool of prefetched KMS random bytes for high
+        request rates
+
+        :param dict sizes: block_size, low_watermark, max_blocks and timeout
+                           of :class:`~opentelekom.kms.v1.random_pool.RandomPool`
+        :rtype: :class:`~opentelekom.kms.v1.random_pool.RandomPool`
+        """
+        return _random_pool.RandomPool(self, **sizes)
+
+    # ======== Envelope encryption ========
+    def _envelope_encrypt(self, key, chunks, target, plaintext_length,
+                          encryption_context, chunk_size, max_workers, materials):
+        if materials is not None:
+            material = materials.encryption_materials(plaintext_length,
+                encryption_context=encryption_context)
+            key_id, cipher_text, plain = materials.key_id, material.cipher_text, \
+                material.plaintext
+        else:
+            material = None
+            data_key = self.create_datakey(key, datakey_length=256,
+                encryption_context=encryption_context)
+            key_id, cipher_text, plain = self._key_id(key), data_key.cipher_text, \
+                data_key.plaintext
+        try:
+            header = _envelope.EnvelopeHeader(key_id, cipher_text,
+                chunk_size=chunk_size, encryption_context=encryption_context)
+            total = _envelope.encrypt_chunks(plain, header, chunks, target,
+                max_workers=max_workers)
+            if material is not None and total > plaintext_length:
+                # the length of a stream is only known now
+                materials.record_bytes(material, total - plaintext_length,
+                    encryption_context)
+            return total
+        finally:
+            if material is not None:
+                material.release()
+            else:
+                _materials.zeroize(plain)
+
+    def _envelope_decrypt(self, source, target, max_workers, materials):
+        header, raw_header = _envelope.EnvelopeHeader.read(source)
+        if materials is not None:
+            material = materials.decryption_materials(header.cipher_text,
+                encryption_context=header.encryption_context)
+            plain = material.plaintext
+        else:
+            material = None
+            plain = self.decrypt_datakey(header.key_id, header.cipher_text,
+                datakey_cipher_length=32,
+                encryption_context=header.encryption_context).plaintext
+        try:
+            return _envelope.decrypt_frames(plain, header, raw_header, source,
+                target, max_workers=max_workers)
+        finally:
+            if material is not None:
+                material.release()
+            else:
+                _materials.zeroize(plain)
+
+    def encrypt_stream(self, key, source, target, encryption_context=None,
+                       chunk_size=_envelope.DEFAULT_CHUNK_SIZE, max_workers=1,
+                       materials=None):
+        """Envelope encrypt a binary stream of any size chunk by chunk with
+        AES-256-GCM and a new (or cached) KMS data key.
+
+        :param key: key id or an instance of :class:`~openstack.kms.v1.cmk.CustomrMasterKey`
+        :param source: readable binary stream
+        :param target: writable binary stream for the encrypted data
+        :param dict encryption_context: additional authenticated data the
+                                        data key is bound to
+        :param int chunk_size: plaintext bytes per encrypted chunk
+        :param int max_workers: number of threads encrypting chunks
+        :param materials: optional
+            :class:`~opentelekom.kms.v1.materials.CachingMaterialsManager`
+            to reuse data keys of 256 bit; its key replaces ``key``
+        :returns: number of plaintext bytes
+        """
+        return self._envelope_encrypt(key,
+            _envelope.stream_chunks(source, chunk_size), target, 0,
+            encryption_context, chunk_size, max_workers, materials)
+
+    def decrypt_stream(self, source, target, max_workers=1, materials=None):
+        """Decrypt a stream written by :meth:`encrypt_stream`. The key and
+        the encryption context are taken from the stream header.
+
+        Chunks are written when they are authenticated, so the target must
+        be discarded if the decryption fails.
+
+        :param source: readable binary stream with the encrypted data
+        :param target: writable binary stream for the plain data
+        :param int max_workers: number of threads decrypting chunks
+        :param materials: optional
+            :class:`~opentelekom.kms.v1.materials.CachingMaterialsManager`
+        :returns: number of plaintext bytes
+        :raises: :class:`~openstack.exceptions.SDKException` if the data
+                 was modified or truncated
+        """
+        return self._envelope_decrypt(source, target, max_workers, materials)
+
+    @staticmethod
+    def _write_file(target_path, write):
+        """ Write to a temporary file and move it into place on success """
+        descriptor, tmpname = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(target_path)))
+        try:
+            with os.fdopen(descriptor, 'wb') as target:
+                result = write(target)
+            os.replace(tmpname, target_path)
+            return result
+        finally:
+            if os.path.exists(tmpname):
+                os.remove(tmpname)
+
+    def encrypt_file(self, key, path, target_path, encryption_context=None,
+                     chunk_size=_envelope.DEFAULT_CHUNK_SIZE, max_workers=1,
+                     materials=None):
+        """Envelope encrypt a file with constant memory, see
+        :meth:`encrypt_stream`. The file is read memory mapped.
+
+        :param str path: the plain file
+        :param str target_path: the encrypted file, written only on success
+        :returns: number of plaintext bytes
+        """
+        def _write(target):
+            with _envelope.file_chunks(path, chunk_size) as chunks:
+                return self._envelope_encrypt(key, chunks, target,
+                    os.path.getsize(path), encryption_context, chunk_size,
+                    max_workers, materials)
+        return self._write_file(target_path, _write)
+
+    def decrypt_file(self, path, target_path, max_workers=1, materials=None):
+        """Decrypt a file written by :meth:`encrypt_file` or
+        :meth:`encrypt_stream`
+
+        :param str path: the encrypted file
+        :param str target_path: the plain file, written only on success
+        :returns: number of plaintext bytes
+        """
+        def _write(target):
+            with open(path, 'rb') as source:
+                return self._envelope_decrypt(source, target, max_workers,
+                    materials)
+        return self._write_file(target_path, _write)
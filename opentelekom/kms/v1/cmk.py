@@ -64,14 +64,13 @@ class CustomerMasterKey(otc_resource.OtcResource, otc_resource.TagMixin):
     origin = resource.Body("origin")
 
     def _otc_delete(self, session, base_path, microversion=None, **kwargs):
-        preserve_resource_key = self.resource_key
-        self.resource_key = None
-        result = self._otc_action(session, base_path, microversion, **kwargs)
-        self.resource_key = preserve_resource_key
-        return result
+        # The deletion responses are not wrapped into resource_key, and the
+        # response translation only unwraps bodies containing the key. So the
+        # shared resource_key is left untouched to keep concurrent calls safe.
+        return self._otc_action(session, base_path, microversion, **kwargs)
 
     def _otc_action(self, session, base_path, microversion=None, **kwargs):
-        body = kwargs
+        body = dict(kwargs)
         session = self._get_session(session)
         microversion = self._get_microversion_for(session, 'create')
 
@@ -112,8 +111,8 @@ class CustomerMasterKey(otc_resource.OtcResource, otc_resource.TagMixin):
         try:
             if base_path is None:
                 base_path = "/kms/describe-key"
-            body = params
-            body['key_id'] = self.id
+            # a new body dict, the caller's params stay untouched
+            body = dict(params, key_id=self.id)
             session = self._get_session(session)
             microversion = self._get_microversion_for(session, 'fetch')
             response = session.post(url=base_path, microversion=microversion, json=body)
@@ -140,7 +139,7 @@ class CustomerMasterKey(otc_resource.OtcResource, otc_resource.TagMixin):
 
         # FIXIT: pagination not suppoprted yet
         #body = {}
-        body = kwargs
+        body = dict(kwargs)
         session = cls._get_session(session)
         microversion = cls._get_microversion_for_list(session)
 
@@ -0,0 +1,113 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import hashlib
+
+from openstack import resource
+from opentelekom import otc_resource
+
+
+class DataKey(otc_resource.OtcResource):
+    """ A data key for envelope encryption, protected by a customer
+    master key. KMS returns the key hex encoded, in plain (only on
+    creation or decryption) and encrypted by the master key. """
+    base_path = None
+
+    # capabilities
+    allow_create = True
+
+    # Properties
+    #: key_id: id of the customer master key protecting the data key
+    key_id = resource.Body("key_id", alternate_id=True)
+    #: encryption_context: additional authenticated data (optional)
+    encryption_context = resource.Body("encryption_context", type=dict)
+    #: datakey_length: bit length of a new data key, 8..8192
+    datakey_length = resource.Body("datakey_length")
+    #: datakey_cipher_length: byte length of the plain data key to decrypt
+    datakey_cipher_length = resource.Body("datakey_cipher_length")
+    #: datakey_plain_length: byte length of the plain data key to encrypt
+    datakey_plain_length = resource.Body("datakey_plain_length")
+    #: sequence: an external, 36-byte serial number as additional reference
+    sequence = resource.Body("sequence")
+    #---- returned only by KMS
+    #: plain_text: hex encoded plain data key of a created key
+    plain_text = resource.Body("plain_text")
+    #: cipher_text: hex encoded data key, encrypted by the master key
+    cipher_text = resource.Body("cipher_text")
+    #: data_key: hex encoded plain data key of a decrypted key
+    data_key = resource.Body("data_key")
+
+    def _kms_action(self, session, base_path, body):
+        session = self._get_session(session)
+        microversion = self._get_microversion_for(session, 'create')
+        resp = session.post(url=base_path, json=otc_resource.filter_none(body),
+            microversion=microversion)
+        self._translate_response(resp)
+        return self
+
+    def create(self, session, prepend_key=False, base_path=None):
+        """ Generate a new data key (plain and encrypted) """
+        return self._kms_action(session, base_path or '/kms/create-datakey', {
+            'key_id': self.key_id,
+            'encryption_context': self.encryption_context,
+            'datakey_length': str(self.datakey_length) if self.datakey_length else None,
+            'sequence': self.sequence,
+        })
+
+    def decrypt(self, session, base_path=None):
+        """ Decrypt the encrypted data key ``cipher_text`` """
+        return self._kms_action(session, base_path or '/kms/decrypt-datakey', {
+            'key_id': self.key_id,
+            'encryption_context': self.encryption_context,
+            'cipher_text': self.cipher_text,
+            'datakey_cipher_length': str(self.datakey_cipher_length),
+            'sequence': self.sequence,
+        })
+
+    def encrypt(self, session, base_path=None):
+        """ Encrypt the plain data key ``plain_text`` """
+        plain = bytes.fromhex(self.plain_text)
+        return self._kms_action(session, base_path or '/kms/encrypt-datakey', {
+            'key_id': self.key_id,
+            'encryption_context': self.encryption_context,
+            # KMS checks the key against its appended SHA-256 digest
+            'plain_text': self.plain_text + hashlib.sha256(plain).hexdigest(),
+            'datakey_plain_length': str(len(plain)),
+            'sequence': self.sequence,
+        })
+
+    @property
+    def plaintext(self):
+        """ The plain data key as mutable bytes, None if unknown """
+        hexkey = self.data_key or self.plain_text
+        return bytearray.fromhex(hexkey) if hexkey else None
+
+
+class DataKeyResult(object):
+    """ Outcome of one item of a bulk data key operation: the data key,
+    or the error KMS returned for the item """
+
+    def __init__(self, item, data_key=None, error=None):
+        #: the input item (encrypted or plain data key)
+        self.item = item
+        #: the :class:`DataKey` result
+        self.data_key = data_key
+        #: the exception of a failed item
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.error is not None:
+            return "DataKeyResult(error=%r)" % self.error
+        return "DataKeyResult(key_id=%s)" % self.data_key.key_id
@@ -0,0 +1,308 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Streaming envelope encryption with KMS data keys, see
+:meth:`~opentelekom.kms.v1._proxy.Proxy.encrypt_stream` and
+:meth:`~opentelekom.kms.v1._proxy.Proxy.encrypt_file`.
+
+The data is encrypted in chunks with AES-GCM, so streams of any size
+are processed with constant memory. Encrypted format::
+
+    header: magic "OTCKMSE2", chunk size (u32), salt (32 bytes),
+            key id, encrypted data key, encryption context
+            (each as u16 length + utf-8 bytes)
+    frames: final flag (u8), ciphertext length (u32), ciphertext + tag
+
+A cached data key encrypts many messages, so the chunks are not
+encrypted with the data key itself: the message key and a nonce prefix
+are derived from the data key and the random salt of the message with
+HKDF-SHA256. The nonce of a chunk is the nonce prefix followed by the
+chunk number.
+Every chunk authenticates the header digest, its number and the final
+flag, so modified headers, reordered, dropped or truncated chunks fail
+the decryption.
+"""
+import collections
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import concurrent.futures
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from openstack import exceptions
+
+
+MAGIC = b"OTCKMSE2"
+
+#: default plaintext chunk size
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+_FRAME = struct.Struct(">BI")
+_TAG_SIZE = 16
+_SALT_SIZE = 32
+_KEY_SIZE = 32
+_NONCE_PREFIX_SIZE = 8
+
+
+def _pack_field(text):
+    raw = text.encode('utf-8')
+    return struct.pack(">H", len(raw)) + raw
+
+
+def _read_exact(source, size):
+    data = _read_full(source, size)
+    if len(data) != size:
+        raise exceptions.SDKException("Encrypted stream is truncated")
+    return data
+
+
+def _read_field(source):
+    size, = struct.unpack(">H", _read_exact(source, 2))
+    return _read_exact(source, size).decode('utf-8')
+
+
+class EnvelopeHeader(object):
+    """ The unencrypted header of an encrypted stream """
+
+    def __init__(self, key_id, cipher_text, chunk_size=DEFAULT_CHUNK_SIZE,
+                 salt=None, encryption_context=None):
+        self.key_id = key_id
+        #: the hex encoded encrypted data key
+        self.cipher_text = cipher_text
+        self.chunk_size = chunk_size
+        #: random per message, the message key is derived from it
+        self.salt = salt or os.urandom(_SALT_SIZE)
+        self.encryption_context = encryption_context
+
+    def message_key(self, plain_key):
+        """ The key and nonce prefix of this message, derived from the
+        plain data key and the salt
+
+        :returns: tuple of the AES key and the nonce prefix
+        """
+        derived = HKDF(algorithm=hashes.SHA256(),
+            length=_KEY_SIZE + _NONCE_PREFIX_SIZE, salt=self.salt,
+            info=MAGIC, backend=default_backend()).derive(bytes(plain_key))
+        return derived[:_KEY_SIZE], derived[_KEY_SIZE:]
+
+    def to_bytes(self):
+        context = json.dumps(self.encryption_context, sort_keys=True) \
+            if self.encryption_context else ""
+        return MAGIC + struct.pack(">I", self.chunk_size) + self.salt + \
+            _pack_field(self.key_id) + _pack_field(self.cipher_text) + \
+            _pack_field(context)
+
+    @classmethod
+    def read(cls, source):
+        """ Read the header from the start of a stream
+
+        :returns: tuple of the header and its raw bytes
+        """
+        magic = source.read(len(MAGIC))
+        if magic != MAGIC:
+            raise exceptions.SDKException("Not an envelope encrypted stream")
+        chunk_size, = struct.unpack(">I", _read_exact(source, 4))
+        salt = _read_exact(source, _SALT_SIZE)
+        key_id = _read_field(source)
+        cipher_text = _read_field(source)
+        context = _read_field(source)
+        header = cls(key_id, cipher_text, chunk_size=chunk_size,
+            salt=salt,
+            encryption_context=json.loads(context) if context else None)
+        return header, header.to_bytes()
+
+
+def _chunk_aad(digest, number, final):
+    return digest + struct.pack(">QB", number, 1 if final else 0)
+
+
+def _nonce(prefix, number):
+    if number >= 2 ** 32:
+        raise exceptions.SDKException("Too many chunks for one message key")
+    return prefix + struct.pack(">I", number)
+
+
+def _read_full(source, size):
+    """ Read size bytes, less only at the end of the stream """
+    data = source.read(size) or b""
+    while data and len(data) < size:
+        more = source.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+def stream_chunks(source, chunk_size):
+    """ Yield the (data, final) chunks of a readable binary stream """
+    current = _read_full(source, chunk_size)
+    while True:
+        following = _read_full(source, chunk_size) if len(current) == chunk_size else b""
+        final = not following
+        yield current, final
+        if final:
+            return
+        current = following
+
+
+def _mapped_chunks(mapped, size, chunk_size):
+    if size == 0:
+        yield b"", True
+        return
+    for offset in range(0, size, chunk_size):
+        yield mapped[offset:offset + chunk_size], offset + chunk_size >= size
+
+
+def _ordered(executor, function, items, window):
+    """ Map function over items with at most window pending calls, in
+    order. Without executor, the calls run inline. """
+    if executor is None:
+        for item in items:
+            yield function(item)
+        return
+    pending = collections.deque()
+    for item in items:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def encrypt_chunks(plain_key, header, chunks, target, max_workers=1):
+    """ Write the header and the encrypted frames of chunks to target
+
+    :param plain_key: the plain data key
+    :param header: the :class:`EnvelopeHeader`
+    :param chunks: iterable of (data, final) tuples
+    :param target: writable binary stream
+    :param int max_workers: number of threads encrypting chunks
+    :returns: number of plaintext bytes
+    """
+    message_key, nonce_prefix = header.message_key(plain_key)
+    cipher = AESGCM(message_key)
+    raw_header = header.to_bytes()
+    digest = hashlib.sha256(raw_header).digest()
+    target.write(raw_header)
+
+    def _encrypt(numbered):
+        number, (data, final) = numbered
+        return len(data), final, cipher.encrypt(_nonce(nonce_prefix, number),
+            data, _chunk_aad(digest, number, final))
+
+    total = 0
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) \
+        if max_workers > 1 else None
+    try:
+        for size, final, encrypted in _ordered(executor, _encrypt,
+                enumerate(chunks), 2 * max_workers):
+            target.write(_FRAME.pack(1 if final else 0, len(encrypted)))
+            target.write(encrypted)
+            total += size
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+    return total
+
+
+def _frames(source, header):
+    """ Yield (number, final, ciphertext) of the frames following the
+    header """
+    limit = header.chunk_size + _TAG_SIZE
+    number = 0
+    while True:
+        final, size = _FRAME.unpack(_read_exact(source, _FRAME.size))
+        if size > limit:
+            raise exceptions.SDKException("Encrypted chunk exceeds the chunk size")
+        yield number, bool(final), _read_exact(source, size)
+        if final:
+            if source.read(1):
+                raise exceptions.SDKException("Data after the final encrypted chunk")
+            return
+        number += 1
+
+
+def decrypt_frames(plain_key, header, raw_header, source, target, max_workers=1):
+    """ Decrypt the frames following the header from source to target.
+
+    Chunks are written as soon as they are authenticated, so the target
+    must be discarded if the decryption fails.
+
+    :returns: number of plaintext bytes
+    :raises: :class:`~openstack.exceptions.SDKException` if the stream
+        was modified or truncated
+    """
+    message_key, nonce_prefix = header.message_key(plain_key)
+    cipher = AESGCM(message_key)
+    digest = hashlib.sha256(raw_header).digest()
+
+    def _decrypt(frame):
+        number, final, encrypted = frame
+        try:
+            return cipher.decrypt(_nonce(nonce_prefix, number), encrypted,
+                _chunk_aad(digest, number, final))
+        except InvalidTag:
+            raise exceptions.SDKException(
+                "Encrypted chunk {number} failed authentication".format(number=number))
+
+    total = 0
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) \
+        if max_workers > 1 else None
+    try:
+        for data in _ordered(executor, _decrypt, _frames(source, header),
+                2 * max_workers):
+            target.write(data)
+            total += len(data)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+    return total
+
+
+def file_chunks(path, chunk_size):
+    """ Context manager yielding the (data, final) chunks of a file,
+    memory mapped if possible """
+    return _FileChunks(path, chunk_size)
+
+
+class _FileChunks(object):
+
+    def __init__(self, path, chunk_size):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._file = None
+        self._mapped = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            return _mapped_chunks(None, 0, self.chunk_size)
+        try:
+            self._mapped = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # e.g. pipes or special files
+            return stream_chunks(self._file, self.chunk_size)
+        return _mapped_chunks(self._mapped, size, self.chunk_size)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._mapped is not None:
+            self._mapped.close()
+        self._file.close()
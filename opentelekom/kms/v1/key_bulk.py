@@ -0,0 +1,118 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Helpers of the bulk key state operations of the KMS proxy, e.g.
+:meth:`~opentelekom.kms.v1._proxy.Proxy.enable_keys`.
+"""
+import collections
+import threading
+import time
+
+
+#: key_state of an enabled key
+ENABLED = 2
+#: key_state of a disabled key
+DISABLED = 3
+#: key_state of a key scheduled for deletion
+PENDING_DELETION = 4
+
+#: outcome of a key with an issued state change
+CHANGED = 'changed'
+#: outcome of a key already in the target state
+SKIPPED = 'skipped'
+#: outcome of a key whose state change failed
+FAILED = 'failed'
+
+
+class KeyStateOutcome(object):
+    """ Result of a bulk key state operation for a single key """
+
+    def __init__(self, key_id, outcome, key=None, error=None):
+        self.key_id = key_id
+        #: one of :data:`CHANGED`, :data:`SKIPPED` or :data:`FAILED`
+        self.outcome = outcome
+        #: the key as returned by KMS (changed keys only)
+        self.key = key
+        #: the exception of a failed key
+        self.error = error
+
+    def __repr__(self):
+        if self.error is not None:
+            return "KeyStateOutcome(%s, %s, error=%r)" % (self.key_id, self.outcome, self.error)
+        return "KeyStateOutcome(%s, %s)" % (self.key_id, self.outcome)
+
+
+class KeyStateReport(object):
+    """ Per-key outcomes of a bulk key state operation, in the order of
+    the requested keys """
+
+    def __init__(self, action):
+        #: the operation, e.g. ``enable``
+        self.action = action
+        #: outcome per key id
+        self.outcomes = collections.OrderedDict()
+        #: number of requests repeated because of rate limiting
+        self.throttled = 0
+
+    def _with(self, outcome):
+        return [key_id for key_id, result in self.outcomes.items()
+            if result.outcome == outcome]
+
+    @property
+    def changed(self):
+        return self._with(CHANGED)
+
+    @property
+    def skipped(self):
+        return self._with(SKIPPED)
+
+    @property
+    def errors(self):
+        """ Exception per failed key id """
+        return collections.OrderedDict((key_id, result.error)
+            for key_id, result in self.outcomes.items() if result.outcome == FAILED)
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def __iter__(self):
+        return iter(self.outcomes.values())
+
+    def __len__(self):
+        return len(self.outcomes)
+
+    def __repr__(self):
+        return "KeyStateReport({action}, changed={changed}, skipped={skipped}, errors={errors})".format(
+            action=self.action, changed=len(self.changed),
+            skipped=len(self.skipped), errors=len(self.errors))
+
+
+class RateLimitGate(object):
+    """ Pauses all workers of a bulk operation after a rate limit
+    response, instead of letting each one retry on its own """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._until = 0.0
+
+    def block(self, seconds):
+        with self._lock:
+            self._until = max(self._until, time.monotonic() + seconds)
+
+    def wait(self):
+        while True:
+            with self._lock:
+                delay = self._until - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
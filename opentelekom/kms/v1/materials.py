@@ -0,0 +1,261 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Local caching of KMS data keys for envelope encryption, created by
+:meth:`~opentelekom.kms.v1._proxy.Proxy.materials_manager`::
+
+    manager = conn.kmsv1.materials_manager(key, max_age=300)
+    with manager.encryption_materials(len(data)) as material:
+        # encrypt data with material.plaintext,
+        # store material.cipher_text beside the encrypted data
+    with manager.decryption_materials(cipher_text) as material:
+        # decrypt with material.plaintext
+
+A cached plain data key is reused for new messages until it reaches its
+maximum age, message count or byte count. Keys leaving the cache are
+overwritten in memory as soon as the last user released them.
+"""
+import collections
+import json
+import threading
+import time
+
+from openstack import exceptions
+
+
+def zeroize(buffer):
+    """ Overwrite a mutable buffer (e.g. a plain key bytearray) with zeros """
+    buffer[:] = bytes(len(buffer))
+
+
+class DataKeyMaterial(object):
+    """ A plain data key with its encrypted form and usage counters.
+    Use it as a context manager, or call :meth:`release` when done. """
+
+    def __init__(self, key_id, plaintext, cipher_text, encryption_context=None):
+        #: the customer master key id
+        self.key_id = key_id
+        #: the plain data key, overwritten with zeros on eviction
+        self.plaintext = bytearray(plaintext)
+        #: hex encoded data key encrypted by the master key
+        self.cipher_text = cipher_text
+        #: the encryption context bound to the data key
+        self.encryption_context = encryption_context
+        #: creation time (monotonic seconds)
+        self.created = time.monotonic()
+        #: number of messages encrypted with the key
+        self.messages = 0
+        #: number of plain bytes encrypted with the key
+        self.bytes = 0
+        self._users = 0
+        self._retired = False
+        self._lock = threading.Lock()
+
+    @property
+    def age(self):
+        return time.monotonic() - self.created
+
+    def acquire(self):
+        with self._lock:
+            self._users += 1
+        return self
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            if self._retired and self._users <= 0:
+                self._zeroize()
+
+    def retire(self):
+        """ Remove from use; zeroize now or after the last release """
+        with self._lock:
+            self._retired = True
+            if self._users <= 0:
+                self._zeroize()
+
+    def _zeroize(self):
+        zeroize(self.plaintext)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def __repr__(self):
+        # never show the plain key
+        return "DataKeyMaterial(key_id={key_id}, messages={messages}, bytes={bytes})".format(
+            key_id=self.key_id, messages=self.messages, bytes=self.bytes)
+
+
+def _context_key(encryption_context):
+    if not encryption_context:
+        return ""
+    return json.dumps(encryption_context, sort_keys=True)
+
+
+class CachingMaterialsManager(object):
+    """ Hands out data keys for encryption and decryption, calling KMS
+    only if no usable key is cached.
+
+    :param proxy: the KMS proxy
+    :param str key_id: id of the customer master key
+    :param float max_age: seconds a plain data key is used at most
+    :param int max_messages: messages encrypted with one data key at most
+    :param int max_bytes: plain bytes encrypted with one data key at most
+    :param int capacity: maximum number of cached data keys, the least
+        recently used key is evicted first
+    :param int datakey_length: bit length of new data keys
+    """
+
+    def __init__(self, proxy, key_id, max_age=300.0, max_messages=2 ** 32,
+                 max_bytes=2 ** 36, capacity=64, datakey_length=256):
+        if max_age <= 0 or max_messages < 1 or max_bytes < 0 or capacity < 1:
+            raise exceptions.InvalidRequest(
+                "Data key cache limits must be positive")
+        self.proxy = proxy
+        self.key_id = key_id
+        self.max_age = max_age
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.capacity = capacity
+        self.datakey_length = datakey_length
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        #: number of KMS calls issued
+        self.kms_calls = 0
+        #: number of requests served from the cache
+        self.hits = 0
+
+    def _usable(self, material, plaintext_length=0):
+        return material.age < self.max_age and \
+            material.messages < self.max_messages and \
+            material.bytes + plaintext_length <= self.max_bytes
+
+    def _lookup(self, cache_key):
+        material = self._entries.get(cache_key)
+        if material is not None:
+            self._entries.move_to_end(cache_key)
+        return material
+
+    def _store(self, cache_key, material):
+        previous = self._entries.pop(cache_key, None)
+        if previous is not None:
+            previous.retire()
+        self._entries[cache_key] = material
+        while len(self._entries) > self.capacity:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            evicted.retire()
+
+    def _evict(self, cache_key):
+        material = self._entries.pop(cache_key, None)
+        if material is not None:
+            material.retire()
+
+    def encryption_materials(self, plaintext_length=0, encryption_context=None):
+        """ A data key for a new message
+
+        :param int plaintext_length: size of the message, counted against
+            the byte limit of the data key
+        :param dict encryption_context: context the data key is bound to
+        :returns: an acquired :class:`DataKeyMaterial`
+        """
+        if plaintext_length > self.max_bytes:
+            raise exceptions.InvalidRequest(
+                "Message of {size} bytes exceeds the data key byte limit".format(
+                    size=plaintext_length))
+        cache_key = ('encrypt', _context_key(encryption_context))
+        with self._lock:
+            material = self._lookup(cache_key)
+            if material is not None:
+                if self._usable(material, plaintext_length):
+                    material.messages += 1
+                    material.bytes += plaintext_length
+                    self.hits += 1
+                    return material.acquire()
+                self._evict(cache_key)
+
+        # call KMS outside of the lock
+        data_key = self.proxy.create_datakey(self.key_id,
+            datakey_length=self.datakey_length,
+            encryption_context=encryption_context)
+        material = DataKeyMaterial(self.key_id, data_key.plaintext,
+            data_key.cipher_text, encryption_context)
+        material.messages = 1
+        material.bytes = plaintext_length
+        material.acquire()
+        with self._lock:
+            self.kms_calls += 1
+            self._store(cache_key, material)
+            # a decryption of the same cipher text needs no KMS call; an
+            # own copy, because the entries are evicted independently
+            self._store(('decrypt', data_key.cipher_text, cache_key[1]),
+                DataKeyMaterial(self.key_id, material.plaintext,
+                    data_key.cipher_text, encryption_context))
+        return material
+
+    def record_bytes(self, material, count, encryption_context=None):
+        """ Count plain bytes encrypted with a data key beyond the length
+        announced to :meth:`encryption_materials`, e.g. of a stream. A data
+        key over the byte limit is retired and not handed out again.
+
+        :param material: the :class:`DataKeyMaterial` used
+        :param int count: the additional plain bytes
+        :param dict encryption_context: the context the key was requested for
+        """
+        cache_key = ('encrypt', _context_key(encryption_context))
+        with self._lock:
+            material.bytes += count
+            if material.bytes > self.max_bytes and \
+                    self._entries.get(cache_key) is material:
+                self._evict(cache_key)
+
+    def decryption_materials(self, cipher_text, encryption_context=None):
+        """ The plain data key of an encrypted data key
+
+        :param str cipher_text: hex encoded encrypted data key
+        :param dict encryption_context: the context used for encryption
+        :returns: an acquired :class:`DataKeyMaterial`
+        """
+        cache_key = ('decrypt', cipher_text, _context_key(encryption_context))
+        with self._lock:
+            material = self._lookup(cache_key)
+            if material is not None:
+                if material.age < self.max_age:
+                    self.hits += 1
+                    return material.acquire()
+                self._evict(cache_key)
+
+        data_key = self.proxy.decrypt_datakey(self.key_id, cipher_text,
+            datakey_cipher_length=self.datakey_length // 8,
+            encryption_context=encryption_context)
+        material = DataKeyMaterial(self.key_id, data_key.plaintext,
+            cipher_text, encryption_context)
+        material.acquire()
+        with self._lock:
+            self.kms_calls += 1
+            self._store(cache_key, material)
+        return material
+
+    def clear(self):
+        """ Drop and zeroize all cached data keys """
+        with self._lock:
+            while self._entries:
+                self._entries.popitem(last=False)[1].retire()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return "CachingMaterialsManager(key_id={key_id}, cached={cached}, kms_calls={calls}, hits={hits})".format(
+            key_id=self.key_id, cached=len(self._entries),
+            calls=self.kms_calls, hits=self.hits)
@@ -0,0 +1,51 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from openstack import resource
+from opentelekom import otc_resource
+
+
+class RandomData(otc_resource.OtcResource):
+    """ Random bytes generated by KMS """
+    base_path = None
+
+    # capabilities
+    allow_create = True
+
+    #: maximum number of bytes of a single request
+    max_length = 1024
+
+    # Properties
+    #: random_data_length: number of random bits, 8..8192
+    random_data_length = resource.Body("random_data_length")
+    #: sequence: an external, 36-byte serial number as additional reference
+    sequence = resource.Body("sequence")
+    #---- returned only by KMS
+    #: random_data: hex encoded random bytes
+    random_data = resource.Body("random_data")
+
+    def create(self, session, prepend_key=False, base_path=None):
+        """ Generate the random bytes """
+        session = self._get_session(session)
+        microversion = self._get_microversion_for(session, 'create')
+        resp = session.post(url=base_path or '/kms/gen-random',
+            json=otc_resource.filter_none({
+                'random_data_length': str(self.random_data_length),
+                'sequence': self.sequence,
+            }), microversion=microversion)
+        self._translate_response(resp)
+        return self
+
+    @property
+    def data(self):
+        """ The random bytes """
+        return bytes.fromhex(self.random_data) if self.random_data else None
@@ -0,0 +1,179 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Pooled KMS randomness, created by
+:meth:`~opentelekom.kms.v1._proxy.Proxy.random_pool`::
+
+    pool = conn.kmsv1.random_pool()
+    token = pool.take(32).hex()
+
+A background thread prefetches blocks of random bytes from KMS whenever
+the pool falls below its low watermark. Every byte is handed out once.
+"""
+import collections
+import threading
+import time
+
+from openstack import _log
+from openstack import exceptions
+
+
+class RandomPool(object):
+    """ Thread-safe pool of KMS random bytes
+
+    :param proxy: the KMS proxy
+    :param int block_size: bytes fetched per refill
+    :param int low_watermark: a refill starts when fewer bytes are left
+    :param int max_blocks: maximum number of prefetched blocks
+    :param float timeout: seconds :meth:`take` waits for random bytes
+    """
+
+    def __init__(self, proxy, block_size=64 * 1024, low_watermark=16 * 1024,
+                 max_blocks=4, timeout=30.0):
+        if block_size < 1 or low_watermark < 0 or max_blocks < 1:
+            raise exceptions.InvalidRequest("Invalid random pool sizes")
+        self.proxy = proxy
+        self.block_size = block_size
+        self.low_watermark = low_watermark
+        self.max_blocks = max_blocks
+        self.timeout = timeout
+        self._blocks = collections.deque()
+        # read position in the first block
+        self._offset = 0
+        self._available = 0
+        self._error = None
+        self._closed = False
+        self._refill_wanted = True
+        self._condition = threading.Condition()
+        #: number of refills from KMS
+        self.refills = 0
+        self.log = _log.setup_logging(__name__)
+        # prefetches the first block right away
+        self._thread = threading.Thread(target=self._refill_loop,
+            name="otc-kms-random-pool", daemon=True)
+        self._thread.start()
+
+    @property
+    def available(self):
+        """ Number of prefetched bytes not handed out yet """
+        return self._available
+
+    def _needs_refill(self):
+        return self._refill_wanted or (self._available < self.low_watermark and
+            len(self._blocks) < self.max_blocks)
+
+    def _refill_loop(self):
+        while True:
+            with self._condition:
+                while not self._closed and not self._needs_refill():
+                    self._condition.wait()
+                if self._closed:
+                    return
+                self._refill_wanted = False
+            try:
+                block = self.proxy.gen_random(self.block_size)
+            except Exception as ex:
+                # also e.g. connection errors, the thread must not die
+                self.log.debug("Random pool refill failed: %s", ex)
+                with self._condition:
+                    self._error = ex
+                    self._condition.notify_all()
+                    # after a failure, refill again only on a demand made
+                    # after it, so a waiting take reports the error first
+                    self._refill_wanted = False
+                    while not self._closed and not self._refill_wanted:
+                        self._condition.wait()
+                continue
+            with self._condition:
+                self._blocks.append(memoryview(block))
+                self._available += len(block)
+                self._error = None
+                self.refills += 1
+                self._condition.notify_all()
+
+    def _take_locked(self, size):
+        block = self._blocks[0]
+        if self._offset + size <= len(block):
+            view = block[self._offset:self._offset + size]
+            self._offset += size
+        else:
+            # spans several blocks, so the bytes have to be joined
+            parts = []
+            missing = size
+            while missing > 0:
+                block = self._blocks[0]
+                part = block[self._offset:self._offset + missing]
+                parts.append(part)
+                self._offset += len(part)
+                missing -= len(part)
+                if self._offset >= len(block):
+                    self._blocks.popleft()
+                    self._offset = 0
+            view = memoryview(b"".join(parts))
+        if self._blocks and self._offset >= len(self._blocks[0]):
+            self._blocks.popleft()
+            self._offset = 0
+        self._available -= size
+        return view
+
+    def take(self, size):
+        """ Hand out random bytes
+
+        :param int size: number of bytes
+        :returns: a read-only :class:`memoryview`; it is a slice of a
+            prefetched block unless the bytes span two blocks
+        :raises: :class:`~openstack.exceptions.SDKException` if KMS does
+            not deliver in time, or the last refill failed
+        """
+        if size < 0:
+            raise exceptions.InvalidRequest("Negative random size")
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            if self._closed:
+                raise exceptions.SDKException("Random pool is closed")
+            if size == 0:
+                return memoryview(b"")
+            while self._available < size:
+                if self._error is not None:
+                    error, self._error = self._error, None
+                    raise exceptions.SDKException(
+                        "Random pool refill failed: {error}".format(error=error))
+                self._refill_wanted = True
+                self._condition.notify_all()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise exceptions.SDKException(
+                        "Timeout waiting for {size} random bytes".format(size=size))
+                self._condition.wait(remaining)
+            view = self._take_locked(size)
+            if self._needs_refill():
+                self._condition.notify_all()
+            return view
+
+    def close(self):
+        """ Stop the refill thread and drop the prefetched bytes """
+        with self._condition:
+            self._closed = True
+            self._blocks.clear()
+            self._available = 0
+            self._condition.notify_all()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return "RandomPool(available={available}, refills={refills})".format(
+            available=self._available, refills=self.refills)
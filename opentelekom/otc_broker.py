@@ -0,0 +1,298 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Local connection broker for short-lived processes like Ansible modules.
+
+The broker daemon keeps authenticated connections, keyed by their cloud
+configuration, and hands out the (automatically renewed) keystone auth
+state over a Unix socket. A client process restores the auth state into
+its new connection and saves the token issuing round trips::
+
+    export OTC_BROKER_SOCKET=/run/user/1000/otc-broker.sock
+    python -m opentelekom.otc_broker &
+
+The broker is only used if its socket is given explicitly, by
+``OTC_BROKER_SOCKET`` or the ``socket_path`` parameter.
+:func:`~opentelekom.connection.connect_from_ansible` then uses it and
+falls back to a direct login if the broker is not reachable.
+
+The connection config sent to the broker contains the credentials, and
+the auth state contains a valid token. So the socket is only accessible
+by the owning user, and a client only talks to a socket (and directory)
+owned by itself and not writable by others, served by a process of the
+same user.
+"""
+import argparse
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import threading
+import time
+
+from openstack import _log
+
+
+#: maximum size of a single request/response line
+_MAX_MESSAGE = 4 * 1024 * 1024
+
+
+def default_socket_path():
+    """ Socket path from ``OTC_BROKER_SOCKET``, None if not set """
+    return os.environ.get('OTC_BROKER_SOCKET') or None
+
+
+def _check_private(path):
+    """ Raise PermissionError unless the path is owned by the current
+    user and not writable by group or others """
+    info = os.stat(path)
+    if info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError("%s is not private to uid %d" % (path, os.getuid()))
+
+
+def _peer_uid(sock):
+    """ The uid of the process at the other end of a Unix socket """
+    if not hasattr(socket, 'SO_PEERCRED'):
+        raise PermissionError("Peer credentials not available on this platform")
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+        struct.calcsize('3i'))
+    return struct.unpack('3i', creds)[1]
+
+
+def _check_peer(sock):
+    uid = _peer_uid(sock)
+    if uid != os.getuid():
+        raise PermissionError("Broker peer runs as uid %d" % uid)
+
+
+def config_key(config):
+    """ Stable key of a connection parameter dict. Credentials are part of
+    the key, so only callers knowing them get the matching auth state """
+    text = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _default_connect(config):
+    from opentelekom import connection as otc_connection
+    return otc_connection.Connection(**config)
+
+
+class _BrokerHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        try:
+            _check_peer(self.connection)
+        except PermissionError as ex:
+            self.server.broker.log.warning("Broker request refused: %s", ex)
+            return
+        line = self.rfile.readline(_MAX_MESSAGE)
+        try:
+            message = json.loads(line.decode('utf-8'))
+            result = self.server.broker.dispatch(message)
+            reply = {'result': result}
+        except Exception as ex:
+            reply = {'error': "%s: %s" % (ex.__class__.__name__, ex)}
+        self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ConnectionBroker(object):
+    """ Holds warm, authenticated connections and serves their auth state
+
+    :param str socket_path: path of the Unix socket to listen on, default
+        ``OTC_BROKER_SOCKET``.
+    :param int idle_timeout: connections unused for this number of
+        seconds are dropped.
+    :param connect: factory creating a connection from a parameter dict.
+    """
+
+    def __init__(self, socket_path=None, idle_timeout=3600, connect=None):
+        self.socket_path = socket_path or default_socket_path()
+        if not self.socket_path:
+            raise ValueError("No broker socket path given, set OTC_BROKER_SOCKET")
+        self.idle_timeout = idle_timeout
+        self._connect = connect or _default_connect
+        self._connections = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self.log = _log.setup_logging(__name__)
+
+    def _connection_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _evict(self, key, idle_timeout=None):
+        """ Drop a connection and its lock, unless the connection is in use
+        or (with idle_timeout) was used more recently """
+        with self._lock:
+            lock = self._locks.get(key)
+        if lock is not None and not lock.acquire(blocking=False):
+            return False
+        try:
+            with self._lock:
+                entry = self._connections.get(key)
+                if entry is not None and idle_timeout is not None \
+                        and time.monotonic() - entry[1] <= idle_timeout:
+                    return False
+                self._connections.pop(key, None)
+                self._locks.pop(key, None)
+                return True
+        finally:
+            if lock is not None:
+                lock.release()
+
+    def _expire_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, (conn, last_used) in self._connections.items()
+                if now - last_used > self.idle_timeout]
+        for key in idle:
+            self._evict(key, self.idle_timeout)
+
+    def auth_state(self, config):
+        """ Return the serialized auth state for a connection config,
+        authenticating (once) if necessary """
+        self._expire_idle()
+        key = config_key(config)
+        # serialize logins per config, but not across different configs
+        with self._connection_lock(key):
+            with self._lock:
+                entry = self._connections.get(key)
+            conn = entry[0] if entry else self._connect(config)
+            # re-authenticates only if the token is (nearly) expired
+            conn.authorize()
+            with self._lock:
+                self._connections[key] = (conn, time.monotonic())
+            return conn.session.auth.get_auth_state()
+
+    def dispatch(self, message):
+        operation = message.get('op')
+        if operation == 'ping':
+            return 'pong'
+        if operation == 'auth_state':
+            return self.auth_state(message['config'])
+        if operation == 'forget':
+            return self._evict(config_key(message['config']))
+        if operation == 'shutdown':
+            threading.Thread(target=self.shutdown).start()
+            return True
+        raise ValueError("Unknown broker operation %r" % operation)
+
+    def start(self):
+        """ Bind the socket; the broker serves after :meth:`serve_forever` """
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        old_umask = os.umask(0o177)
+        try:
+            self._server = _UnixServer(self.socket_path, _BrokerHandler)
+        finally:
+            os.umask(old_umask)
+        self._server.broker = self
+        return self
+
+    def serve_forever(self):
+        if self._server is None:
+            self.start()
+        self.log.debug("Connection broker listening on %s", self.socket_path)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+
+def _call(message, socket_path, timeout=2.0):
+    # the message may contain credentials: only hand it to an own broker
+    _check_private(os.path.dirname(os.path.abspath(socket_path)))
+    _check_private(socket_path)
+    if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+        raise PermissionError("%s is no socket" % socket_path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path)
+        _check_peer(sock)
+        sock.sendall(json.dumps(message, default=str).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as reply_file:
+            reply = json.loads(reply_file.readline(_MAX_MESSAGE).decode('utf-8'))
+    finally:
+        sock.close()
+    if 'error' in reply:
+        raise RuntimeError(reply['error'])
+    return reply['result']
+
+
+def get_auth_state(config, socket_path=None, timeout=30.0):
+    """ Fetch the auth state of a connection config from the broker
+
+    :returns: the serialized auth state, or None if no broker socket is
+        given, the broker is not running or its socket is not private.
+    :raises: RuntimeError if the broker failed to authenticate
+    """
+    path = socket_path or default_socket_path()
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return _call({'op': 'auth_state', 'config': config}, path, timeout)
+    except (OSError, ValueError) as ex:
+        # PermissionError of a foreign socket included
+        _log.setup_logging(__name__).debug(
+            "Connection broker at %s not usable: %s", path, ex)
+        return None
+
+
+def connect(config, socket_path=None, connect=None):
+    """ Create a connection, reusing the authentication held by a running
+    broker. Without broker socket, this is a plain connection.
+
+    :param dict config: connection parameters
+    :param str socket_path: broker socket, default ``OTC_BROKER_SOCKET``.
+    :param connect: factory creating a connection from a parameter dict.
+    """
+    conn = (connect or _default_connect)(config)
+    try:
+        state = get_auth_state(config, socket_path)
+    except RuntimeError as ex:
+        # let the direct login report the error in detail
+        _log.setup_logging(__name__).debug("Broker login failed: %s", ex)
+        state = None
+    if state:
+        conn.session.auth.set_auth_state(state)
+    return conn
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Open Telekom Cloud connection broker")
+    socket_path = default_socket_path()
+    parser.add_argument('--socket', default=socket_path, required=socket_path is None,
+        help="Unix socket path (default: OTC_BROKER_SOCKET)")
+    parser.add_argument('--idle-timeout', type=int, default=3600,
+        help="Drop connections unused for this number of seconds")
+    args = parser.parse_args(argv)
+    ConnectionBroker(args.socket, idle_timeout=args.idle_timeout).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Response caches for (nearly) static Open Telekom Cloud catalog data
+like flavors or datastore versions.
+
+The caches store raw resource attribute dicts (not resource objects), so
+every cache hit produces fresh resource instances and the on-disk store
+can simply use json.
+"""
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class CacheStats(object):
+    """ Hit/miss counters of a cache """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def to_dict(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'expirations': self.expirations,
+            'evictions': self.evictions,
+        }
+
+    def __repr__(self):
+        return "CacheStats(%s)" % self.to_dict()
+
+
+def _cache_key(namespace, key):
+    return namespace + ":" + json.dumps(key, sort_keys=True, default=str)
+
+
+class MemoryCache(object):
+    """ A thread-safe in-memory LRU cache with a time-to-live per entry.
+
+    :param int maxsize: maximum number of entries before the least
+        recently used entry is evicted.
+    :param int ttl: default time-to-live in seconds.
+    :param backing: optional second level cache, e.g. a
+        :class:`DiskCache` shared by several processes. Misses are looked
+        up there and new values are written through.
+    """
+
+    def __init__(self, maxsize=256, ttl=300, backing=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backing = backing
+        self.stats = CacheStats()
+        self._entries = collections.OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, namespace, key):
+        """ Lookup a value
+
+        :returns: a tuple (found, value)
+        """
+        ckey = _cache_key(namespace, key)
+        with self._lock:
+            entry = self._entries.get(ckey)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.time():
+                    self._entries.move_to_end(ckey)
+                    self.stats.hits += 1
+                    return True, value
+                del self._entries[ckey]
+                self.stats.expirations += 1
+
+        if self.backing is not None:
+            found, value, expires = self._backing_entry(namespace, key)
+            if found:
+                with self._lock:
+                    self.stats.hits += 1
+                    # keep the remaining lifetime of the backing entry
+                    self._store(ckey, value, expires)
+                return True, value
+
+        with self._lock:
+            self.stats.misses += 1
+        return False, None
+
+    def _backing_entry(self, namespace, key):
+        get_entry = getattr(self.backing, 'get_entry', None)
+        if get_entry is not None:
+            return get_entry(namespace, key)
+        # backing stores without expiry information
+        found, value = self.backing.get(namespace, key)
+        return found, value, time.time() + self.ttl
+
+    def set(self, namespace, key, value, ttl=None):
+        """ Store a value for ttl seconds (default: cache ttl) """
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._store(_cache_key(namespace, key), value, time.time() + ttl)
+        if self.backing is not None:
+            self.backing.set(namespace, key, value, ttl)
+
+    def _store(self, ckey, value, expires):
+        self._entries[ckey] = (expires, value)
+        self._entries.move_to_end(ckey)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, namespace=None, key=None):
+        """ Drop a single entry, all entries of a namespace or
+        (without parameters) everything """
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            elif key is not None:
+                self._entries.pop(_cache_key(namespace, key), None)
+            else:
+                prefix = namespace + ":"
+                for ckey in [k for k in self._entries if k.startswith(prefix)]:
+                    del self._entries[ckey]
+        if self.backing is not None:
+            self.backing.invalidate(namespace, key)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskCache(object):
+    """ A simple json file store with a time-to-live per entry, which could
+    be shared by several processes on the same host.
+
+    :param str path: directory for the cache files, created if missing.
+    :param int ttl: default time-to-live in seconds.
+    :param encryption: optional object with ``encrypt(bytes)`` and
+        ``decrypt(bytes)`` methods, e.g. a
+        :class:`cryptography.fernet.Fernet`, for secret values. Entries
+        which cannot be decrypted count as misses.
+    """
+
+    def __init__(self, path, ttl=3600, encryption=None):
+        self.path = path
+        self.ttl = ttl
+        self.encryption = encryption
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        os.makedirs(path, mode=0o700, exist_ok=True)
+
+    def _filename(self, namespace, key):
+        digest = hashlib.sha256(
+            _cache_key(namespace, key).encode('utf-8')).hexdigest()
+        return os.path.join(self.path, "%s-%s.json" % (namespace, digest))
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+
+    def get_entry(self, namespace, key):
+        """ Lookup a value with its expiry time
+
+        :returns: a tuple (found, value, expires)
+        """
+        filename = self._filename(namespace, key)
+        try:
+            with open(filename, 'rb') as cachefile:
+                data = cachefile.read()
+            if self.encryption is not None:
+                data = self.encryption.decrypt(data)
+            entry = json.loads(data.decode('utf-8'))
+        except Exception:
+            # missing, corrupt or (with encryption) foreign entries
+            self._count('misses')
+            return False, None, None
+        if entry['expires'] <= time.time():
+            self._count('expirations')
+            self._remove(filename)
+            return False, None, None
+        self._count('hits')
+        return True, entry['value'], entry['expires']
+
+    def get(self, namespace, key):
+        found, value, expires = self.get_entry(namespace, key)
+        return found, value
+
+    def set(self, namespace, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        filename = self._filename(namespace, key)
+        # write to a temporary file first to make replacement atomic for
+        # concurrent readers
+        tmpname = "%s.%d.%d.tmp" % (filename, os.getpid(),
+            threading.get_ident())
+        data = json.dumps({'expires': time.time() + ttl, 'value': value})
+        data = data.encode('utf-8')
+        if self.encryption is not None:
+            data = self.encryption.encrypt(data)
+        with os.fdopen(os.open(tmpname, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                0o600), 'wb') as cachefile:
+            cachefile.write(data)
+        os.replace(tmpname, filename)
+
+    def invalidate(self, namespace=None, key=None):
+        if namespace is not None and key is not None:
+            self._remove(self._filename(namespace, key))
+            return
+        prefix = "" if namespace is None else namespace + "-"
+        for filename in os.listdir(self.path):
+            if filename.startswith(prefix) and filename.endswith(".json"):
+                self._remove(os.path.join(self.path, filename))
+
+    @staticmethod
+    def _remove(filename):
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
@@ -0,0 +1,179 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Precomputed endpoint and api version table for Open Telekom Cloud services
+with missing catalog entries or broken version discovery.
+
+The table is region-aware: endpoint templates contain a ``{region}`` and
+a ``{domain}`` placeholder, which are expanded once per region. The
+``%(project_id)s`` placeholder is left to keystoneauth. If the region is
+missing or its domain unknown, a service uses its ``fallback_endpoint``
+(the former fixed eu-de endpoint) or, without one, the catalog endpoint;
+the api version is set in any case.
+
+The default table can be extended or overridden by a json file given in
+the environment variable ``OTC_ENDPOINT_TABLE``, with the same structure
+as ``DEFAULT_ENDPOINT_TABLE``.
+"""
+import copy
+import json
+import os
+import threading
+
+
+DEFAULT_ENDPOINT_TABLE = {
+    'regions': {
+        'eu-de': {'domain': 'otc.t-systems.com'},
+        'eu-nl': {'domain': 'otc.t-systems.com'},
+        'eu-ch2': {'domain': 'sc.otc.t-systems.com'},
+    },
+    'services': {
+        'ccev2.0': {
+            'endpoint': 'https://cce.{region}.{domain}/api/v3/projects/%(project_id)s',
+            'fallback_endpoint': 'https://cce.eu-de.otc.t-systems.com/api/v3/projects/%(project_id)s',
+            'api_version': '3',
+        },
+        # vpc peerings require endpoint vpc2.0 WITHOUT project_id,
+        # so we use an artificial peervpc service
+        'peervpc': {
+            'endpoint': 'https://vpc.{region}.{domain}/v2.0',
+            'fallback_endpoint': 'https://vpc.eu-de.otc.t-systems.com/v2.0',
+            'api_version': '2',
+        },
+        'vpc': {
+            'endpoint': 'https://vpc.{region}.{domain}/v1/%(project_id)s',
+            'api_version': '1',
+        },
+        'vpc2.0': {
+            'endpoint': 'https://vpc.{region}.{domain}/v2.0/%(project_id)s',
+            'api_version': '2',
+        },
+        'rdsv3': {
+            'endpoint': 'https://rds.{region}.{domain}/v3/%(project_id)s',
+            'api_version': '3',
+        },
+    },
+}
+
+
+class EndpointTable(object):
+    """ Region-aware table of endpoint templates and api versions
+
+    :param dict table: table data, structured like
+        :data:`DEFAULT_ENDPOINT_TABLE`.
+    """
+
+    def __init__(self, table=None):
+        self._table = copy.deepcopy(
+            DEFAULT_ENDPOINT_TABLE if table is None else table)
+        self._table.setdefault('regions', {})
+        self._table.setdefault('services', {})
+        self._expanded = {}
+        self._lock = threading.Lock()
+
+    def override(self, service_type, endpoint=None, api_version=None,
+                 region=None):
+        """ Set endpoint template and/or api version of a service,
+        for all regions or only a given region """
+        if region is None:
+            entry = self._table['services'].setdefault(service_type, {})
+        else:
+            entry = self._table['regions'].setdefault(region, {}).setdefault(
+                'services', {}).setdefault(service_type, {})
+        if endpoint is not None:
+            entry['endpoint'] = endpoint
+        if api_version is not None:
+            entry['api_version'] = str(api_version)
+        with self._lock:
+            self._expanded.clear()
+
+    def update(self, table):
+        """ Merge another table (dict) into this one """
+        for region, region_data in table.get('regions', {}).items():
+            target = self._table['regions'].setdefault(region, {})
+            for key, value in region_data.items():
+                if key == 'services':
+                    for service_type, entry in value.items():
+                        target.setdefault('services', {}).setdefault(
+                            service_type, {}).update(entry)
+                else:
+                    target[key] = value
+        for service_type, entry in table.get('services', {}).items():
+            self._table['services'].setdefault(service_type, {}).update(entry)
+        with self._lock:
+            self._expanded.clear()
+
+    def config_for(self, region_name):
+        """ Return the cloud config settings for a region, e.g.
+        ``{'ccev2.0_endpoint_override': ..., 'ccev2.0_api_version': '3'}``.
+        The result is computed once per region. """
+        with self._lock:
+            settings = self._expanded.get(region_name)
+            if settings is None:
+                settings = self._expand(region_name)
+                self._expanded[region_name] = settings
+        return settings
+
+    def _expand(self, region_name):
+        region = self._table['regions'].get(region_name, {})
+        domain = region.get('domain')
+        services = copy.deepcopy(self._table['services'])
+        for service_type, entry in region.get('services', {}).items():
+            services.setdefault(service_type, {}).update(entry)
+
+        settings = {}
+        for service_type, entry in services.items():
+            if entry.get('endpoint') and domain:
+                settings[service_type + '_endpoint_override'] = \
+                    entry['endpoint'].format(region=region_name, domain=domain)
+            elif entry.get('fallback_endpoint'):
+                settings[service_type + '_endpoint_override'] = \
+                    entry['fallback_endpoint']
+            if entry.get('api_version'):
+                settings[service_type + '_api_version'] = entry['api_version']
+        return settings
+
+    def to_dict(self):
+        return copy.deepcopy(self._table)
+
+    def to_json(self):
+        return json.dumps(self._table, indent=2, sort_keys=True)
+
+    @classmethod
+    def from_json(cls, text):
+        return cls(json.loads(text))
+
+    def save(self, path):
+        with open(path, 'w') as tablefile:
+            tablefile.write(self.to_json())
+
+    @classmethod
+    def load(cls, path):
+        """ Load a table file and merge it into the default table """
+        table = cls()
+        with open(path, 'r') as tablefile:
+            table.update(json.load(tablefile))
+        return table
+
+
+_default_table = None
+_default_lock = threading.Lock()
+
+
+def default_table():
+    """ The process-wide endpoint table, loaded once """
+    global _default_table
+    with _default_lock:
+        if _default_table is None:
+            path = os.environ.get('OTC_ENDPOINT_TABLE')
+            _default_table = EndpointTable.load(path) if path else EndpointTable()
+        return _default_table
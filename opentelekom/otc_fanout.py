@@ -0,0 +1,174 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Run the same proxy query on many clouds/projects/regions in parallel,
+e.g. for a global inventory::
+
+    for result in otc_fanout.fanout(
+            [{'cloud': 'prod'}, {'cloud': 'test', 'region_name': 'eu-nl'}],
+            'vpc.vpcs',
+            setup=lambda conn: conn.add_service(VpcService("vpc"))):
+        if result.error:
+            print(result.origin, "failed:", result.error)
+        else:
+            print(result.origin, result.resource.name)
+"""
+import collections
+import concurrent.futures
+
+from openstack import _log
+from openstack.config import cloud_region
+
+from opentelekom import connection as otc_connection
+
+
+class FanoutOrigin(collections.namedtuple('FanoutOrigin',
+        ['cloud', 'project', 'region'])):
+    """ Identifies the connection a fan-out result comes from """
+
+    @classmethod
+    def from_connection(cls, conn):
+        auth = conn.config.config.get('auth', {})
+        project = auth.get('project_name') or auth.get('project_id')
+        return cls(conn.config.name, project, conn.config.region_name)
+
+    @classmethod
+    def from_config(cls, config):
+        if isinstance(config, otc_connection.Connection):
+            return cls.from_connection(config)
+        if isinstance(config, cloud_region.CloudRegion):
+            auth = config.config.get('auth', {})
+            return cls(config.name,
+                auth.get('project_name') or auth.get('project_id'),
+                config.region_name)
+        auth = config.get('auth') or {}
+        return cls(config.get('cloud'),
+            config.get('project_name') or auth.get('project_name') or
+                auth.get('project_id'),
+            config.get('region_name'))
+
+
+class FanoutResult(object):
+    """ A single resource tagged with its origin, or the error the
+    query raised for the origin """
+
+    def __init__(self, origin, resource=None, error=None):
+        self.origin = origin
+        self.resource = resource
+        self.error = error
+
+    def __repr__(self):
+        if self.error is not None:
+            return "FanoutResult(%s, error=%r)" % (self.origin, self.error)
+        return "FanoutResult(%s, %r)" % (self.origin, self.resource)
+
+
+def _connect(config):
+    if isinstance(config, otc_connection.Connection):
+        return config
+    if isinstance(config, cloud_region.CloudRegion):
+        return otc_connection.Connection(config=config)
+    return otc_connection.Connection(**config)
+
+
+def _close(conn):
+    # Connection.close of openstacksdk 0.31 fails without a pool executor,
+    # so release the pooled http connections of the session directly
+    conn.session.session.close()
+
+
+def _resolve_query(query, **params):
+    """ Accept a callable(connection) or a dotted 'proxy.method' string """
+    if callable(query):
+        return query
+
+    def _call(conn):
+        target = conn
+        for name in query.split('.'):
+            target = getattr(target, name)
+        return target(**params)
+    return _call
+
+
+def fanout(configs, query, max_workers=8, setup=None, **params):
+    """Run a query on all given connection configurations in parallel
+    and yield the merged results as soon as an origin has completed.
+
+    :param configs: iterable of connection parameter dicts (as accepted by
+        :class:`~opentelekom.connection.Connection`), cloud regions or
+        already established connections.
+    :param query: either a callable getting the connection as only parameter
+        and returning an iterable of resources, or a dotted string naming
+        a proxy method, e.g. ``'rdsv3.dbs'``.
+    :param int max_workers: maximum number of origins queried concurrently.
+    :param setup: optional callable to prepare each new connection, e.g.
+        to add extra services. Connections passed in are used as they are.
+    :param dict params: query parameters passed to a named proxy method.
+    :returns: a generator of :class:`FanoutResult`. A failing origin does
+        not stop the fan-out, but yields one result with ``error`` set.
+    """
+    log = _log.setup_logging(__name__)
+    call = _resolve_query(query, **params)
+
+    def _run(config):
+        # connections of the caller are neither prepared nor closed here
+        owned = not isinstance(config, otc_connection.Connection)
+        conn = _connect(config)
+        try:
+            if owned and setup is not None:
+                setup(conn)
+            # consume the generator inside the worker thread to run
+            # the requests (incl. paging) in parallel
+            return FanoutOrigin.from_connection(conn), list(call(conn))
+        finally:
+            if owned:
+                _close(conn)
+
+    configs = list(configs)
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(configs) or 1)))
+    futures = {}
+    try:
+        futures = {executor.submit(_run, config): config for config in configs}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                origin, resources = future.result()
+            except Exception as ex:
+                origin = FanoutOrigin.from_config(futures[future])
+                log.debug("Fan-out query failed for %s: %s", origin, ex)
+                yield FanoutResult(origin, error=ex)
+                continue
+            for res in resources:
+                yield FanoutResult(origin, resource=res)
+    finally:
+        # on an early close, do not start the origins not queried yet
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def fanout_collect(configs, query, max_workers=8, setup=None, **params):
+    """Run :func:`fanout` and collect the results
+
+    :returns: tuple of a list with all successful
+        :class:`FanoutResult` and a dict mapping failed
+        :class:`FanoutOrigin` to their exception.
+    """
+    results = []
+    errors = {}
+    for result in fanout(configs, query, max_workers=max_workers,
+            setup=setup, **params):
+        if result.error is not None:
+            errors[result.origin] = result.error
+        else:
+            results.append(result)
+    return results, errors
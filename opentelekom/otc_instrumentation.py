@@ -0,0 +1,293 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Instrumentation of the HTTP requests issued by Open Telekom Cloud proxies.
+
+Every request of an :class:`~opentelekom.otc_proxy.OtcProxy` produces one
+:class:`RequestEvent`, which is passed to all hooks registered on the
+proxy or its connection::
+
+    stats = otc_instrumentation.RequestStatsCollector()
+    conn.add_request_hook(stats)
+    conn.add_request_hook(otc_instrumentation.PrometheusHook())
+    ...
+    for key, entry in stats.slowest(10):
+        print(key, entry)
+
+Prometheus and OpenTelemetry adapters are only usable if the optional
+``prometheus_client`` resp. ``opentelemetry-api`` packages are installed.
+"""
+import re
+import threading
+import time
+import urllib.parse
+
+from openstack import _log
+
+
+_ID_SEGMENT = re.compile(
+    r'^([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+    r'|[0-9a-fA-F]{32}|[0-9]+)$')
+
+
+def url_template(url):
+    """ Reduce an url to its path with all ids (uuids, 32-digit hex ids
+    like project ids, numbers) replaced by ``{id}`` """
+    path = urllib.parse.urlparse(url).path
+    return "/".join(
+        "{id}" if _ID_SEGMENT.match(segment) else segment
+        for segment in path.split("/"))
+
+
+def _request_id(headers):
+    for name in ('X-Openstack-Request-Id', 'X-Request-Id',
+                 'X-Compute-Request-Id'):
+        value = headers.get(name)
+        if value:
+            return value
+    return None
+
+
+def _body_size(body):
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+    try:
+        return len(body)
+    except TypeError:
+        # generators, file-like objects, ...
+        return None
+
+
+class RequestEvent(object):
+    """ Structured description of a single proxy HTTP call """
+
+    def __init__(self, service_type, method, url, status_code=None,
+                 latency=0.0, start_time=None, request_bytes=None,
+                 response_bytes=None, retries=0, redirects=0,
+                 request_id=None, error=None):
+        #: service type of the proxy, e.g. ``ccev2.0``
+        self.service_type = service_type
+        #: HTTP method
+        self.method = method
+        #: full request url
+        self.url = url
+        #: url path with ids replaced by ``{id}``
+        self.url_template = url_template(url)
+        #: final HTTP status, None if no response was received
+        self.status_code = status_code
+        #: wall clock seconds incl. retries and redirects
+        self.latency = latency
+        #: epoch seconds when the request was started
+        self.start_time = start_time
+        #: size of the request body in bytes
+        self.request_bytes = request_bytes
+        #: size of the response body in bytes
+        self.response_bytes = response_bytes
+        #: number of retried attempts which received a response
+        self.retries = retries
+        #: number of followed redirects
+        self.redirects = redirects
+        #: server side request id from the response headers
+        self.request_id = request_id
+        #: exception raised if the request failed without response
+        self.error = error
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    def __repr__(self):
+        return "RequestEvent(%s %s %s -> %s, %.3fs)" % (
+            self.service_type, self.method, self.url_template,
+            self.status_code, self.latency)
+
+
+class RequestStatsCollector(object):
+    """ Hook aggregating count, latency and bytes per
+    (service type, method, url template). Repeated calls on the same
+    template within a short time are a hint for N+1 request patterns """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def __call__(self, event):
+        key = (event.service_type, event.method, event.url_template)
+        with self._lock:
+            entry = self.stats.setdefault(key, {
+                'count': 0, 'errors': 0, 'retries': 0, 'latency': 0.0,
+                'max_latency': 0.0, 'request_bytes': 0, 'response_bytes': 0})
+            entry['count'] += 1
+            if event.error is not None or (event.status_code or 500) >= 400:
+                entry['errors'] += 1
+            entry['retries'] += event.retries
+            entry['latency'] += event.latency
+            entry['max_latency'] = max(entry['max_latency'], event.latency)
+            entry['request_bytes'] += event.request_bytes or 0
+            entry['response_bytes'] += event.response_bytes or 0
+
+    def _sorted(self, field, limit):
+        with self._lock:
+            items = [(key, dict(entry)) for key, entry in self.stats.items()]
+        items.sort(key=lambda item: item[1][field], reverse=True)
+        return items[:limit]
+
+    def slowest(self, limit=10):
+        """ Templates with the highest accumulated latency """
+        return self._sorted('latency', limit)
+
+    def most_called(self, limit=10):
+        """ Templates with the most calls """
+        return self._sorted('count', limit)
+
+    def largest(self, limit=10):
+        """ Templates with the most response bytes """
+        return self._sorted('response_bytes', limit)
+
+    def reset(self):
+        with self._lock:
+            self.stats = {}
+
+
+class PrometheusHook(object):
+    """ Hook exporting request metrics with ``prometheus_client`` """
+
+    _labels = ['service_type', 'method', 'url_template', 'status_code']
+
+    def __init__(self, registry=None, namespace='otc_sdk'):
+        try:
+            import prometheus_client
+        except ImportError:
+            raise ImportError(
+                "PrometheusHook requires the prometheus_client package")
+        kwargs = {'namespace': namespace}
+        if registry is not None:
+            kwargs['registry'] = registry
+        self.requests = prometheus_client.Counter(
+            'http_requests', 'Number of HTTP requests', self._labels, **kwargs)
+        self.retries = prometheus_client.Counter(
+            'http_retries', 'Number of retried HTTP requests', self._labels,
+            **kwargs)
+        self.latency = prometheus_client.Histogram(
+            'http_request_seconds', 'HTTP request latency', self._labels,
+            **kwargs)
+        self.request_bytes = prometheus_client.Counter(
+            'http_request_bytes', 'Bytes sent in HTTP request bodies',
+            self._labels, **kwargs)
+        self.response_bytes = prometheus_client.Counter(
+            'http_response_bytes', 'Bytes received in HTTP response bodies',
+            self._labels, **kwargs)
+
+    def __call__(self, event):
+        labels = dict(service_type=event.service_type, method=event.method,
+            url_template=event.url_template,
+            status_code=str(event.status_code))
+        self.requests.labels(**labels).inc()
+        self.latency.labels(**labels).observe(event.latency)
+        if event.retries:
+            self.retries.labels(**labels).inc(event.retries)
+        if event.request_bytes:
+            self.request_bytes.labels(**labels).inc(event.request_bytes)
+        if event.response_bytes:
+            self.response_bytes.labels(**labels).inc(event.response_bytes)
+
+
+class OpenTelemetrySpanHook(object):
+    """ Hook recording every request as OpenTelemetry client span """
+
+    def __init__(self, tracer=None):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError(
+                "OpenTelemetrySpanHook requires the opentelemetry-api package")
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer(__name__)
+
+    def __call__(self, event):
+        start_ns = int(event.start_time * 1e9)
+        span = self.tracer.start_span(
+            "%s %s" % (event.method, event.url_template),
+            kind=self._trace.SpanKind.CLIENT,
+            start_time=start_ns)
+        span.set_attribute('otc.service_type', event.service_type)
+        span.set_attribute('http.method', event.method)
+        span.set_attribute('http.url', event.url)
+        span.set_attribute('http.route', event.url_template)
+        span.set_attribute('otc.retries', event.retries)
+        if event.status_code is not None:
+            span.set_attribute('http.status_code', event.status_code)
+        if event.request_bytes is not None:
+            span.set_attribute('http.request_content_length', event.request_bytes)
+        if event.response_bytes is not None:
+            span.set_attribute('http.response_content_length', event.response_bytes)
+        if event.request_id:
+            span.set_attribute('otc.request_id', event.request_id)
+        if event.error is not None:
+            span.record_exception(event.error)
+        if event.error is not None or (event.status_code or 0) >= 500:
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        span.end(end_time=start_ns + int(event.latency * 1e9))
+
+
+class RequestInstrumentation(object):
+    """ Collects the raw attempts of one proxy request via a requests
+    response hook and builds the resulting :class:`RequestEvent` """
+
+    def __init__(self, service_type, method, url):
+        self.service_type = service_type
+        self.method = method
+        self.url = url
+        self.attempts = 0
+        self.start_time = time.time()
+        self._start = time.monotonic()
+
+    def count_attempt(self, response, *args, **kwargs):
+        """ requests response hook, called once per raw response """
+        self.attempts += 1
+        return response
+
+    def event(self, response=None, error=None, streamed=False):
+        latency = time.monotonic() - self._start
+        if response is None:
+            return RequestEvent(self.service_type, self.method, self.url,
+                latency=latency, start_time=self.start_time,
+                retries=max(0, self.attempts - 1), error=error)
+
+        redirects = len(response.history)
+        request = response.request
+        response_bytes = response.headers.get('Content-Length')
+        if response_bytes is not None:
+            response_bytes = int(response_bytes)
+        elif not streamed:
+            response_bytes = len(response.content or b'')
+        return RequestEvent(self.service_type, self.method,
+            request.url if request is not None else self.url,
+            status_code=response.status_code,
+            latency=latency, start_time=self.start_time,
+            request_bytes=_body_size(request.body) if request is not None else None,
+            response_bytes=response_bytes,
+            retries=max(0, self.attempts - 1 - redirects),
+            redirects=redirects,
+            request_id=_request_id(response.headers))
+
+
+def emit(hooks, event):
+    """ Pass the event to all hooks, a failing hook never breaks the
+    request """
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception as ex:
+            _log.setup_logging(__name__).warning(
+                "Request hook %r failed: %s", hook, ex)
@@ -10,6 +10,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 import copy
+import threading
 
 from openstack import _log
 from openstack import proxy
@@ -19,6 +20,9 @@ from openstack import utils
 
 from openstack.resource import _normalize_status
 
+from opentelekom import otc_cache
+from opentelekom import otc_instrumentation
+
 def _pretty_ids(resources):
     text = ""
     for resource in resources:
@@ -43,12 +47,203 @@ class OtcProxy(proxy.Proxy):
         '''Add some additional default http headers required by OpenTelekom services'''
         super().__init__(session, **kwargs)
 
+        # endpoint and version are known (usually from the endpoint table),
+        # so there is no need for (partially broken) version discovery
+        if kwargs.get('endpoint_override') and kwargs.get('version'):
+            self.skip_discovery = True
+
         self.session.additional_headers = {
             'Accept': 'application/json', 
             'Content-Type': 'application/json',
             'X-Language': "en-us"
         }
-    
+
+        self._cache = otc_cache.MemoryCache()
+        self._cache_ttls = {}
+
+        self._request_hooks = []
+
+        # project id of the current token, see get_project_id
+        self._project_id = None
+        self._project_id_auth_ref = None
+        self._project_id_lock = threading.Lock()
+        self._project_id_stats = otc_cache.CacheStats()
+
+    #==== request instrumentation ====
+    def add_request_hook(self, hook):
+        """Register a callable getting a
+        :class:`~opentelekom.otc_instrumentation.RequestEvent` for every
+        request of this proxy. Hooks registered on the connection are
+        called for all proxies.
+
+        :param hook: callable with the event as only parameter
+        """
+        self._request_hooks.append(hook)
+
+    def remove_request_hook(self, hook):
+        """Unregister a request hook of this proxy"""
+        self._request_hooks.remove(hook)
+
+    def _get_request_hooks(self):
+        hooks = list(self._request_hooks)
+        conn = self._get_connection()
+        if conn is not None:
+            hooks.extend(getattr(conn, '_otc_request_hooks', ()))
+        return hooks
+
+    def request(self, url, method, error_message=None,
+                raise_exc=False, connect_retries=1, *args, **kwargs):
+        """Issue the request and emit a
+        :class:`~opentelekom.otc_instrumentation.RequestEvent` to all
+        registered hooks"""
+        hooks = self._get_request_hooks()
+        if not hooks:
+            return super().request(url, method, error_message=error_message,
+                raise_exc=raise_exc, connect_retries=connect_retries,
+                *args, **kwargs)
+
+        instrumentation = otc_instrumentation.RequestInstrumentation(
+            self.service_type, method, url)
+        # count the raw attempts (retries, redirects) keystoneauth issues
+        request_hooks = dict(kwargs.pop('hooks', None) or {})
+        response_hooks = request_hooks.get('response', [])
+        if callable(response_hooks):
+            response_hooks = [response_hooks]
+        request_hooks['response'] = \
+            list(response_hooks) + [instrumentation.count_attempt]
+        try:
+            response = super().request(url, method,
+                error_message=error_message, raise_exc=raise_exc,
+                connect_retries=connect_retries, hooks=request_hooks,
+                *args, **kwargs)
+        except Exception as ex:
+            otc_instrumentation.emit(hooks, instrumentation.event(error=ex))
+            raise
+        otc_instrumentation.emit(hooks, instrumentation.event(response,
+            streamed=kwargs.get('stream', False)))
+        return response
+
+    #==== memoized project id ====
+    def _current_auth_ref(self):
+        auth = self.auth or self.session.auth
+        return getattr(auth, 'auth_ref', None)
+
+    def get_project_id(self, auth=None):
+        """Return the authenticated project id, resolved once per token.
+
+        Depending on the auth plugin, resolving the project id involves
+        token or catalog handling, which is pure overhead in bulk
+        changes. A re-authentication replaces the token and so resolves
+        the project id again.
+        """
+        if auth is not None:
+            return super().get_project_id(auth=auth)
+        auth_ref = self._current_auth_ref()
+        with self._project_id_lock:
+            if self._project_id is not None and auth_ref is not None:
+                if auth_ref is self._project_id_auth_ref:
+                    self._project_id_stats.hits += 1
+                    return self._project_id
+                # re-authenticated since the last resolution
+                self._project_id_stats.expirations += 1
+        project_id = super().get_project_id()
+        with self._project_id_lock:
+            self._project_id = project_id
+            self._project_id_auth_ref = self._current_auth_ref()
+            self._project_id_stats.misses += 1
+        return project_id
+
+    def project_id_stats(self):
+        """Statistics of the memoized project id: ``hits`` are the saved
+        resolutions, ``expirations`` the re-authentications
+
+        They are kept apart from the request hooks: these get one
+        :class:`~opentelekom.otc_instrumentation.RequestEvent` per HTTP
+        request of the proxy, and a project id lookup issues none. Like
+        :meth:`cache_stats`, they are local lookup statistics.
+
+        :rtype: :class:`~opentelekom.otc_cache.CacheStats`
+        """
+        return self._project_id_stats
+
+    #==== response caching for read-mostly catalog resources ====
+    @staticmethod
+    def _cache_namespace(resource_type):
+        return resource_type.__module__ + "." + resource_type.__name__
+
+    def _get_cache_ttl(self, resource_type):
+        ttl = self._cache_ttls.get(resource_type)
+        if ttl is None:
+            ttl = getattr(resource_type, 'cache_ttl', None)
+        return ttl
+
+    def set_cache(self, cache):
+        """Replace the response cache of the proxy, e.g. by a
+        :class:`~opentelekom.otc_cache.MemoryCache` with a
+        :class:`~opentelekom.otc_cache.DiskCache` as shared backing store.
+
+        :param cache: a cache object with get, set and invalidate methods
+        """
+        self._cache = cache
+
+    def enable_cache(self, resource_type, ttl=300):
+        """Cache list results of a resource class
+
+        :param resource_type: the resource class to cache
+        :param int ttl: time-to-live of cached results in seconds
+        """
+        self._cache_ttls[resource_type] = ttl
+
+    def disable_cache(self, resource_type):
+        """Switch off caching for a resource class, also for classes
+        cached by default"""
+        self._cache_ttls[resource_type] = 0
+        self.invalidate_cache(resource_type)
+
+    def invalidate_cache(self, resource_type=None):
+        """Drop cached results of a resource class or (without parameter)
+        all cached results"""
+        if resource_type is None:
+            self._cache.invalidate()
+        else:
+            self._cache.invalidate(self._cache_namespace(resource_type))
+
+    def cache_stats(self):
+        """Hit/miss statistics of the response cache
+
+        :rtype: :class:`~opentelekom.otc_cache.CacheStats`
+        """
+        return self._cache.stats
+
+    def _list(self, resource_type, value=None,
+              paginated=True, base_path=None, **attrs):
+        """List a resource, served from the response cache if caching
+        is enabled for the resource class"""
+        if not self._get_cache_ttl(resource_type):
+            return super()._list(resource_type, value=value,
+                paginated=paginated, base_path=base_path, **attrs)
+        return self._list_cached(resource_type, value=value,
+            paginated=paginated, base_path=base_path, **attrs)
+
+    def _list_cached(self, resource_type, value=None,
+              paginated=True, base_path=None, **attrs):
+        namespace = self._cache_namespace(resource_type)
+        key = [self.get_endpoint(), base_path, paginated, attrs]
+        found, raw_resources = self._cache.get(namespace, key)
+        if not found:
+            raw_resources = []
+            for res in super()._list(resource_type, value=value,
+                    paginated=paginated, base_path=base_path, **attrs):
+                raw = dict(res._uri.attributes)
+                raw.update(res._body.attributes)
+                raw_resources.append(raw)
+            self._cache.set(namespace, key, raw_resources,
+                self._get_cache_ttl(resource_type))
+
+        connection = self._get_connection()
+        for raw in raw_resources:
+            yield resource_type.existing(connection=connection, **raw)
+
     #==== bulk status support functions ====
     def wait_for_status_all(self, list_func, status, failures,
         interval=None, wait=None, attribute='status', **args):
@@ -11,6 +11,8 @@
 # under the License.
 
 import re
+import urllib.parse
+import weakref
 
 from openstack import resource
 from openstack import exceptions
@@ -20,7 +22,9 @@ from openstack import utils
 
 def filter_none(d):
 
-    if isinstance(d, dict):
+    if isinstance(d, OtcSubResource):
+        return d.body_dict()
+    elif isinstance(d, dict):
         return { k: filter_none(v) for k, v in d.items() if v is not None }
     elif isinstance(d, list):
         return [ filter_none(elem) for elem in d ]
@@ -31,6 +35,11 @@ def filter_none(d):
 
 class OtcResource(resource.Resource):
 
+    #: time-to-live in seconds for caching list results in the proxy,
+    #: None switches caching off (default). Use it for read-mostly
+    #: catalog resources only.
+    cache_ttl = None
+
     # ===== adaptions of standard methods for OTC
     def fetch(self, session, requires_id=True,
         base_path=None, error_message=None, **params):
@@ -102,15 +111,140 @@ class OtcResource(resource.Resource):
 
 
 #==== OpenTelekom Cloud usage of sub-resources to have cleaner APIs ====
+def _copy_tree(d):
+    if isinstance(d, dict):
+        return d.__class__((k, _copy_tree(v)) for k, v in d.items())
+    elif isinstance(d, list):
+        return [ _copy_tree(elem) for elem in d ]
+    else:
+        return d
+
+
 class OtcSubResource(resource.Resource):
     """ This is an extension for Open Telekom Cloud so that sub-dicts could be defined with
-        resource fields for better documentation and type control """
+        resource fields for better documentation and type control
+
+        The serializations of a sub-resource are memoized and only rebuilt
+        after an attribute of the sub-resource (or of a nested sub-resource)
+        is set. Assign changed values instead of modifying nested dicts or
+        lists in place, in-place changes are not detected.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._adopt_all()
+
+    def _adopt(self, value):
+        """ Register self as parent of nested sub-resources in a value """
+        if isinstance(value, OtcSubResource):
+            parents = value.__dict__.setdefault('_otc_parents', [])
+            if not any(parent() is self for parent in parents):
+                parents.append(weakref.ref(self))
+        elif isinstance(value, list):
+            for elem in value:
+                self._adopt(elem)
+
+    def _adopt_all(self):
+        self.__dict__['_otc_cache'] = {}
+        for value in self._body.attributes.values():
+            self._adopt(value)
+
+    def _invalidate(self):
+        """ Drop the memoized serializations of self and all parents """
+        self.__dict__['_otc_cache'] = {}
+        for parent in self.__dict__.get('_otc_parents', []):
+            parent = parent()
+            if parent is not None:
+                parent._invalidate()
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        component = getattr(self.__class__, name, None)
+        if isinstance(component, resource._BaseComponent):
+            # adopt the stored (type converted) value
+            self._adopt(getattr(self, component.key).attributes.get(component.name))
+            self._invalidate()
+
+    def __delattr__(self, name):
+        super().__delattr__(name)
+        if isinstance(getattr(self.__class__, name, None), resource._BaseComponent):
+            self._invalidate()
+
+    def _update(self, **attrs):
+        super()._update(**attrs)
+        self._adopt_all()
+        self._invalidate()
+
+    def __getstate__(self):
+        # copies start without caches and parents of the original
+        state = self.__dict__.copy()
+        state.pop('_otc_cache', None)
+        state.pop('_otc_parents', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._adopt_all()
+
+    def _memoize(self, key, build):
+        cache = self.__dict__.get('_otc_cache')
+        if cache is None:
+            # still in construction
+            return build()
+        try:
+            return cache[key]
+        except KeyError:
+            value = cache[key] = build()
+            return value
+
+    def body_dict(self):
+        """ The request representation with server side attribute names
+        and without None values, as used in request bodies.
+
+        The result is memoized and shared, so do not modify it.
+        """
+        return self._memoize('body', lambda: filter_none(self._body.attributes))
 
     def to_dict(self, body=True, headers=False, computed=True,
                 ignore_none=True, **params):
         """ Just redefine behavior of to_dict to ignore Nones """
-        return super().to_dict(body=body, headers=headers, computed=computed,
-                ignore_none=ignore_none, **params)
+        key = ('to_dict', body, headers, computed, ignore_none,
+               tuple(sorted(params.items())))
+        return _copy_tree(self._memoize(key, lambda: super(OtcSubResource, self).to_dict(
+            body=body, headers=headers, computed=computed,
+            ignore_none=ignore_none, **params)))
+
+    def __eq__(self, comparand):
+        """ Structural equality of the request representations """
+        if self is comparand:
+            return True
+        if isinstance(comparand, OtcSubResource):
+            return self.__class__ is comparand.__class__ and \
+                self.body_dict() == comparand.body_dict()
+        return super().__eq__(comparand)
+
+    __hash__ = None
+
+
+#==== paging along a links.next url ====
+class NextLinkMixin(object):
+    """ Page list calls only along the ``links`` dict of the responses,
+    ``{"next": url}``, as returned e.g. by DNS. The service omits the next
+    link on the last page, so no extra request after it is needed.
+
+    The mixin must precede the resource base class to take effect.
+    """
+
+    @classmethod
+    def _get_next_link(cls, uri, response, data, marker, limit, total_yielded):
+        links = data.get('links') if isinstance(data, dict) else None
+        next_link = links.get('next') if isinstance(links, dict) else None
+        if not next_link:
+            return None, {}
+        # the query (e.g. marker and limit) replaces the previous one
+        parts = urllib.parse.urlparse(next_link)
+        params = dict(urllib.parse.parse_qsl(parts.query))
+        return urllib.parse.urlunparse(parts._replace(query='')), params
 
 
 #==== OpenTelekom Cloud key/value extended tag handling ====
@@ -20,6 +20,7 @@ from opentelekom import otc_resource
 class Version(otc_resource.OtcResource):
     """DB Engine version information"""
     base_path = '/datastores/%(engine_name)s'
+    resources_key = 'dataStores'
 
     #: Data store name
     datastore_name = resource.URI("engine_name")
@@ -27,6 +28,9 @@ class Version(otc_resource.OtcResource):
     # capabilities
     allow_list = True
 
+    # datastore versions change very seldom, so cache them
+    cache_ttl = 600
+
     #: Properties
     #: the id of a datastore/db_engine description
     id = resource.Body('id')
@@ -19,6 +19,7 @@ from opentelekom import otc_resource
 class Flavor(otc_resource.OtcResource):
     """Database version detail information"""
     base_path = '/flavors/%(engine_name)s'
+    resources_key = 'flavors'
 
     #: Data store name
     engine_name = resource.URI("engine_name")
@@ -28,6 +29,9 @@ class Flavor(otc_resource.OtcResource):
     # capabilities
     allow_list = True
 
+    # flavors change very seldom, so cache them
+    cache_ttl = 600
+
     #: Properties
     #: the flavor identifier of the database
     spec_code = resource.Body('spec_code')
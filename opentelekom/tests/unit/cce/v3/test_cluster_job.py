@@ -0,0 +1,81 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import requests
+from unittest import mock
+
+from openstack import exceptions
+
+from opentelekom.cce import cce_service
+from opentelekom.cce.v3 import cluster_node as _cluster_node
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_JOB_ID = "a6ad04a6-a3e9-11e9-9e49-0255ac101611"
+_JOB_PATH = "/api/v3/projects/0391e4486e864c26be5654c522f440f2/jobs/" + _JOB_ID
+
+
+def _job(phase, sub_phases, reason=""):
+    return {"kind": "Job", "apiVersion": "v3",
+        "metadata": {"uid": _JOB_ID},
+        "spec": {"type": "CreateNode", "clusterUID": "0aa55501-a3e8-11e9-9e49-0255ac101611",
+            "resourceName": "rbe-sdkunit-job",
+            "subJobs": [{"kind": "Job", "apiVersion": "v3",
+                "metadata": {"uid": "b6ad04a6-a3e9-11e9-9e49-0255ac10161%d" % i},
+                "spec": {"type": "CreateNode", "resourceName": "rbe-sdkunit-job-%d" % i},
+                "status": {"phase": sub_phase}} for i, sub_phase in enumerate(sub_phases)]},
+        "status": {"phase": phase, "reason": reason}}
+
+
+class TestClusterJob(base.BaseFunctionalTest):
+
+    def setUp(self):
+        super().setUp()
+        self.user_cloud.add_service(cce_service.CceService("ccev2.0", aliases=["cce2"]))
+
+    class MockJobSuccess(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="cce", path=_JOB_PATH,
+                        status_code=200, max_calls=1,
+                        json=_job("Running", ["Success", "Running"])),
+            OtcMockResponse(method="GET", url_match="cce", path=_JOB_PATH,
+                        status_code=200, max_calls=1,
+                        json=_job("Success", ["Success", "Success"])),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockJobSuccess().request)
+    def test_wait_for_job(self, mock):
+        node = _cluster_node.ClusterNode.existing(id="65a87e5d-a3e9-11e9-92b3-0255ac101711",
+            status={"phase": "Build", "jobID": _JOB_ID})
+        job = self.user_cloud.cce2.wait_for_job(node, interval=0.01, wait=5)
+        self.assertEqual(job.id, _JOB_ID)
+        self.assertEqual(job.status, "Success")
+        self.assertEqual(job.progress(), (2, 2))
+        self.assertEqual([sub.spec.resource_name for sub in job.sub_jobs()],
+            ["rbe-sdkunit-job-0", "rbe-sdkunit-job-1"])
+
+    class MockJobFailed(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="cce", path=_JOB_PATH,
+                        status_code=200, max_calls=1,
+                        json=_job("Failed", ["Success", "Failed"], reason="Insufficient quota")),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockJobFailed().request)
+    def test_wait_for_failed_job(self, mock):
+        raised = self.assertRaises(exceptions.ResourceFailure,
+            self.user_cloud.cce2.wait_for_job, _JOB_ID, interval=0.01, wait=5)
+        self.assertIn("Insufficient quota", str(raised))
+        self.assertIn("rbe-sdkunit-job-1", str(raised))
+        self.assertNotIn("rbe-sdkunit-job-0", str(raised))
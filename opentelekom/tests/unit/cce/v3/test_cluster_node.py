@@ -148,3 +148,67 @@ class TestClusterNode(base.BaseFunctionalTest):
         nodes=self.user_cloud.cce2.wait_for_delete_nodes(self.cluster_id, self.nodes, interval=1, wait=5)
         self.assertEqual(len(nodes), 1)
         self.assertEqual(nodes[0].id, "65a87e5d-a3e9-11e9-92b3-0255ac101711")
+
+    class MockNodesSingleGet(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET",
+                        url_match="cce",
+                        path="/api/v3/projects/0391e4486e864c26be5654c522f440f2/clusters/0aa55501-a3e8-11e9-9e49-0255ac101611/nodes",
+                        status_code=200,
+                        max_calls=1,
+                        json= {"kind":"List","apiVersion":"v3","items":[
+                            {"kind":"Node","apiVersion":"v3","metadata":{"name":"rbe-sdkunit-filter-node-t4ywk","uid":"65a87e5d-a3e9-11e9-92b3-0255ac101711"},"spec":{"flavor":"s2.large.1","az":"eu-de-01"},"status":{"phase":"Creating"}},
+                            {"kind":"Node","apiVersion":"v3","metadata":{"name":"rbe-sdkunit-filter-node-n8u63","uid":"65a9727f-a3e9-11e9-92b3-0255ac101711"},"spec":{"flavor":"s2.large.1","az":"eu-de-01"},"status":{"phase":"Active"}},
+                            {"kind":"Node","apiVersion":"v3","metadata":{"name":"rbe-sdkunit-filter-node-lnmtx","uid":"65a73294-a3e9-11e9-92b3-0255ac101711"},"spec":{"flavor":"s2.large.1","az":"eu-de-01"},"status":{"phase":"Active"}},
+                            {"kind":"Node","apiVersion":"v3","metadata":{"name":"rbe-sdkunit-filter-node-t4ywk","uid":"65a87e6d-a3e9-11e9-92b3-0255ac101711"},"spec":{"flavor":"s2.large.1","az":"eu-de-01"},"status":{"phase":"Active"}}]},
+                        ),
+            # the small wait set is refreshed by a single node GET afterwards
+            OtcMockResponse(method="GET",
+                        url_match="cce",
+                        path="/api/v3/projects/0391e4486e864c26be5654c522f440f2/clusters/0aa55501-a3e8-11e9-9e49-0255ac101611/nodes/65a87e5d-a3e9-11e9-92b3-0255ac101711",
+                        status_code=200,
+                        max_calls=1,
+                        json={"kind":"Node","apiVersion":"v3","metadata":{"name":"rbe-sdkunit-filter-node-t4ywk","uid":"65a87e5d-a3e9-11e9-92b3-0255ac101711"},"spec":{"flavor":"s2.large.1","az":"eu-de-01"},"status":{"phase":"Active"}}
+                        ),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockNodesSingleGet().request)
+    def test_wait_status_single_get(self, mock):
+        nodes=self.user_cloud.cce2.wait_for_status_nodes(self.cluster_id, self.node_ids[:1], interval=1, wait=5)
+        self.assertEqual(len(nodes), 1)
+        self.assertEqual(nodes[0].id, "65a87e5d-a3e9-11e9-92b3-0255ac101711")
+        self.assertEqual(nodes[0].status, "Active")
+
+    class MockNodesLateList(OtcMockService):
+        responses = [
+            # the first node is not listed yet
+            OtcMockResponse(method="GET",
+                        url_match="cce",
+                        path="/api/v3/projects/0391e4486e864c26be5654c522f440f2/clusters/0aa55501-a3e8-11e9-9e49-0255ac101611/nodes",
+                        status_code=200,
+                        max_calls=1,
+                        json= {"kind":"List","apiVersion":"v3","items":[
+                            {"kind":"Node","apiVersion":"v3","metadata":{"name":"node-b","uid":"65a9727f-a3e9-11e9-92b3-0255ac101711"},"spec":{"flavor":"s2.large.1","az":"eu-de-01"},"status":{"phase":"Creating"}},
+                            {"kind":"Node","apiVersion":"v3","metadata":{"name":"node-c","uid":"65a73294-a3e9-11e9-92b3-0255ac101711"},"spec":{"flavor":"s2.large.1","az":"eu-de-01"},"status":{"phase":"Active"}},
+                            {"kind":"Node","apiVersion":"v3","metadata":{"name":"node-d","uid":"65a87e6d-a3e9-11e9-92b3-0255ac101711"},"spec":{"flavor":"s2.large.1","az":"eu-de-01"},"status":{"phase":"Active"}},
+                            {"kind":"Node","apiVersion":"v3","metadata":{"name":"node-e","uid":"65a87e7d-a3e9-11e9-92b3-0255ac101711"},"spec":{"flavor":"s2.large.1","az":"eu-de-01"},"status":{"phase":"Active"}},]},
+                        ),
+            # so the nodes are listed again instead of a GET of the second
+            OtcMockResponse(method="GET",
+                        url_match="cce",
+                        path="/api/v3/projects/0391e4486e864c26be5654c522f440f2/clusters/0aa55501-a3e8-11e9-9e49-0255ac101611/nodes",
+                        status_code=200,
+                        max_calls=1,
+                        json= {"kind":"List","apiVersion":"v3","items":[
+                            {"kind":"Node","apiVersion":"v3","metadata":{"name":"node-a","uid":"65a87e5d-a3e9-11e9-92b3-0255ac101711"},"spec":{"flavor":"s2.large.1","az":"eu-de-01"},"status":{"phase":"Active"}},
+                            {"kind":"Node","apiVersion":"v3","metadata":{"name":"node-b","uid":"65a9727f-a3e9-11e9-92b3-0255ac101711"},"spec":{"flavor":"s2.large.1","az":"eu-de-01"},"status":{"phase":"Active"}},
+                            {"kind":"Node","apiVersion":"v3","metadata":{"name":"node-c","uid":"65a73294-a3e9-11e9-92b3-0255ac101711"},"spec":{"flavor":"s2.large.1","az":"eu-de-01"},"status":{"phase":"Active"}},
+                            {"kind":"Node","apiVersion":"v3","metadata":{"name":"node-d","uid":"65a87e6d-a3e9-11e9-92b3-0255ac101711"},"spec":{"flavor":"s2.large.1","az":"eu-de-01"},"status":{"phase":"Active"}},]},
+                        ),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockNodesLateList().request)
+    def test_wait_status_late_node(self, mock):
+        nodes=self.user_cloud.cce2.wait_for_status_nodes(self.cluster_id, self.node_ids[:2], interval=1, wait=5)
+        self.assertEqual(sorted(node.id for node in nodes), sorted(self.node_ids[:2]))
+        self.assertEqual([node.status for node in nodes], ["Active", "Active"])
@@ -0,0 +1,80 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import requests
+from unittest import mock
+
+from opentelekom.cce import cce_service
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_CLUSTERS_PATH = "/api/v3/projects/0391e4486e864c26be5654c522f440f2/clusters"
+
+
+def _node(name, uid, flavor, az, phase):
+    return {"kind": "Node", "apiVersion": "v3",
+        "metadata": {"name": name, "uid": uid, "creationTimestamp": "2019-07-11 14:37:23.976068 +0000 UTC"},
+        "spec": {"flavor": flavor, "az": az},
+        "status": {"phase": phase}}
+
+
+class TestInventory(base.BaseFunctionalTest):
+
+    def setUp(self):
+        super().setUp()
+        self.user_cloud.add_service(cce_service.CceService("ccev2.0", aliases=["cce2"]))
+
+    class MockFleet(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="cce", path=_CLUSTERS_PATH,
+                        status_code=200, max_calls=1,
+                        json={"kind": "Cluster", "apiVersion": "v3", "items": [
+                            {"kind": "Cluster", "apiVersion": "v3", "metadata": {"name": "rbe-sdkunit-inv1", "uid": "0aa55501-a3e8-11e9-9e49-0255ac101611"}, "status": {"phase": "Available"}},
+                            {"kind": "Cluster", "apiVersion": "v3", "metadata": {"name": "rbe-sdkunit-inv2", "uid": "0aa55501-a3e8-11e9-9e49-0255ac101612"}, "status": {"phase": "Available"}},
+                            {"kind": "Cluster", "apiVersion": "v3", "metadata": {"name": "rbe-sdkunit-inv3", "uid": "0aa55501-a3e8-11e9-9e49-0255ac101613"}, "status": {"phase": "Available"}}]}),
+            OtcMockResponse(method="GET", url_match="cce",
+                        path=_CLUSTERS_PATH + "/0aa55501-a3e8-11e9-9e49-0255ac101611/nodes",
+                        status_code=200, max_calls=1,
+                        json={"kind": "List", "apiVersion": "v3", "items": [
+                            _node("rbe-sdkunit-inv1-a", "65a87e5d-a3e9-11e9-92b3-0255ac101711", "s2.large.1", "eu-de-01", "Active"),
+                            _node("rbe-sdkunit-inv1-b", "65a87e5d-a3e9-11e9-92b3-0255ac101712", "s2.large.1", "eu-de-02", "Active"),
+                            _node("rbe-sdkunit-inv1-c", "65a87e5d-a3e9-11e9-92b3-0255ac101713", "s2.xlarge.2", "eu-de-01", "Error")]}),
+            OtcMockResponse(method="GET", url_match="cce",
+                        path=_CLUSTERS_PATH + "/0aa55501-a3e8-11e9-9e49-0255ac101612/nodes",
+                        status_code=200, max_calls=1,
+                        json={"kind": "List", "apiVersion": "v3", "items": [
+                            _node("rbe-sdkunit-inv2-a", "65a87e5d-a3e9-11e9-92b3-0255ac101721", "s2.large.1", "eu-de-01", "Active")]}),
+            OtcMockResponse(method="GET", url_match="cce",
+                        path=_CLUSTERS_PATH + "/0aa55501-a3e8-11e9-9e49-0255ac101613/nodes",
+                        status_code=500, max_calls=1,
+                        json={"error_code": "CCE.01500001", "error_msg": "Internal error"}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockFleet().request)
+    def test_inventory(self, mock):
+        inventory = self.user_cloud.cce2.node_inventory(max_parallel=3)
+        self.assertEqual(len(inventory), 4)
+        self.assertEqual(list(inventory.errors.keys()),
+            ["0aa55501-a3e8-11e9-9e49-0255ac101613"])
+        self.assertEqual(inventory.count_by('cluster_name'),
+            {"rbe-sdkunit-inv1": 3, "rbe-sdkunit-inv2": 1})
+        self.assertEqual(inventory.count_by('flavor', 'status'),
+            {("s2.large.1", "Active"): 3, ("s2.xlarge.2", "Error"): 1})
+        self.assertEqual(inventory.filter(status="Active").count_by('availability_zone'),
+            {"eu-de-01": 2, "eu-de-02": 1})
+        self.assertEqual(inventory.count(flavor=lambda f: f.startswith("s2.large")), 3)
+        groups = inventory.group_by('cluster_id')
+        self.assertEqual(len(groups["0aa55501-a3e8-11e9-9e49-0255ac101611"]), 3)
+        row = next(inventory.filter(node_name="rbe-sdkunit-inv2-a").rows())
+        self.assertEqual(row['created_at'], "2019-07-11 14:37:23.976068 +0000 UTC")
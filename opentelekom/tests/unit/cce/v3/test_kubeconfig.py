@@ -0,0 +1,123 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import base64
+import datetime
+import os
+import requests
+import tempfile
+import yaml
+from unittest import mock
+
+from cryptography import fernet
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from openstack import exceptions
+
+from opentelekom.cce import cce_service
+from opentelekom.cce.v3 import kubeconfig as _kubeconfig
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+def _client_cert(days):
+    key = ec.generate_private_key(ec.SECP256R1(), default_backend())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "rbe-sdkunit-user")])
+    now = datetime.datetime.utcnow()
+    cert = x509.CertificateBuilder().subject_name(name).issuer_name(name) \
+        .public_key(key.public_key()).serial_number(1) \
+        .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=days)) \
+        .sign(key, hashes.SHA256(), default_backend())
+    return base64.b64encode(cert.public_bytes(serialization.Encoding.PEM)).decode()
+
+
+_CERT_BUNDLE = {"kind": "Config", "apiVersion": "v1", "preferences": {},
+    "clusters": [
+        {"name": "internalCluster", "cluster": {"server": "https://192.168.0.10:5443", "certificate-authority-data": "Q0E="}},
+        {"name": "externalCluster", "cluster": {"server": "https://80.158.1.1:5443", "insecure-skip-tls-verify": True}}],
+    "users": [{"name": "user", "user": {"client-certificate-data": _client_cert(365), "client-key-data": "S0VZ"}}],
+    "contexts": [
+        {"name": "internal", "context": {"cluster": "internalCluster", "user": "user"}},
+        {"name": "external", "context": {"cluster": "externalCluster", "user": "user"}}],
+    "current-context": "internal"}
+
+
+class TestKubeconfig(base.BaseFunctionalTest):
+
+    def setUp(self):
+        super().setUp()
+        self.cluster_id = "0aa55501-a3e8-11e9-9e49-0255ac101611"
+        self.user_cloud.add_service(cce_service.CceService("ccev2.0", aliases=["cce2"]))
+        self.cachedir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cachedir.cleanup)
+        self.key = fernet.Fernet.generate_key()
+
+    class MockClusterCert(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET",
+                        url_match="cce",
+                        path="/api/v3/projects/0391e4486e864c26be5654c522f440f2/clusters/0aa55501-a3e8-11e9-9e49-0255ac101611/clustercert",
+                        status_code=200,
+                        max_calls=1,
+                        json=_CERT_BUNDLE),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockClusterCert().request)
+    def test_kubeconfig_cached(self, mock):
+        cce = self.user_cloud.cce2
+        cce.set_cert_cache(_kubeconfig.cert_cache(self.cachedir.name, key=self.key))
+        config = yaml.safe_load(cce.get_kubeconfig(self.cluster_id))
+        self.assertEqual(config['current-context'], "internal")
+        self.assertEqual(len(config['clusters']), 2)
+
+        # second call (also from another process) is served by the disk cache
+        cce.set_cert_cache(_kubeconfig.cert_cache(self.cachedir.name, key=self.key))
+        path = os.path.join(self.cachedir.name, "kubeconfig")
+        config = yaml.safe_load(cce.get_kubeconfig(self.cluster_id,
+            context="external", path=path))
+        self.assertEqual(config['current-context'], "external")
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+        # the key material is not stored in plain text
+        for filename in os.listdir(self.cachedir.name):
+            if filename.endswith(".json"):
+                with open(os.path.join(self.cachedir.name, filename), 'rb') as cachefile:
+                    self.assertNotIn(b"client-key-data", cachefile.read())
+
+        self.assertRaises(exceptions.SDKException, cce.get_kubeconfig,
+            self.cluster_id, context="nonexisting")
+
+    def test_expiry_and_foreign_key(self):
+        body = dict(_CERT_BUNDLE, users=[{"name": "user",
+            "user": {"client-certificate-data": _client_cert(1)}}])
+        expiry = _kubeconfig.cert_expiry(body)
+        self.assertAlmostEqual(expiry - datetime.datetime.utcnow().timestamp(),
+            86400, delta=120)
+        cache = _kubeconfig.cert_cache(self.cachedir.name, key=self.key)
+        cache.set(_kubeconfig.CERT_NAMESPACE, self.cluster_id, body)
+        # a cache with a different key cannot read the entries
+        foreign = _kubeconfig.cert_cache(self.cachedir.name,
+            key=b"0000000000000000000000000000000000000000000=")
+        self.assertEqual(foreign.get(_kubeconfig.CERT_NAMESPACE, self.cluster_id),
+            (False, None))
+
+    @mock.patch.dict(os.environ, {}, clear=True)
+    @mock.patch.object(_kubeconfig, "keyring", None)
+    def test_no_key(self):
+        # without key, nothing is cached instead of storing the key on disk
+        self.assertIsNone(_kubeconfig.cert_cache(self.cachedir.name))
+        self.assertEqual(os.listdir(self.cachedir.name), [])
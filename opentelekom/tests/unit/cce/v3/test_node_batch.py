@@ -0,0 +1,158 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import requests
+from unittest import mock
+
+from opentelekom.cce import cce_service
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_NODES_PATH = "/api/v3/projects/0391e4486e864c26be5654c522f440f2/clusters/0aa55501-a3e8-11e9-9e49-0255ac101611/nodes"
+
+
+def _node(name, uid, phase):
+    return {"kind": "Node", "apiVersion": "v3",
+        "metadata": {"name": name, "uid": uid},
+        "spec": {"flavor": "s2.large.1", "az": "eu-de-01", "count": 1},
+        "status": {"phase": phase}}
+
+
+class TestNodeBatch(base.BaseFunctionalTest):
+
+    def setUp(self):
+        super().setUp()
+        self.cluster_id = "0aa55501-a3e8-11e9-9e49-0255ac101611"
+        self.user_cloud.add_service(cce_service.CceService("ccev2.0", aliases=["cce2"]))
+
+    class MockBatchCreate(OtcMockService):
+        responses = [
+            # existing nodes before creation
+            OtcMockResponse(method="GET", url_match="cce", path=_NODES_PATH,
+                        status_code=200, max_calls=1,
+                        json={"kind": "List", "apiVersion": "v3", "items": [
+                            _node("rbe-sdkunit-batch-old", "65a87e5d-a3e9-11e9-92b3-0255ac101711", "Active")]}),
+            # spec 0 with count 3: CCE reports no uid for the single nodes
+            OtcMockResponse(method="POST", url_match="cce", path=_NODES_PATH,
+                        status_code=201, max_calls=1,
+                        json=_node("rbe-sdkunit-batch-a", None, "Build")),
+            # spec 1: a single node
+            OtcMockResponse(method="POST", url_match="cce", path=_NODES_PATH,
+                        status_code=201, max_calls=1,
+                        json=_node("rbe-sdkunit-batch-b", "75a87e5d-a3e9-11e9-92b3-0255ac101714", "Build")),
+            # spec 2 fails
+            OtcMockResponse(method="POST", url_match="cce", path=_NODES_PATH,
+                        status_code=400, max_calls=1,
+                        json={"error_code": "CCE.01400001", "error_msg": "Invalid request"}),
+            OtcMockResponse(method="GET", url_match="cce", path=_NODES_PATH,
+                        status_code=200, max_calls=1,
+                        json={"kind": "List", "apiVersion": "v3", "items": [
+                            _node("rbe-sdkunit-batch-old", "65a87e5d-a3e9-11e9-92b3-0255ac101711", "Active"),
+                            _node("rbe-sdkunit-batch-a-t4ywk", "75a87e5d-a3e9-11e9-92b3-0255ac101711", "Build"),
+                            _node("rbe-sdkunit-batch-b", "75a87e5d-a3e9-11e9-92b3-0255ac101714", "Build")]}),
+            OtcMockResponse(method="GET", url_match="cce", path=_NODES_PATH,
+                        status_code=200, max_calls=1,
+                        json={"kind": "List", "apiVersion": "v3", "items": [
+                            _node("rbe-sdkunit-batch-old", "65a87e5d-a3e9-11e9-92b3-0255ac101711", "Active"),
+                            _node("rbe-sdkunit-batch-a-t4ywk", "75a87e5d-a3e9-11e9-92b3-0255ac101711", "Active"),
+                            _node("rbe-sdkunit-batch-a-n8u63", "75a87e5d-a3e9-11e9-92b3-0255ac101712", "Error"),
+                            _node("rbe-sdkunit-batch-a-lnmtx", "75a87e5d-a3e9-11e9-92b3-0255ac101713", "Active"),
+                            _node("rbe-sdkunit-batch-b", "75a87e5d-a3e9-11e9-92b3-0255ac101714", "Active")]}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockBatchCreate().request)
+    def test_batch_create_wait(self, mock):
+        specs = [
+            {"name": "rbe-sdkunit-batch-a", "spec": {"flavor": "s2.large.1", "count": 3}},
+            {"name": "rbe-sdkunit-batch-b", "spec": {"flavor": "s2.large.1"}},
+            {"name": "rbe-sdkunit-batch-c", "spec": {"flavor": "s2.large.1"}},
+        ]
+        batch = self.user_cloud.cce2.create_cluster_nodes(self.cluster_id, specs,
+            max_parallel=1)
+        self.assertEqual(list(batch.errors.keys()), [2])
+        self.assertEqual(batch.expected_count, 4)
+
+        batch = self.user_cloud.cce2.wait_for_node_batch(batch, interval=1, wait=10)
+        self.assertTrue(batch.resolved)
+        self.assertEqual(len(batch.nodes_of(0)), 3)
+        self.assertEqual([node.id for node in batch.nodes_of(1)],
+            ["75a87e5d-a3e9-11e9-92b3-0255ac101714"])
+        self.assertNotIn("65a87e5d-a3e9-11e9-92b3-0255ac101711", batch.node_ids)
+        self.assertEqual([node.name for node in batch.failed_nodes()],
+            ["rbe-sdkunit-batch-a-n8u63"])
+        self.assertFalse(batch.ok)
+
+    class MockBatchWaitFailure(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="cce", path=_NODES_PATH,
+                        status_code=200, max_calls=1,
+                        json={"kind": "List", "apiVersion": "v3", "items": []}),
+            OtcMockResponse(method="POST", url_match="cce", path=_NODES_PATH,
+                        status_code=201, max_calls=1,
+                        json=_node("rbe-sdkunit-batch-d", "95a87e5d-a3e9-11e9-92b3-0255ac101711", "Build")),
+            OtcMockResponse(method="GET", url_match="cce", path=_NODES_PATH,
+                        status_code=200, max_calls=1,
+                        json={"kind": "List", "apiVersion": "v3", "items": [
+                            _node("rbe-sdkunit-batch-d", "95a87e5d-a3e9-11e9-92b3-0255ac101711", "Abnormal")]}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockBatchWaitFailure().request)
+    def test_batch_wait_failures(self, mock):
+        batch = self.user_cloud.cce2.create_cluster_nodes(self.cluster_id,
+            [{"name": "rbe-sdkunit-batch-d", "spec": {"flavor": "s2.large.1"}}])
+        batch = self.user_cloud.cce2.wait_for_node_batch(batch,
+            failures=["Error", "Abnormal"], interval=1, wait=10)
+        # the failure statuses of the wait are kept by the batch
+        self.assertEqual([node.name for node in batch.failed],
+            ["rbe-sdkunit-batch-d"])
+        self.assertFalse(batch.ok)
+
+    class MockParallelDelete(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="cce", path=_NODES_PATH,
+                        status_code=200, max_calls=1,
+                        json={"kind": "List", "apiVersion": "v3", "items": [
+                            dict(_node("rbe-sdkunit-batch-1", "85a87e5d-a3e9-11e9-92b3-0255ac101711", "Active"),
+                                metadata={"name": "rbe-sdkunit-batch-1", "uid": "85a87e5d-a3e9-11e9-92b3-0255ac101711", "labels": {"pool": "a"}}),
+                            dict(_node("rbe-sdkunit-batch-2", "85a87e5d-a3e9-11e9-92b3-0255ac101712", "Active"),
+                                metadata={"name": "rbe-sdkunit-batch-2", "uid": "85a87e5d-a3e9-11e9-92b3-0255ac101712", "labels": {"pool": "a"}}),
+                            dict(_node("rbe-sdkunit-batch-3", "85a87e5d-a3e9-11e9-92b3-0255ac101713", "Active"),
+                                metadata={"name": "rbe-sdkunit-batch-3", "uid": "85a87e5d-a3e9-11e9-92b3-0255ac101713", "labels": {"pool": "b"}}),
+                            _node("rbe-sdkunit-batch-4", "85a87e5d-a3e9-11e9-92b3-0255ac101714", "Active")]}),
+            OtcMockResponse(method="DELETE", url_match="cce",
+                        path=_NODES_PATH + "/85a87e5d-a3e9-11e9-92b3-0255ac101711",
+                        status_code=200, max_calls=1,
+                        json=_node("rbe-sdkunit-batch-1", "85a87e5d-a3e9-11e9-92b3-0255ac101711", "Deleting")),
+            OtcMockResponse(method="DELETE", url_match="cce",
+                        path=_NODES_PATH + "/85a87e5d-a3e9-11e9-92b3-0255ac101712",
+                        status_code=404, max_calls=1,
+                        json={"error_code": "CCE_CM.0003", "error_msg": "Resource not found"}),
+            OtcMockResponse(method="GET", url_match="cce", path=_NODES_PATH,
+                        status_code=200, max_calls=1,
+                        json={"kind": "List", "apiVersion": "v3", "items": [
+                            _node("rbe-sdkunit-batch-3", "85a87e5d-a3e9-11e9-92b3-0255ac101713", "Active"),
+                            _node("rbe-sdkunit-batch-4", "85a87e5d-a3e9-11e9-92b3-0255ac101714", "Active")]}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockParallelDelete().request)
+    def test_parallel_delete_labels(self, mock):
+        result = self.user_cloud.cce2.delete_cluster_nodes(self.cluster_id,
+            ignore_missing=False, max_parallel=4, labels={"pool": "a"})
+        self.assertEqual([node.id for node in result],
+            ["85a87e5d-a3e9-11e9-92b3-0255ac101711"])
+        self.assertEqual(list(result.errors.keys()),
+            ["85a87e5d-a3e9-11e9-92b3-0255ac101712"])
+        self.assertFalse(result.ok)
+        self.user_cloud.cce2.wait_for_delete_nodes(self.cluster_id, result,
+            interval=1, wait=10)
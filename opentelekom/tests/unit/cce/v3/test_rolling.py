@@ -0,0 +1,193 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import os
+import requests
+import tempfile
+from unittest import mock
+
+from openstack import exceptions
+
+from opentelekom.cce import cce_service
+from opentelekom.cce.v3 import rolling as _rolling
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_NODES_PATH = "/api/v3/projects/0391e4486e864c26be5654c522f440f2/clusters/0aa55501-a3e8-11e9-9e49-0255ac101611/nodes"
+
+_OLD1 = "65a87e5d-a3e9-11e9-92b3-0255ac101711"
+_OLD2 = "65a87e5d-a3e9-11e9-92b3-0255ac101712"
+_NEW1 = "75a87e5d-a3e9-11e9-92b3-0255ac101711"
+_NEW2 = "75a87e5d-a3e9-11e9-92b3-0255ac101712"
+
+
+def _node(name, uid, phase):
+    return {"kind": "Node", "apiVersion": "v3",
+        "metadata": {"name": name, "uid": uid},
+        "spec": {"flavor": "s2.large.1", "az": "eu-de-01"},
+        "status": {"phase": phase}}
+
+
+def _list(*nodes):
+    return OtcMockResponse(method="GET", url_match="cce", path=_NODES_PATH,
+        status_code=200, max_calls=1,
+        json={"kind": "List", "apiVersion": "v3", "items": list(nodes)})
+
+
+def _create():
+    return OtcMockResponse(method="POST", url_match="cce", path=_NODES_PATH,
+        status_code=201, max_calls=1,
+        json=_node("rbe-sdkunit-roll-new", None, "Build"))
+
+
+def _delete(uid):
+    return OtcMockResponse(method="DELETE", url_match="cce", path=_NODES_PATH + "/" + uid,
+        status_code=200, max_calls=1, json=_node("rbe-sdkunit-roll-old", uid, "Deleting"))
+
+
+class TestRollingReplace(base.BaseFunctionalTest):
+
+    def setUp(self):
+        super().setUp()
+        self.cluster_id = "0aa55501-a3e8-11e9-9e49-0255ac101611"
+        self.user_cloud.add_service(cce_service.CceService("ccev2.0", aliases=["cce2"]))
+        self.statedir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.statedir.cleanup)
+        self.spec = {"name": "rbe-sdkunit-roll-new", "spec": {"flavor": "s2.xlarge.2"}}
+
+    class MockRollout(OtcMockService):
+        responses = [
+            # nodes before the rollout
+            _list(_node("rbe-sdkunit-roll-old1", _OLD1, "Active"), _node("rbe-sdkunit-roll-old2", _OLD2, "Active")),
+            # wave 1: create one replacement (surge 1)
+            _list(_node("rbe-sdkunit-roll-old1", _OLD1, "Active"), _node("rbe-sdkunit-roll-old2", _OLD2, "Active")),
+            _create(),
+            _list(_node("rbe-sdkunit-roll-old1", _OLD1, "Active"), _node("rbe-sdkunit-roll-old2", _OLD2, "Active"),
+                _node("rbe-sdkunit-roll-new-t4ywk", _NEW1, "Installing")),
+            # replacement active: delete first old node, create next replacement
+            _list(_node("rbe-sdkunit-roll-old1", _OLD1, "Active"), _node("rbe-sdkunit-roll-old2", _OLD2, "Active"),
+                _node("rbe-sdkunit-roll-new-t4ywk", _NEW1, "Active")),
+            _delete(_OLD1),
+            _create(),
+            _list(_node("rbe-sdkunit-roll-old2", _OLD2, "Active"),
+                _node("rbe-sdkunit-roll-new-t4ywk", _NEW1, "Active"), _node("rbe-sdkunit-roll-new-n8u63", _NEW2, "Active")),
+            _delete(_OLD2),
+            _list(_node("rbe-sdkunit-roll-new-t4ywk", _NEW1, "Active"), _node("rbe-sdkunit-roll-new-n8u63", _NEW2, "Active")),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockRollout().request)
+    def test_rollout(self, mock):
+        state_file = os.path.join(self.statedir.name, "rollout.json")
+        state = self.user_cloud.cce2.rolling_replace_nodes(self.cluster_id,
+            [_OLD1, _OLD2], self.spec, surge=1, max_unavailable=0,
+            state_file=state_file, interval=0.01, wait=5)
+        self.assertEqual(state.new_ids, [_NEW1, _NEW2])
+        self.assertEqual(state.deleted_ids, [_OLD1, _OLD2])
+        self.assertEqual(state.requested, 2)
+        self.assertFalse(os.path.exists(state_file))
+
+    class MockResume(OtcMockService):
+        responses = [
+            # the delete of old1 got lost in the crash and is repeated
+            _list(_node("rbe-sdkunit-roll-old1", _OLD1, "Active"), _node("rbe-sdkunit-roll-old2", _OLD2, "Active"),
+                _node("rbe-sdkunit-roll-new-t4ywk", _NEW1, "Active"), _node("rbe-sdkunit-roll-new-n8u63", _NEW2, "Active")),
+            _delete(_OLD1),
+            _list(_node("rbe-sdkunit-roll-old2", _OLD2, "Active"),
+                _node("rbe-sdkunit-roll-new-t4ywk", _NEW1, "Active"), _node("rbe-sdkunit-roll-new-n8u63", _NEW2, "Active")),
+            _delete(_OLD2),
+            _list(_node("rbe-sdkunit-roll-new-t4ywk", _NEW1, "Active"), _node("rbe-sdkunit-roll-new-n8u63", _NEW2, "Active")),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockResume().request)
+    def test_resume(self, mock):
+        state_file = os.path.join(self.statedir.name, "rollout.json")
+        # crashed after the first delete was recorded, before the second
+        # replacement was recorded
+        _rolling.RolloutState(self.cluster_id, [_OLD1, _OLD2], [_OLD1, _OLD2],
+            self.spec, requested=1, new_ids=[_NEW1], deleted_ids=[_OLD1]).save(state_file)
+        state = self.user_cloud.cce2.rolling_replace_nodes(self.cluster_id,
+            None, None, surge=1, state_file=state_file, interval=0.01, wait=5)
+        self.assertEqual(state.requested, 2)
+        self.assertEqual(state.deleted_ids, [_OLD1, _OLD2])
+
+    class MockResumeDeleting(OtcMockService):
+        responses = [
+            _list(_node("rbe-sdkunit-roll-old1", _OLD1, "Deleting"), _node("rbe-sdkunit-roll-old2", _OLD2, "Active")),
+            # old1 is not deleted again, old2 is gone meanwhile
+            OtcMockResponse(method="DELETE", url_match="cce", path=_NODES_PATH + "/" + _OLD2,
+                status_code=404, max_calls=1, json={"message": "node not found"}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockResumeDeleting().request)
+    def test_resume_deleting(self, mock_request):
+        state = _rolling.RolloutState(self.cluster_id, [_OLD1, _OLD2], [_OLD1, _OLD2],
+            self.spec, deleted_ids=[_OLD1, _OLD2])
+        _rolling.RollingReplace(self.user_cloud.cce2, state).resume()
+        deletes = [call for call in mock_request.call_args_list if call[0][0] == "DELETE"]
+        self.assertEqual(len(deletes), 1)
+        self.assertTrue(deletes[0][0][1].endswith(_OLD2))
+
+    class MockCreateRejected(OtcMockService):
+        responses = [
+            _list(_node("rbe-sdkunit-roll-old1", _OLD1, "Active")),
+            OtcMockResponse(method="POST", url_match="cce", path=_NODES_PATH,
+                status_code=400, max_calls=1, json={"message": "quota exceeded"}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockCreateRejected().request)
+    def test_create_rejected(self, mock_request):
+        state_file = os.path.join(self.statedir.name, "rollout.json")
+        state = _rolling.RolloutState(self.cluster_id, [_OLD1], [_OLD1], self.spec)
+        engine = _rolling.RollingReplace(self.user_cloud.cce2, state, state_file=state_file)
+        self.assertRaises(exceptions.HttpException, engine.step)
+        # the rejected request is not counted
+        self.assertEqual(state.requested, 0)
+        self.assertEqual(_rolling.RolloutState.load(state_file).requested, 0)
+        self.assertEqual(os.stat(state_file).st_mode & 0o777, 0o600)
+        self.assertEqual(os.listdir(self.statedir.name), ["rollout.json"])
+
+    class MockVanished(OtcMockService):
+        responses = [
+            _list(_node("rbe-sdkunit-roll-old1", _OLD1, "Active"),
+                _node("rbe-sdkunit-roll-new-t4ywk", _NEW1, "Installing")),
+            # the replacement is gone, e.g. deleted after a failed install
+            _list(_node("rbe-sdkunit-roll-old1", _OLD1, "Active")),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockVanished().request)
+    def test_vanished(self, mock_request):
+        state = _rolling.RolloutState(self.cluster_id, [_OLD1], [_OLD1], self.spec,
+            requested=1)
+        engine = _rolling.RollingReplace(self.user_cloud.cce2, state)
+        self.assertFalse(engine.step())
+        self.assertEqual(state.new_ids, [_NEW1])
+        self.assertRaises(exceptions.ResourceFailure, engine.step)
+
+    class MockNeverListed(OtcMockService):
+        responses = [
+            # the same node list on every observation
+            OtcMockResponse(method="GET", url_match="cce", path=_NODES_PATH,
+                status_code=200, json={"kind": "List", "apiVersion": "v3", "items": [
+                    _node("rbe-sdkunit-roll-old1", _OLD1, "Active")]}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockNeverListed().request)
+    def test_never_listed(self, mock_request):
+        state = _rolling.RolloutState(self.cluster_id, [_OLD1], [_OLD1], self.spec,
+            requested=1)
+        engine = _rolling.RollingReplace(self.user_cloud.cce2, state,
+            max_unseen_rounds=2)
+        self.assertFalse(engine.step())
+        self.assertFalse(engine.step())
+        self.assertRaises(exceptions.ResourceFailure, engine.step)
@@ -0,0 +1,88 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import io
+import json
+import logging
+import requests
+import unittest
+from unittest import mock
+
+from opentelekom.cce import cce_service
+from opentelekom.cce.v3 import cce_resource
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService
+
+from opentelekom.tests.functional import base
+
+
+def _nodes_body(count):
+    return {"kind": "List", "apiVersion": "v3", "items": [
+        {"kind": "Node", "apiVersion": "v3",
+         "metadata": {"name": "rbe-sdkunit-stream-%d" % i, "uid": "65a87e5d-a3e9-11e9-92b3-%012d" % i},
+         "spec": {"flavor": "s2.large.1", "az": "eu-de-01", "rootVolume": {"volumetype": "SATA", "size": 100}},
+         "status": {"phase": "Active", "privateIP": "10.248.2.%d" % (i % 250)}}
+        for i in range(count)]}
+
+
+class _StreamedNodes(OtcMockService):
+    """ Keystone from the recorded mocks, node lists as real streamed
+    responses reading from a raw byte stream """
+
+    responses = []
+
+    def __init__(self, body):
+        super().__init__()
+        self.body = json.dumps(body).encode()
+        self.raw = None
+
+    def request(self, method, url, **kwargs):
+        if "/nodes" not in url:
+            return super().request(method, url, **kwargs)
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'application/json'
+        response.url = url
+        response.request = requests.Request(method, url).prepare()
+        self.raw = response.raw = io.BytesIO(self.body)
+        return response
+
+
+@unittest.skipIf(cce_resource.ijson is None, "ijson not installed")
+class TestStreamList(base.BaseFunctionalTest):
+
+    def setUp(self):
+        super().setUp()
+        self.cluster_id = "0aa55501-a3e8-11e9-9e49-0255ac101611"
+        self.user_cloud.add_service(cce_service.CceService("ccev2.0", aliases=["cce2"]))
+        # debug logging of response bodies reads the whole body anyway
+        logger = logging.getLogger('keystoneauth')
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.INFO)
+
+    def test_streamed_nodes(self):
+        service = _StreamedNodes(_nodes_body(500))
+        with mock.patch.object(requests.Session, "request", side_effect=service.request):
+            nodes = self.user_cloud.cce2.cluster_nodes(self.cluster_id)
+            first = next(nodes)
+            self.assertEqual(first.name, "rbe-sdkunit-stream-0")
+            # the body is parsed incrementally, not read completely
+            self.assertLess(service.raw.tell(), len(service.body))
+            rest = list(nodes)
+        self.assertEqual(len(rest), 499)
+        self.assertEqual(rest[-1].id, "65a87e5d-a3e9-11e9-92b3-000000000499")
+        self.assertEqual(rest[-1].spec.root_volume.size, 100)
+        self.assertEqual(rest[-1].status, "Active")
+
+    def test_streamed_null_items(self):
+        service = _StreamedNodes({"kind": "List", "apiVersion": "v3", "items": None})
+        with mock.patch.object(requests.Session, "request", side_effect=service.request):
+            self.assertEqual(list(self.user_cloud.cce2.cluster_nodes(self.cluster_id)), [])
@@ -0,0 +1,128 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import requests
+from unittest import mock
+
+from openstack import exceptions
+
+from opentelekom.dns.dns_service import DnsService
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_VERSIONS = {"versions": {"values": [{"id": "v2", "status": "CURRENT",
+    "links": [{"href": "https://dns.eu-de.otc.t-systems.com/v2/", "rel": "self"}]}]}}
+
+
+def _recordset(zone_id, id, name):
+    return {"id": id, "name": name, "type": "A", "records": ["10.0.0.1"], "ttl": 300,
+        "zone_id": zone_id, "status": "ACTIVE"}
+
+
+class TestCrawl(base.BaseFunctionalTest):
+
+    def setUp(self):
+        super().setUp()
+        self.user_cloud.add_service(DnsService("dns", aliases=['designate']))
+
+    class MockCrawl(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="dns", path="", json=_VERSIONS),
+            OtcMockResponse(method="GET", url_match="dns", path="/v2/zones", max_calls=1,
+                json={"zones": [
+                    {"id": "zone-1", "name": "example.com.", "zone_type": "private"},
+                    {"id": "zone-2", "name": "example.org.", "zone_type": "private"},
+                    {"id": "zone-3", "name": "example.net.", "zone_type": "private"},
+                ]}),
+            # zone-1 has two pages
+            OtcMockResponse(method="GET", url_match="dns", path="/v2/zones/zone-1/recordsets",
+                max_calls=1, json={"recordsets": [
+                    _recordset("zone-1", "rs-1", "a.example.com."),
+                    _recordset("zone-1", "rs-2", "b.example.com."),
+                ], "links": {
+                    "self": "https://dns.eu-de.otc.t-systems.com/v2/zones/zone-1/recordsets?limit=2",
+                    "next": "https://dns.eu-de.otc.t-systems.com/v2/zones/zone-1/recordsets?limit=2&marker=rs-2"}}),
+            OtcMockResponse(method="GET", url_match="dns", path="/v2/zones/zone-1/recordsets",
+                max_calls=1, json={"recordsets": [
+                    _recordset("zone-1", "rs-3", "c.example.com."),
+                ], "links": {
+                    "self": "https://dns.eu-de.otc.t-systems.com/v2/zones/zone-1/recordsets?limit=2&marker=rs-2"}}),
+            OtcMockResponse(method="GET", url_match="dns", path="/v2/zones/zone-2/recordsets",
+                max_calls=1, status_code=403,
+                json={"code": "DNS.0030", "message": "Forbidden"}),
+            OtcMockResponse(method="GET", url_match="dns", path="/v2/zones/zone-3/recordsets",
+                max_calls=1, json={"recordsets": [
+                    _recordset("zone-3", "rs-4", "a.example.net."),
+                ]}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockCrawl().request)
+    def test_crawl(self, mock):
+        results = list(self.user_cloud.dns.crawl_recordsets(type="private",
+            page_size=2, max_parallel=2))
+        by_zone = {}
+        for result in results:
+            by_zone.setdefault(result.zone.id, []).append(result)
+        self.assertEqual([result.recordset.id for result in by_zone["zone-1"]],
+            ["rs-1", "rs-2", "rs-3"])
+        self.assertEqual([result.recordset.id for result in by_zone["zone-3"]], ["rs-4"])
+        self.assertEqual(len(by_zone["zone-2"]), 1)
+        self.assertIsNone(by_zone["zone-2"][0].recordset)
+        self.assertIsInstance(by_zone["zone-2"][0].error, exceptions.SDKException)
+        self.assertTrue(all(result.zone.name for result in results))
+
+    class MockEarlyStop(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="dns", path="", json=_VERSIONS),
+            OtcMockResponse(method="GET", url_match="dns", path="/v2/zones/zone-1/recordsets",
+                json={"recordsets": [
+                    _recordset("zone-1", "rs-%d" % count, "host%d.example.com." % count)
+                    for count in range(50)]}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockEarlyStop().request)
+    def test_early_stop(self, mock):
+        crawl = self.user_cloud.dns.crawl_recordsets(["zone-1"] * 4, queue_size=1)
+        self.assertEqual(next(crawl).recordset.id, "rs-0")
+        # the blocked workers give up
+        crawl.close()
+
+    class MockPages(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="dns", path="", json=_VERSIONS),
+            OtcMockResponse(method="GET", url_match="dns", path="/v2/zones/zone-1/recordsets",
+                max_calls=1, json={"recordsets": [
+                    _recordset("zone-1", "rs-1", "a.example.com."),
+                ], "links": {
+                    "next": "https://dns.eu-de.otc.t-systems.com/v2/zones/zone-1/recordsets?limit=1&marker=rs-1"}}),
+            OtcMockResponse(method="GET", url_match="dns", path="/v2/zones/zone-1/recordsets",
+                max_calls=1, json={"recordsets": [
+                    _recordset("zone-1", "rs-2", "b.example.com."),
+                ], "links": {
+                    "next": "https://dns.eu-de.otc.t-systems.com/v2/zones/zone-1/recordsets?limit=1&marker=rs-2"}}),
+            OtcMockResponse(method="GET", url_match="dns", path="/v2/zones/zone-1/recordsets",
+                max_calls=1, json={"recordsets": [
+                    _recordset("zone-1", "rs-3", "c.example.com."),
+                ], "links": {}}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockPages().request)
+    def test_pages_without_limit(self, mock_request):
+        # the service pages on its own, the next links are followed
+        recordsets = list(self.user_cloud.dns.recordsets("zone-1"))
+        self.assertEqual([recordset.id for recordset in recordsets], ["rs-1", "rs-2", "rs-3"])
+        lists = [call for call in mock_request.call_args_list
+            if call[0][1].endswith("/recordsets")]
+        self.assertEqual(len(lists), 3)
+        self.assertEqual(lists[2][1]["params"]["marker"], "rs-2")
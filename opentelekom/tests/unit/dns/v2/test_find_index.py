@@ -0,0 +1,116 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import requests
+from unittest import mock
+
+from openstack import exceptions
+
+from opentelekom.dns.dns_service import DnsService
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_ZONES = "/v2/zones"
+_RECORDSETS = "/v2/zones/zone-1/recordsets"
+
+
+def _recordset(id, name, type, records, ttl=300):
+    return {"id": id, "name": name, "type": type, "records": records, "ttl": ttl,
+        "zone_id": "zone-1", "status": "ACTIVE"}
+
+
+class TestFindIndex(base.BaseFunctionalTest):
+
+    def setUp(self):
+        super().setUp()
+        self.user_cloud.add_service(DnsService("dns", aliases=['designate']))
+
+    class MockFind(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="dns", path="",
+                json={"versions": {"values": [{"id": "v2", "status": "CURRENT",
+                    "links": [{"href": "https://dns.eu-de.otc.t-systems.com/v2/", "rel": "self"}]}]}}),
+            OtcMockResponse(method="GET", url_match="dns", path=_ZONES, max_calls=1,
+                json={"zones": [
+                    {"id": "zone-1", "name": "example.com.", "zone_type": "private"},
+                    {"id": "zone-2", "name": "example.org.", "zone_type": "private"},
+                ]}),
+            OtcMockResponse(method="GET", url_match="dns", path=_RECORDSETS, max_calls=1,
+                json={"recordsets": [
+                    _recordset("rs-www", "www.example.com.", "A", ["10.0.0.1"]),
+                    _recordset("rs-mail-a", "mail.example.com.", "A", ["10.0.0.2"]),
+                    _recordset("rs-mail-mx", "mail.example.com.", "MX", ["10 mail.example.com."]),
+                ]}),
+            OtcMockResponse(method="POST", url_match="dns", path=_RECORDSETS, max_calls=1,
+                status_code=202, json=_recordset("rs-api", "api.example.com.", "A", ["10.0.0.3"])),
+            OtcMockResponse(method="DELETE", url_match="dns", path=_RECORDSETS + "/rs-www",
+                max_calls=1, status_code=202, json=_recordset("rs-www", "www.example.com.", "A", ["10.0.0.1"])),
+            # a miss after the delete is searched by API
+            OtcMockResponse(method="GET", url_match="dns", path=_RECORDSETS + "/www.example.com.",
+                max_calls=1, status_code=404,
+                json={"code": "DNS.0302", "message": "Record set not found"}),
+            OtcMockResponse(method="GET", url_match="dns", path=_RECORDSETS, max_calls=1,
+                json={"recordsets": []}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockFind().request)
+    def test_find(self, mock):
+        dns = self.user_cloud.dns
+        zone = dns.find_zone("example.com", "private")
+        self.assertEqual(zone.id, "zone-1")
+        self.assertEqual(dns.find_zone("zone-2", "private").name, "example.org.")
+
+        calls = len(mock.call_args_list)
+        for count in range(10):
+            self.assertEqual(dns.find_recordset("www.example.com.", zone).id, "rs-www")
+        self.assertEqual(dns.find_recordset("rs-mail-mx", zone).type, "MX")
+        self.assertEqual(dns.find_recordset("mail.example.com.", zone, type="a").id,
+            "rs-mail-a")
+        self.assertRaises(exceptions.DuplicateResource,
+            dns.find_recordset, "mail.example.com.", zone)
+        # one listing for all lookups
+        self.assertEqual(len(mock.call_args_list), calls + 1)
+        self.assertEqual(dns.recordset_index(zone).listings, 1)
+
+        # own changes update the index
+        dns.create_recordset(zone, name="api.example.com.", type="A", records=["10.0.0.3"])
+        self.assertEqual(dns.find_recordset("api.example.com.", zone).id, "rs-api")
+        dns.delete_recordset(dns.find_recordset("www.example.com.", zone))
+        calls = len(mock.call_args_list)
+        self.assertIsNone(dns.find_recordset("www.example.com.", zone))
+        self.assertEqual(len(mock.call_args_list), calls + 2)
+
+    class MockSameName(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="dns", path="",
+                json={"versions": {"values": [{"id": "v2", "status": "CURRENT",
+                    "links": [{"href": "https://dns.eu-de.otc.t-systems.com/v2/", "rel": "self"}]}]}}),
+            # private zones of the same name for different VPCs
+            OtcMockResponse(method="GET", url_match="dns", path=_ZONES, max_calls=1,
+                json={"zones": [
+                    {"id": "zone-1", "name": "example.com.", "zone_type": "private"},
+                    {"id": "zone-2", "name": "example.com.", "zone_type": "private"},
+                ]}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockSameName().request)
+    def test_find_zone_same_name(self, mock):
+        dns = self.user_cloud.dns
+        self.assertRaises(exceptions.DuplicateResource,
+            dns.find_zone, "example.com.", "private")
+        self.assertEqual(dns.find_zone("zone-2", "private").name, "example.com.")
+        index = dns.zone_index("private")
+        self.assertEqual(len(index), 2)
+        index.remove("zone-1")
+        self.assertEqual(dns.find_zone("example.com", "private").id, "zone-2")
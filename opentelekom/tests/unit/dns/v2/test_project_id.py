@@ -0,0 +1,70 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import copy
+import json
+import requests
+from unittest import mock
+
+from keystoneauth1 import adapter
+
+from opentelekom.dns.dns_service import DnsService
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_RECORDSETS = "/v2/zones/zone-1/recordsets"
+
+
+class TestProjectId(base.BaseFunctionalTest):
+
+    def setUp(self):
+        super().setUp()
+        self.user_cloud.add_service(DnsService("dns", aliases=['designate']))
+
+    class MockRecordsets(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="dns", path="",
+                json={"versions": {"values": [{"id": "v2", "status": "CURRENT",
+                    "links": [{"href": "https://dns.eu-de.otc.t-systems.com/v2/", "rel": "self"}]}]}}),
+            OtcMockResponse(method="POST", url_match="dns", path=_RECORDSETS,
+                status_code=202, json={"id": "rs-1", "name": "www.example.com.", "type": "A",
+                    "records": ["10.0.0.1"], "zone_id": "zone-1", "status": "PENDING_CREATE"}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockRecordsets().request)
+    def test_memoized(self, mock_request):
+        dns = self.user_cloud.dns
+        events = []
+        dns.add_request_hook(events.append)
+        # count the resolutions of the underlying adapter
+        with mock.patch.object(adapter.Adapter, "get_project_id", autospec=True,
+                side_effect=adapter.Adapter.get_project_id) as resolve:
+            for count in range(5):
+                dns.create_recordset("zone-1", name="www.example.com.", type="A",
+                    records=["10.0.0.1"])
+            self.assertEqual(resolve.call_count, 1)
+            stats = dns.project_id_stats()
+            self.assertEqual((stats.misses, stats.hits), (1, 4))
+            self.assertEqual(json.loads(mock_request.call_args[1]["data"])["project_id"],
+                "0391e4486e864c26be5654c522f440f2")
+            self.assertEqual(len(events), 5)
+
+            # a new token resolves the project id again
+            auth = dns.session.auth
+            auth.auth_ref = copy.copy(auth.auth_ref)
+            dns.create_recordset("zone-1", name="www.example.com.", type="A",
+                records=["10.0.0.1"])
+            self.assertEqual(resolve.call_count, 2)
+            self.assertEqual((stats.misses, stats.hits, stats.expirations), (2, 4, 1))
+
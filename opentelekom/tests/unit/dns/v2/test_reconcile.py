@@ -0,0 +1,146 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import json
+import requests
+from unittest import mock
+
+from opentelekom.dns.dns_service import DnsService
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_ZONE = "/v2/zones/zone-1"
+_RECORDSETS = "/v2/zones/zone-1/recordsets"
+
+
+def _zone(serial):
+    return {"id": "zone-1", "name": "example.com.", "ttl": 300, "serial": serial}
+
+
+def _recordset(id, name, type, records, ttl=300):
+    return {"id": id, "name": name, "type": type, "records": records, "ttl": ttl,
+        "zone_id": "zone-1", "status": "ACTIVE"}
+
+
+class TestReconcile(base.BaseFunctionalTest):
+
+    def setUp(self):
+        super().setUp()
+        self.user_cloud.add_service(DnsService("dns", aliases=['designate']))
+
+    class MockReconcile(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="dns", path="",
+                json={"versions": {"values": [{"id": "v2", "status": "CURRENT",
+                    "links": [{"href": "https://dns.eu-de.otc.t-systems.com/v2/", "rel": "self"}]}]}}),
+            # initial state, then after the own change, then after a foreign change
+            OtcMockResponse(method="GET", url_match="dns", path=_ZONE, max_calls=1,
+                json=_zone(1)),
+            OtcMockResponse(method="GET", url_match="dns", path=_ZONE, max_calls=2,
+                json=_zone(2)),
+            OtcMockResponse(method="GET", url_match="dns", path=_ZONE, max_calls=1,
+                json=_zone(3)),
+            OtcMockResponse(method="GET", url_match="dns", path=_RECORDSETS, max_calls=1,
+                json={"recordsets": [
+                    _recordset("rs-soa", "example.com.", "SOA", ["ns.otc. admin.otc. 1 7200 900 1209600 300"]),
+                    _recordset("rs-web", "web.example.com.", "A", ["10.0.0.1"]),
+                ]}),
+            OtcMockResponse(method="GET", url_match="dns", path=_RECORDSETS, max_calls=1,
+                json={"recordsets": [
+                    _recordset("rs-soa", "example.com.", "SOA", ["ns.otc. admin.otc. 1 7200 900 1209600 300"]),
+                    _recordset("rs-web", "web.example.com.", "A", ["10.0.0.1"]),
+                    _recordset("rs-api", "api.example.com.", "A", ["10.0.0.2"]),
+                ]}),
+            # someone deleted web.example.com.
+            OtcMockResponse(method="GET", url_match="dns", path=_RECORDSETS, max_calls=1,
+                json={"recordsets": [
+                    _recordset("rs-api", "api.example.com.", "A", ["10.0.0.2"]),
+                ]}),
+            OtcMockResponse(method="POST", url_match="dns", path=_RECORDSETS, max_calls=1,
+                status_code=202, json=_recordset("rs-api", "api.example.com.", "A", ["10.0.0.2"])),
+            OtcMockResponse(method="POST", url_match="dns", path=_RECORDSETS, max_calls=1,
+                status_code=202, json=_recordset("rs-web2", "web.example.com.", "A", ["10.0.0.1"])),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockReconcile().request)
+    def test_reconcile(self, mock):
+        dns = self.user_cloud.dns
+        desired = [
+            {"name": "web", "type": "A", "records": ["10.0.0.1"]},
+            {"name": "api.example.com.", "type": "a", "records": "10.0.0.2"},
+        ]
+        report = dns.reconcile_recordsets("zone-1", desired)
+        self.assertTrue(report.ok)
+        self.assertEqual([change.key for change in report.created],
+            [("api.example.com.", "A")])
+        self.assertEqual(json.loads(mock.call_args_list[-1][1]["data"])["records"],
+            ["10.0.0.2"])
+        index = dns.recordset_index("zone-1")
+        # the serial after the own change is not taken over
+        self.assertEqual(index.serial, 1)
+        self.assertEqual(index.get("api.example.com.", "A").id, "rs-api")
+
+        # the next call lists the zone once again, no write
+        report = dns.reconcile_recordsets("zone-1", desired)
+        self.assertEqual(len(report), 0)
+        self.assertEqual(index.listings, 2)
+        self.assertEqual(index.serial, 2)
+
+        # steady state: a zone fetch, no listing, no write
+        calls = len(mock.call_args_list)
+        report = dns.reconcile_recordsets("zone-1", desired)
+        self.assertEqual(len(report), 0)
+        self.assertEqual([call[0][0] for call in mock.call_args_list[calls:]], ["GET"])
+        self.assertEqual(index.listings, 2)
+
+        # a foreign change is detected by the serial
+        report = dns.reconcile_recordsets("zone-1", desired)
+        self.assertEqual(index.listings, 3)
+        self.assertEqual([change.key for change in report.created],
+            [("web.example.com.", "A")])
+        self.assertEqual(index.get("web.example.com.", "A").id, "rs-web2")
+        self.assertEqual(index.serial, 3)
+
+    class MockConcurrent(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="dns", path="",
+                json={"versions": {"values": [{"id": "v2", "status": "CURRENT",
+                    "links": [{"href": "https://dns.eu-de.otc.t-systems.com/v2/", "rel": "self"}]}]}}),
+            OtcMockResponse(method="GET", url_match="dns", path=_ZONE, max_calls=1,
+                json=_zone(1)),
+            # one own and one foreign change
+            OtcMockResponse(method="GET", url_match="dns", path=_ZONE, max_calls=1,
+                json=_zone(3)),
+            OtcMockResponse(method="GET", url_match="dns", path=_RECORDSETS, max_calls=1,
+                json={"recordsets": []}),
+            OtcMockResponse(method="GET", url_match="dns", path=_RECORDSETS, max_calls=1,
+                json={"recordsets": [
+                    _recordset("rs-api", "api.example.com.", "A", ["10.0.0.2"]),
+                ]}),
+            OtcMockResponse(method="POST", url_match="dns", path=_RECORDSETS, max_calls=1,
+                status_code=202, json=_recordset("rs-api", "api.example.com.", "A", ["10.0.0.2"])),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockConcurrent().request)
+    def test_concurrent_change(self, mock):
+        dns = self.user_cloud.dns
+        desired = [{"name": "api", "type": "A", "records": ["10.0.0.2"]}]
+        dns.reconcile_recordsets("zone-1", desired, prune=False)
+        index = dns.recordset_index("zone-1")
+        # the serial read before the write is kept
+        self.assertEqual(index.serial, 1)
+        report = dns.reconcile_recordsets("zone-1", desired, prune=False)
+        self.assertEqual(index.listings, 2)
+        self.assertEqual(len(report), 0)
+        self.assertEqual(index.serial, 3)
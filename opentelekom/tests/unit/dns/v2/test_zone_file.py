@@ -0,0 +1,190 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import json
+import requests
+from unittest import mock
+
+from openstack import exceptions
+
+from opentelekom.dns.dns_service import DnsService
+from opentelekom.dns.v2 import zone_file
+from opentelekom.dns.v2 import zone_sync
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_ZONE_FILE = """
+$TTL 1h
+@   IN SOA ns1.example.com. admin.example.com. (
+        2019010101 ; serial
+        7200 3600 1209600 300 )
+    IN NS  ns1.example.com.
+www 300 IN A 192.168.0.1
+        IN A 192.168.0.2
+mail    IN MX 10 mx1
+txt  IN 600 TXT "v=spf1 -all; quoted"
+"""
+
+_ZONES = "/v2/zones/zone-1"
+_RECORDSETS = "/v2/zones/zone-1/recordsets"
+
+
+class TestZoneFile(base.BaseFunctionalTest):
+
+    def test_parse(self):
+        entries = zone_file.parse_zone_file(_ZONE_FILE, origin="example.com")
+        self.assertEqual(list(entries.keys()), [
+            ("example.com.", "SOA"), ("example.com.", "NS"),
+            ("www.example.com.", "A"), ("mail.example.com.", "MX"),
+            ("txt.example.com.", "TXT")])
+        www = entries[("www.example.com.", "A")]
+        self.assertEqual(www.ttl, 300)
+        self.assertEqual(www.records, ["192.168.0.1", "192.168.0.2"])
+        self.assertEqual(entries[("example.com.", "SOA")].records,
+            ["ns1.example.com. admin.example.com. 2019010101 7200 3600 1209600 300"])
+        self.assertEqual(entries[("mail.example.com.", "MX")].records, ["10 mx1.example.com."])
+        self.assertEqual(entries[("mail.example.com.", "MX")].ttl, 3600)
+        self.assertEqual(entries[("txt.example.com.", "TXT")].records,
+            ['"v=spf1 -all; quoted"'])
+        self.assertEqual(entries[("txt.example.com.", "TXT")].ttl, 600)
+
+    def test_export_roundtrip(self):
+        entries = zone_file.parse_zone_file(_ZONE_FILE, origin="example.com.")
+        text = zone_file.export_zone_file(entries.values(), origin="example.com.",
+            default_ttl=3600)
+        self.assertIn("www 300 IN A 192.168.0.1\n", text)
+        self.assertIn("mail IN MX 10 mx1.example.com.\n", text)
+        self.assertEqual(dict(zone_file.parse_zone_file(text)), dict(entries))
+
+    def test_parse_errors(self):
+        self.assertRaises(exceptions.SDKException, zone_file.parse_zone_file,
+            "www IN A 1.2.3.4\n")
+        self.assertRaises(exceptions.SDKException, zone_file.parse_zone_file,
+            "$ORIGIN example.com.\nwww IN A (\n1.2.3.4\n")
+        self.assertRaises(exceptions.SDKException, zone_file.parse_zone_file,
+            "$INCLUDE other.zone\n")
+
+
+def _recordset(id, name, type, records, ttl=300):
+    return {"id": id, "name": name, "type": type, "records": records, "ttl": ttl,
+        "zone_id": "zone-1", "zone_name": "example.com.", "status": "ACTIVE"}
+
+
+class TestZoneSync(base.BaseFunctionalTest):
+
+    def setUp(self):
+        super().setUp()
+        self.user_cloud.add_service(DnsService("dns", aliases=['designate']))
+
+    class MockZone(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="dns", path="",
+                json={"versions": {"values": [{"id": "v2", "status": "CURRENT",
+                    "links": [{"href": "https://dns.eu-de.otc.t-systems.com/v2/", "rel": "self"}]}]}}),
+            OtcMockResponse(method="GET", url_match="dns", path=_ZONES, max_calls=1,
+                json={"id": "zone-1", "name": "example.com.", "ttl": 3600}),
+            OtcMockResponse(method="GET", url_match="dns", path=_RECORDSETS, max_calls=1,
+                json={"recordsets": [
+                    _recordset("rs-soa", "example.com.", "SOA", ["ns.otc. admin.otc. 1 7200 900 1209600 300"]),
+                    _recordset("rs-ns", "example.com.", "NS", ["ns1.otc."]),
+                    _recordset("rs-www", "www.example.com.", "A", ["192.168.0.2", "192.168.0.1"]),
+                ], "links": {"next": "https://dns.eu-de.otc.t-systems.com/v2/zones/zone-1/recordsets?marker=rs-www"}}),
+            # the recordsets of the second page are compared as well
+            OtcMockResponse(method="GET", url_match="dns", path=_RECORDSETS, max_calls=1,
+                json={"recordsets": [
+                    _recordset("rs-mail", "mail.example.com.", "MX", ["10 mx2.example.com."], ttl=3600),
+                    _recordset("rs-old", "old.example.com.", "CNAME", ["www.example.com."]),
+                    _recordset("rs-txt", "txt.example.com.", "TXT", ['"v=spf1 -all; quoted"'], ttl=600),
+                ], "links": {"self": "https://dns.eu-de.otc.t-systems.com/v2/zones/zone-1/recordsets"}}),
+            OtcMockResponse(method="PUT", url_match="dns", path=_RECORDSETS + "/rs-mail",
+                max_calls=1, status_code=202,
+                json=_recordset("rs-mail", "mail.example.com.", "MX", ["10 mx1.example.com."], ttl=3600)),
+            OtcMockResponse(method="DELETE", url_match="dns", path=_RECORDSETS + "/rs-old",
+                max_calls=1, status_code=202,
+                json=_recordset("rs-old", "old.example.com.", "CNAME", ["www.example.com."])),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockZone().request)
+    def test_sync(self, mock):
+        report = self.user_cloud.dns.sync_zone_file("zone-1", _ZONE_FILE)
+        self.assertTrue(report.ok)
+        # SOA, apex NS and the unchanged recordsets cause no requests
+        self.assertEqual([change.key for change in report.updated],
+            [("mail.example.com.", "MX")])
+        self.assertEqual([change.key for change in report.deleted],
+            [("old.example.com.", "CNAME")])
+        self.assertEqual(report.created, [])
+        self.assertEqual(report.updated[0].result.records, ["10 mx1.example.com."])
+        put = [call for call in mock.call_args_list if call[0][0] == "PUT"][0]
+        self.assertEqual(json.loads(put[1]["data"])["records"], ["10 mx1.example.com."])
+
+    class MockFailure(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="dns", path="",
+                json={"versions": {"values": [{"id": "v2", "status": "CURRENT",
+                    "links": [{"href": "https://dns.eu-de.otc.t-systems.com/v2/", "rel": "self"}]}]}}),
+            OtcMockResponse(method="GET", url_match="dns", path=_RECORDSETS, max_calls=2,
+                json={"recordsets": [
+                    _recordset("rs-www", "www.example.com.", "A", ["192.168.0.1"]),
+                ]}),
+            OtcMockResponse(method="POST", url_match="dns", path=_RECORDSETS,
+                max_calls=1, status_code=400,
+                json={"code": "DNS.0308", "message": "Quota exceeded"}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockFailure().request)
+    def test_dry_run_and_failure(self, mock):
+        zone = {"id": "zone-1", "name": "example.com.", "ttl": 300}
+        plan = self.user_cloud.dns.sync_zone_file(zone,
+            "new IN A 10.0.0.1\n", prune=False, dry_run=True)
+        self.assertEqual([change.key for change in plan.created],
+            [("new.example.com.", "A")])
+        self.assertIsNone(plan.created[0].outcome)
+
+        report = self.user_cloud.dns.sync_zone_file(zone, "new IN A 10.0.0.1\n", prune=False)
+        self.assertFalse(report.ok)
+        self.assertIn(("new.example.com.", "A"), report.errors)
+        self.assertIsInstance(report.created[0].error, exceptions.SDKException)
+
+    def test_normalized(self):
+        # whitespace counts only inside quoted strings
+        self.assertEqual(zone_sync._normalized("TXT", ['"a  b"   "c"']),
+            zone_sync._normalized("TXT", ['"a  b" "c"']))
+        self.assertNotEqual(zone_sync._normalized("TXT", ['"a  b"']),
+            zone_sync._normalized("TXT", ['"a b"']))
+        self.assertEqual(zone_sync._normalized("MX", ["10  MX1.example.com."]),
+            ["10 mx1.example.com."])
+
+    class MockExport(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET", url_match="dns", path="",
+                json={"versions": {"values": [{"id": "v2", "status": "CURRENT",
+                    "links": [{"href": "https://dns.eu-de.otc.t-systems.com/v2/", "rel": "self"}]}]}}),
+            OtcMockResponse(method="GET", url_match="dns", path=_ZONES, max_calls=1,
+                json={"id": "zone-1", "name": "example.com.", "ttl": 3600}),
+            OtcMockResponse(method="GET", url_match="dns", path=_RECORDSETS, max_calls=1,
+                json={"recordsets": [
+                    _recordset("rs-www", "www.example.com.", "A", ["192.168.0.1"]),
+                ], "links": {"next": "https://dns.eu-de.otc.t-systems.com/v2/zones/zone-1/recordsets?marker=rs-www"}}),
+            OtcMockResponse(method="GET", url_match="dns", path=_RECORDSETS, max_calls=1,
+                json={"recordsets": [
+                    _recordset("rs-mail", "mail.example.com.", "MX", ["10 mx1.example.com."], ttl=3600),
+                ], "links": {}}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockExport().request)
+    def test_export_pages(self, mock):
+        text = self.user_cloud.dns.export_zone_file("zone-1")
+        self.assertIn("www 300 IN A 192.168.0.1", text)
+        self.assertIn("mail IN MX 10 mx1.example.com.", text)
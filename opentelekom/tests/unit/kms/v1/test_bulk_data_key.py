@@ -0,0 +1,84 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import hashlib
+import json
+import requests
+from unittest import mock
+
+from openstack import exceptions
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_KEY_ID = "0d0466b0-e727-4d9c-b35d-f84bb474a37f"
+_PLAIN = "00112233445566778899aabbccddeeff00112233445566778899aabbccddeeff"
+_DECRYPT_PATH = "/v1.0/0391e4486e864c26be5654c522f440f2/kms/decrypt-datakey"
+_ENCRYPT_PATH = "/v1.0/0391e4486e864c26be5654c522f440f2/kms/encrypt-datakey"
+
+
+class TestBulkDataKey(base.BaseFunctionalTest):
+
+    class MockDecrypt(OtcMockService):
+        responses = [
+            OtcMockResponse(method="POST", url_match="kms", path=_DECRYPT_PATH,
+                        status_code=200, max_calls=1,
+                        json={"data_key": _PLAIN, "datakey_length": "32"}),
+            OtcMockResponse(method="POST", url_match="kms", path=_DECRYPT_PATH,
+                        status_code=400, max_calls=1,
+                        json={"error": {"error_code": "KMS.0207",
+                            "error_msg": "Invalid cipher_text"}}),
+            OtcMockResponse(method="POST", url_match="kms", path=_DECRYPT_PATH,
+                        status_code=200, max_calls=1,
+                        json={"data_key": _PLAIN[::-1], "datakey_length": "32"}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockDecrypt().request)
+    def test_decrypt_datakeys(self, mock):
+        results = self.user_cloud.kmsv1.decrypt_datakeys(_KEY_ID,
+            ["aa01", "bb02", "AA01", "cc03", "aa01"], max_parallel=1)
+        # duplicates are decrypted once, results keep the input order
+        self.assertEqual(len(results), 5)
+        self.assertEqual([result.item for result in results],
+            ["aa01", "bb02", "aa01", "cc03", "aa01"])
+        self.assertIs(results[0], results[2])
+        self.assertIs(results[0], results[4])
+        self.assertEqual(results[0].data_key.plaintext, bytearray.fromhex(_PLAIN))
+        self.assertFalse(results[1].ok)
+        self.assertIsInstance(results[1].error, exceptions.SDKException)
+        self.assertEqual(results[3].data_key.plaintext, bytearray.fromhex(_PLAIN[::-1]))
+        cipher_texts = [json.loads(call[1]["data"])["cipher_text"]
+            for call in mock.call_args_list if call[0][1].endswith("decrypt-datakey")]
+        self.assertEqual(cipher_texts, ["aa01", "bb02", "cc03"])
+
+    class MockEncrypt(OtcMockService):
+        responses = [
+            OtcMockResponse(method="POST", url_match="kms", path=_ENCRYPT_PATH,
+                        status_code=200, max_calls=2,
+                        json={"key_id": _KEY_ID, "cipher_text": "020098", "datakey_length": "32"}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockEncrypt().request)
+    def test_encrypt_datakeys(self, mock):
+        plain = bytes.fromhex(_PLAIN)
+        results = self.user_cloud.kmsv1.encrypt_datakeys(_KEY_ID,
+            [plain, bytearray(plain), plain[::-1]], max_parallel=4)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual([result.data_key.cipher_text for result in results],
+            ["020098"] * 3)
+        bodies = [json.loads(call[1]["data"]) for call in mock.call_args_list
+            if call[0][1].endswith("encrypt-datakey")]
+        self.assertEqual(len(bodies), 2)
+        self.assertIn(_PLAIN + hashlib.sha256(plain).hexdigest(),
+            [body["plain_text"] for body in bodies])
+        self.assertEqual(bodies[0]["datakey_plain_length"], "32")
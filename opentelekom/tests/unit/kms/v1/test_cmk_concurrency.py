@@ -0,0 +1,83 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import concurrent.futures
+import json
+import requests
+from unittest import mock
+
+from opentelekom.kms.v1 import cmk as _cmk
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_KEY_ID = "0d0466b0-e727-4d9c-b35d-f84bb474a37f"
+_KMS_PATH = "/v1.0/0391e4486e864c26be5654c522f440f2/kms/"
+
+
+class TestCmkConcurrency(base.BaseFunctionalTest):
+
+    class MockKms(OtcMockService):
+        responses = [
+            OtcMockResponse(method="POST", url_match="kms", path=_KMS_PATH + "describe-key",
+                        status_code=200,
+                        json={"key_info": {"key_id": _KEY_ID, "key_alias": "rbe-sdkunit-key",
+                            "key_state": "2"}}),
+            OtcMockResponse(method="POST", url_match="kms", path=_KMS_PATH + "schedule-key-deletion",
+                        status_code=200, json={"key_id": _KEY_ID, "key_state": "4"}),
+            OtcMockResponse(method="POST", url_match="kms", path=_KMS_PATH + "cancel-key-deletion",
+                        status_code=200, json={"key_id": _KEY_ID, "key_state": "3"}),
+            OtcMockResponse(method="POST", url_match="kms", path=_KMS_PATH + "enable-key",
+                        status_code=200, json={"key_info": {"key_id": _KEY_ID, "key_state": "2"}}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockKms().request)
+    def test_concurrent_actions(self, mock):
+        kms = self.user_cloud.kmsv1
+        shared = _cmk.CustomerMasterKey.existing(key_id=_KEY_ID)
+        params = {"sequence": "919c82d4-8046-4722-9094-35c3c6524cff"}
+        operations = [
+            lambda: kms.schedule_delete_key(shared, pending_days=7),
+            lambda: kms.cancel_delete_key(shared),
+            lambda: kms.enable_key(shared),
+            lambda: shared.fetch(kms, **params),
+            lambda: kms.get_key(_KEY_ID),
+            lambda: kms.schedule_delete_key(_KEY_ID, pending_days=8),
+        ]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+            futures = [executor.submit(operations[count % len(operations)])
+                for count in range(300)]
+            for future in futures:
+                future.result()
+
+        # no per-instance override of the class wide resource_key remains
+        self.assertNotIn("resource_key", vars(shared))
+        self.assertEqual(shared.resource_key, "key_info")
+        self.assertEqual(params, {"sequence": "919c82d4-8046-4722-9094-35c3c6524cff"})
+
+        bodies = {}
+        for call in mock.call_args_list:
+            url = call[0][1]
+            if _KMS_PATH in url:
+                bodies.setdefault(url.rsplit("/", 1)[1], []).append(json.loads(call[1]["data"]))
+        self.assertEqual(len(bodies["schedule-key-deletion"]), 100)
+        for body in bodies["schedule-key-deletion"]:
+            self.assertEqual(body["key_id"], _KEY_ID)
+            self.assertIn(body["pending_days"], (7, 8))
+        for body in bodies["describe-key"]:
+            self.assertEqual(body["key_id"], _KEY_ID)
+            self.assertLessEqual(set(body), {"key_id", "sequence"})
+
+        # wrapped responses are still unwrapped after the concurrent run
+        kms.enable_key(shared)
+        self.assertEqual(shared.key_state, 2)
@@ -0,0 +1,99 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import json
+import requests
+from unittest import mock
+
+from openstack import exceptions
+
+from opentelekom.kms.v1 import materials as _materials
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_KEY_ID = "0d0466b0-e727-4d9c-b35d-f84bb474a37f"
+_PLAIN = "00112233445566778899aabbccddeeff00112233445566778899aabbccddeeff"
+_CIPHER = "020098009eee5a68b33bdcf0d6e5f2e8e3ba0c0ae7e1dc5bd6d4a4a1b3a7" \
+          "c6b5a1f0e6c0f5a4e3d9d34663336663423563433366643433663363"
+
+
+class TestDataKey(base.BaseFunctionalTest):
+
+    class MockCreate(OtcMockService):
+        responses = [
+            OtcMockResponse(method="POST", url_match="kms",
+                        path="/v1.0/0391e4486e864c26be5654c522f440f2/kms/create-datakey",
+                        status_code=200, max_calls=2,
+                        json={"key_id": _KEY_ID, "plain_text": _PLAIN, "cipher_text": _CIPHER}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockCreate().request)
+    def test_encryption_cache(self, mock):
+        manager = self.user_cloud.kmsv1.materials_manager(_KEY_ID, max_messages=3)
+        for count in range(3):
+            with manager.encryption_materials(100) as material:
+                self.assertEqual(material.plaintext, bytearray.fromhex(_PLAIN))
+                self.assertEqual(material.cipher_text, _CIPHER)
+        self.assertEqual(manager.kms_calls, 1)
+        self.assertEqual(manager.hits, 2)
+        create_body = [json.loads(call[1]["data"]) for call in mock.call_args_list
+            if call[0][1].endswith("create-datakey")][0]
+        self.assertEqual(create_body, {"key_id": _KEY_ID, "datakey_length": "256"})
+
+        # the message limit forces a new data key, the old one is zeroized
+        old = material
+        with manager.encryption_materials(100) as material:
+            self.assertIsNot(material, old)
+        self.assertEqual(old.plaintext, bytearray(32))
+        self.assertEqual(manager.kms_calls, 2)
+
+        # decryption of an own data key is served from the cache
+        with manager.decryption_materials(_CIPHER) as material:
+            self.assertEqual(material.plaintext, bytearray.fromhex(_PLAIN))
+        self.assertEqual(manager.kms_calls, 2)
+
+        manager.clear()
+        self.assertEqual(material.plaintext, bytearray(32))
+        self.assertEqual(len(manager), 0)
+
+    class MockDecrypt(OtcMockService):
+        responses = [
+            OtcMockResponse(method="POST", url_match="kms",
+                        path="/v1.0/0391e4486e864c26be5654c522f440f2/kms/decrypt-datakey",
+                        status_code=200, max_calls=2,
+                        json={"data_key": _PLAIN, "datakey_length": "32"}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockDecrypt().request)
+    def test_decryption_lru(self, mock):
+        manager = self.user_cloud.kmsv1.materials_manager(_KEY_ID, capacity=1)
+        first = manager.decryption_materials(_CIPHER)
+        self.assertEqual(first.plaintext, bytearray.fromhex(_PLAIN))
+        manager.decryption_materials(_CIPHER).release()
+        self.assertEqual(manager.kms_calls, 1)
+        decrypt_body = json.loads(mock.call_args_list[-1][1]["data"])
+        self.assertEqual(decrypt_body, {"key_id": _KEY_ID, "cipher_text": _CIPHER,
+            "datakey_cipher_length": "32"})
+
+        # evicted by a different context, but still in use: zeroized on release
+        with manager.decryption_materials(_CIPHER, encryption_context={"bucket": "b"}):
+            pass
+        self.assertEqual(manager.kms_calls, 2)
+        self.assertEqual(first.plaintext, bytearray.fromhex(_PLAIN))
+        first.release()
+        self.assertEqual(first.plaintext, bytearray(32))
+
+    def test_limits(self):
+        self.assertRaises(exceptions.InvalidRequest, _materials.CachingMaterialsManager,
+            None, _KEY_ID, max_age=0)
@@ -0,0 +1,126 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import io
+import os
+import requests
+import tempfile
+from unittest import mock
+
+from openstack import exceptions
+
+from opentelekom.kms.v1 import envelope
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_KEY_ID = "0d0466b0-e727-4d9c-b35d-f84bb474a37f"
+_PLAIN = "00112233445566778899aabbccddeeff00112233445566778899aabbccddeeff"
+_CIPHER = "020098009eee5a68b33bdcf0d6e5f2e8e3ba0c0ae7e1dc5bd6d4a4a1b3a7"
+
+
+class TestEnvelope(base.BaseFunctionalTest):
+
+    class MockKms(OtcMockService):
+        responses = [
+            OtcMockResponse(method="POST", url_match="kms",
+                        path="/v1.0/0391e4486e864c26be5654c522f440f2/kms/create-datakey",
+                        status_code=200,
+                        json={"key_id": _KEY_ID, "plain_text": _PLAIN, "cipher_text": _CIPHER}),
+            OtcMockResponse(method="POST", url_match="kms",
+                        path="/v1.0/0391e4486e864c26be5654c522f440f2/kms/decrypt-datakey",
+                        status_code=200,
+                        json={"data_key": _PLAIN, "datakey_length": "32"}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockKms().request)
+    def test_stream_roundtrip(self, mock):
+        data = os.urandom(5 * 4096 + 17)
+        encrypted = io.BytesIO()
+        count = self.user_cloud.kmsv1.encrypt_stream(_KEY_ID, io.BytesIO(data), encrypted,
+            encryption_context={"backup": "db01"}, chunk_size=4096, max_workers=4)
+        self.assertEqual(count, len(data))
+        self.assertNotIn(data[:64], encrypted.getvalue())
+
+        plain = io.BytesIO()
+        self.user_cloud.kmsv1.decrypt_stream(io.BytesIO(encrypted.getvalue()), plain,
+            max_workers=3)
+        self.assertEqual(plain.getvalue(), data)
+
+        # a modified byte fails authentication
+        tampered = bytearray(encrypted.getvalue())
+        tampered[-100] ^= 1
+        self.assertRaises(exceptions.SDKException, self.user_cloud.kmsv1.decrypt_stream,
+            io.BytesIO(bytes(tampered)), io.BytesIO())
+        # a missing final chunk is detected
+        truncated = encrypted.getvalue()[:-(4096 + 5 + 16 + 17 + 16 + 5)]
+        self.assertRaises(exceptions.SDKException, self.user_cloud.kmsv1.decrypt_stream,
+            io.BytesIO(truncated), io.BytesIO())
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockKms().request)
+    def test_file_roundtrip(self, mock):
+        materials = self.user_cloud.kmsv1.materials_manager(_KEY_ID)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for size in (0, 1000, 3 * 1024):
+                path = os.path.join(tmpdir, "plain")
+                data = os.urandom(size)
+                with open(path, 'wb') as plainfile:
+                    plainfile.write(data)
+                self.user_cloud.kmsv1.encrypt_file(_KEY_ID, path, path + ".enc",
+                    chunk_size=1024, max_workers=2, materials=materials)
+                self.user_cloud.kmsv1.decrypt_file(path + ".enc", path + ".dec",
+                    materials=materials)
+                with open(path + ".dec", 'rb') as plainfile:
+                    self.assertEqual(plainfile.read(), data)
+            # one data key for all files, decrypted from the cache
+            self.assertEqual(materials.kms_calls, 1)
+
+            # no partial output of a failed decryption
+            with open(path + ".enc", 'r+b') as encfile:
+                encfile.seek(-1, os.SEEK_END)
+                last = encfile.read(1)
+                encfile.seek(-1, os.SEEK_END)
+                encfile.write(bytes([last[0] ^ 1]))
+            self.assertRaises(exceptions.SDKException, self.user_cloud.kmsv1.decrypt_file,
+                path + ".enc", path + ".bad")
+            self.assertFalse(os.path.exists(path + ".bad"))
+            self.assertEqual(sorted(os.listdir(tmpdir)), ["plain", "plain.dec", "plain.enc"])
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockKms().request)
+    def test_stream_byte_limit(self, mock):
+        materials = self.user_cloud.kmsv1.materials_manager(_KEY_ID, max_bytes=6000)
+        for count in range(3):
+            self.user_cloud.kmsv1.encrypt_stream(_KEY_ID, io.BytesIO(os.urandom(4000)),
+                io.BytesIO(), chunk_size=1024, materials=materials)
+        # the stream lengths count against the byte limit of the data key
+        self.assertEqual(materials.kms_calls, 2)
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockKms().request)
+    def test_message_keys(self, mock):
+        materials = self.user_cloud.kmsv1.materials_manager(_KEY_ID)
+        headers = []
+        for count in range(2):
+            encrypted = io.BytesIO()
+            self.user_cloud.kmsv1.encrypt_stream(_KEY_ID, io.BytesIO(b"same data"),
+                encrypted, materials=materials)
+            encrypted.seek(0)
+            headers.append(envelope.EnvelopeHeader.read(encrypted)[0])
+        # one cached data key, but neither key nor nonce are shared
+        self.assertEqual(materials.kms_calls, 1)
+        self.assertEqual(headers[0].cipher_text, headers[1].cipher_text)
+        plain_key = bytes.fromhex(_PLAIN)
+        first_key, first_nonce = headers[0].message_key(plain_key)
+        second_key, second_nonce = headers[1].message_key(plain_key)
+        self.assertNotEqual(first_key, second_key)
+        self.assertNotEqual(first_nonce, second_nonce)
+        self.assertNotEqual(first_key, plain_key)
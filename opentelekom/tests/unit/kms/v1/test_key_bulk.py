@@ -0,0 +1,83 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import json
+import requests
+from unittest import mock
+
+from opentelekom.kms.v1 import cmk as _cmk
+from opentelekom.kms.v1 import key_bulk as _key_bulk
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_KMS_PATH = "/v1.0/0391e4486e864c26be5654c522f440f2/kms/"
+_KEY1 = "0d0466b0-e727-4d9c-b35d-f84bb474a371"
+_KEY2 = "0d0466b0-e727-4d9c-b35d-f84bb474a372"
+_KEY3 = "0d0466b0-e727-4d9c-b35d-f84bb474a373"
+_KEY4 = "0d0466b0-e727-4d9c-b35d-f84bb474a374"
+_KEY5 = "0d0466b0-e727-4d9c-b35d-f84bb474a375"
+
+
+class TestKeyBulk(base.BaseFunctionalTest):
+
+    class MockKms(OtcMockService):
+        responses = [
+            OtcMockResponse(method="POST", url_match="kms", path=_KMS_PATH + "list-keys",
+                        status_code=200, max_calls=1,
+                        json={"key_details": [
+                            {"key_id": _KEY2, "key_alias": "rbe-sdkunit-key2", "key_state": "3"},
+                            {"key_id": _KEY3, "key_alias": "rbe-sdkunit-key3", "key_state": "2"},
+                            {"key_id": _KEY4, "key_alias": "rbe-sdkunit-key4", "key_state": "4"},
+                        ], "truncated": "false"}),
+            OtcMockResponse(method="POST", url_match="kms", path=_KMS_PATH + "enable-key",
+                        status_code=429, max_calls=1,
+                        json={"error_code": "APIGW.0308", "error_msg": "The request is throttled"}),
+            OtcMockResponse(method="POST", url_match="kms", path=_KMS_PATH + "enable-key",
+                        status_code=200, max_calls=2,
+                        json={"key_info": {"key_id": _KEY2, "key_state": "2"}}),
+            OtcMockResponse(method="POST", url_match="kms", path=_KMS_PATH + "enable-key",
+                        status_code=400, max_calls=1,
+                        json={"error": {"error_code": "KMS.0205",
+                            "error_msg": "The key is scheduled for deletion"}}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockKms().request)
+    def test_enable_keys(self, mock):
+        enabled = _cmk.CustomerMasterKey.existing(key_id=_KEY1, key_state="2")
+        report = self.user_cloud.kmsv1.enable_keys(
+            [enabled, _KEY2, _KEY3, _KEY2, _KEY5, _KEY4], max_parallel=1, backoff=0.01)
+
+        self.assertEqual(list(report.outcomes.keys()), [_KEY1, _KEY2, _KEY3, _KEY5, _KEY4])
+        self.assertEqual(report.skipped, [_KEY1, _KEY3])
+        self.assertEqual(report.changed, [_KEY2, _KEY5])
+        self.assertEqual(list(report.errors.keys()), [_KEY4])
+        self.assertEqual(report.outcomes[_KEY4].outcome, _key_bulk.FAILED)
+        self.assertEqual(report.outcomes[_KEY2].key.key_state, 2)
+        self.assertEqual(report.throttled, 1)
+        self.assertFalse(report.ok)
+
+        enabled_ids = [json.loads(call[1]["data"])["key_id"] for call in mock.call_args_list
+            if call[0][1].endswith("enable-key")]
+        self.assertEqual(enabled_ids, [_KEY2, _KEY2, _KEY5, _KEY4])
+
+    class MockNoKms(OtcMockService):
+        responses = []
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockNoKms().request)
+    def test_cancel_skips_active_keys(self, mock):
+        keys = [_cmk.CustomerMasterKey.existing(key_id=_KEY1, key_state="2"),
+            _cmk.CustomerMasterKey.existing(key_id=_KEY2, key_state="3")]
+        report = self.user_cloud.kmsv1.cancel_delete_keys(keys)
+        self.assertEqual(report.skipped, [_KEY1, _KEY2])
+        self.assertTrue(report.ok)
@@ -0,0 +1,88 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import concurrent.futures
+import json
+import requests
+from unittest import mock
+
+from openstack import exceptions
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+_RANDOM_PATH = "/v1.0/0391e4486e864c26be5654c522f440f2/kms/gen-random"
+# 1024 bytes, the maximum of one KMS request
+_RANDOM = bytes(range(256)) * 4
+
+
+class TestRandomPool(base.BaseFunctionalTest):
+
+    class MockRandom(OtcMockService):
+        responses = [
+            OtcMockResponse(method="POST", url_match="kms", path=_RANDOM_PATH,
+                        status_code=200, json={"random_data": _RANDOM.hex()}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockRandom().request)
+    def test_gen_random(self, mock):
+        self.assertEqual(self.user_cloud.kmsv1.gen_random(1024), _RANDOM)
+        self.assertEqual(json.loads(mock.call_args[1]["data"]),
+            {"random_data_length": "8192"})
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockRandom().request)
+    def test_pool(self, mock):
+        with self.user_cloud.kmsv1.random_pool(block_size=2048, low_watermark=512,
+                max_blocks=2) as pool:
+            first = pool.take(16)
+            self.assertIsInstance(first, memoryview)
+            self.assertTrue(first.readonly)
+            self.assertEqual(bytes(first), _RANDOM[:16])
+            second = pool.take(16)
+            self.assertEqual(bytes(second), _RANDOM[16:32])
+            # a slice of the same block, no copy
+            self.assertIs(first.obj, second.obj)
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+                taken = list(executor.map(lambda count: len(pool.take(100)), range(200)))
+            self.assertEqual(taken, [100] * 200)
+            self.assertGreaterEqual(pool.refills, 10)
+            # larger than a block
+            self.assertEqual(len(pool.take(5000)), 5000)
+        self.assertRaises(exceptions.SDKException, pool.take, 1)
+
+    class MockRandomFailure(OtcMockService):
+        responses = [
+            OtcMockResponse(method="POST", url_match="kms", path=_RANDOM_PATH,
+                        status_code=400, max_calls=1,
+                        json={"error": {"error_code": "KMS.0201", "error_msg": "Failure"}}),
+            OtcMockResponse(method="POST", url_match="kms", path=_RANDOM_PATH,
+                        status_code=200, json={"random_data": _RANDOM.hex()}),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockRandomFailure().request)
+    def test_refill_failure(self, mock):
+        with self.user_cloud.kmsv1.random_pool(block_size=1024, timeout=5) as pool:
+            self.assertRaises(exceptions.SDKException, pool.take, 8)
+            # the next request triggers a new refill
+            self.assertEqual(bytes(pool.take(8)), _RANDOM[:8])
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockRandom().request)
+    def test_refill_other_error(self, mock_request):
+        kms = self.user_cloud.kmsv1
+        with mock.patch.object(type(kms), "gen_random",
+                side_effect=[RuntimeError("connection lost"), _RANDOM]):
+            with kms.random_pool(block_size=1024, timeout=5) as pool:
+                self.assertRaises(exceptions.SDKException, pool.take, 8)
+                # the refill thread survived
+                self.assertEqual(bytes(pool.take(8)), _RANDOM[:8])
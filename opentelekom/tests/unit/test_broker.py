@@ -0,0 +1,93 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import os
+import requests
+import tempfile
+import threading
+from unittest import mock
+
+from opentelekom import otc_broker
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService
+
+from opentelekom.tests.functional import base
+
+
+class TestBroker(base.BaseFunctionalTest):
+
+    class MockKeystone(OtcMockService):
+        responses = []
+
+    def test_no_broker(self):
+        self.assertIsNone(otc_broker.get_auth_state({'cloud': 'paas'},
+            socket_path="/nonexisting/otc-broker.sock"))
+
+    @mock.patch.dict(os.environ, {}, clear=True)
+    def test_opt_in(self):
+        # without explicit socket, no broker is asked
+        self.assertIsNone(otc_broker.default_socket_path())
+        self.assertIsNone(otc_broker.get_auth_state({'cloud': 'paas'}))
+
+    def test_foreign_socket(self):
+        with tempfile.TemporaryDirectory() as sockdir:
+            path = os.path.join(sockdir, "broker.sock")
+            broker = otc_broker.ConnectionBroker(path,
+                connect=lambda config: self.fail("config sent to the broker"))
+            broker.start()
+            thread = threading.Thread(target=broker.serve_forever)
+            thread.start()
+            try:
+                os.chmod(sockdir, 0o777)
+                self.assertIsNone(otc_broker.get_auth_state({'cloud': 'paas'},
+                    socket_path=path))
+                os.chmod(sockdir, 0o700)
+                os.chmod(path, 0o622)
+                self.assertIsNone(otc_broker.get_auth_state({'cloud': 'paas'},
+                    socket_path=path))
+            finally:
+                broker.shutdown()
+                thread.join()
+
+    def test_expire_in_use(self):
+        broker = otc_broker.ConnectionBroker("/nonexisting/broker.sock", idle_timeout=0)
+        key = otc_broker.config_key({'cloud': 'paas'})
+        broker._connections[key] = (object(), 0.0)
+        with broker._connection_lock(key):
+            # a connection in use stays
+            broker._expire_idle()
+            self.assertIn(key, broker._connections)
+        broker._expire_idle()
+        self.assertNotIn(key, broker._connections)
+        self.assertNotIn(key, broker._locks)
+
+    def test_auth_state_shared(self):
+        service = self.MockKeystone()
+        with mock.patch.object(requests.Session, "request",
+                side_effect=service.request) as request_mock, \
+                tempfile.TemporaryDirectory() as sockdir:
+            path = os.path.join(sockdir, "broker.sock")
+            broker = otc_broker.ConnectionBroker(path).start()
+            thread = threading.Thread(target=broker.serve_forever)
+            thread.start()
+            try:
+                self.assertEqual(oct(os.stat(path).st_mode & 0o777), oct(0o600))
+                conn1 = otc_broker.connect({'cloud': 'paas'}, socket_path=path)
+                logins = request_mock.call_count
+                conn2 = otc_broker.connect({'cloud': 'paas'}, socket_path=path)
+                # the second client reuses the token held by the broker
+                self.assertEqual(request_mock.call_count, logins)
+                self.assertEqual(conn2.authorize(), conn1.authorize())
+                self.assertEqual(request_mock.call_count, logins)
+            finally:
+                broker.shutdown()
+                thread.join()
+        self.assertFalse(os.path.exists(path))
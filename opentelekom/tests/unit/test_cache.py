@@ -0,0 +1,97 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import requests
+import tempfile
+import time
+from unittest import mock
+
+from opentelekom import otc_cache
+from opentelekom.rds.rds_service import Rds3Service
+from opentelekom.rds.v3 import flavor as _flavor
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+class TestCache(base.BaseFunctionalTest):
+
+    def setUp(self):
+        super().setUp()
+        self.user_cloud.add_service(Rds3Service("rdsv3"))
+
+    def test_lru_eviction(self):
+        cache = otc_cache.MemoryCache(maxsize=2)
+        cache.set("ns", "a", 1)
+        cache.set("ns", "b", 2)
+        cache.get("ns", "a")
+        cache.set("ns", "c", 3)
+        self.assertEqual(cache.get("ns", "b"), (False, None))
+        self.assertEqual(cache.get("ns", "a"), (True, 1))
+        self.assertEqual(cache.stats.evictions, 1)
+
+    def test_ttl_expiry(self):
+        cache = otc_cache.MemoryCache()
+        cache.set("ns", "a", 1, ttl=0.01)
+        time.sleep(0.02)
+        self.assertEqual(cache.get("ns", "a"), (False, None))
+        self.assertEqual(cache.stats.expirations, 1)
+        self.assertEqual(cache.stats.misses, 1)
+
+    def test_disk_backing(self):
+        with tempfile.TemporaryDirectory() as cachedir:
+            first = otc_cache.MemoryCache(backing=otc_cache.DiskCache(cachedir))
+            first.set("ns", ["key", 1], [{"name": "x"}])
+            second = otc_cache.MemoryCache(backing=otc_cache.DiskCache(cachedir))
+            self.assertEqual(second.get("ns", ["key", 1]), (True, [{"name": "x"}]))
+            second.invalidate("ns")
+            third = otc_cache.MemoryCache(backing=otc_cache.DiskCache(cachedir))
+            self.assertEqual(third.get("ns", ["key", 1]), (False, None))
+
+    def test_disk_backing_keeps_expiry(self):
+        with tempfile.TemporaryDirectory() as cachedir:
+            first = otc_cache.MemoryCache(backing=otc_cache.DiskCache(cachedir))
+            first.set("ns", "a", 1, ttl=0.05)
+            # the copy from the backing store expires with the original
+            second = otc_cache.MemoryCache(ttl=300, backing=otc_cache.DiskCache(cachedir))
+            self.assertEqual(second.get("ns", "a"), (True, 1))
+            time.sleep(0.06)
+            self.assertEqual(second.get("ns", "a"), (False, None))
+            self.assertEqual(second.stats.expirations, 1)
+
+    class MockFlavors(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET",
+                        url_match="rds",
+                        path="/v3/0391e4486e864c26be5654c522f440f2/flavors/mysql",
+                        status_code=200,
+                        max_calls=2,
+                        json={"flavors": [
+                            {"vcpus": "1", "ram": 2, "spec_code": "rds.mysql.c2.medium", "instance_mode": "single"},
+                            {"vcpus": "2", "ram": 4, "spec_code": "rds.mysql.c2.large", "instance_mode": "ha"}]}
+                        ),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockFlavors().request)
+    def test_flavors_cached(self, mock):
+        rds = self.user_cloud.rdsv3
+        flavors = list(rds.flavors(engine_name="mysql", version_name="5.7"))
+        self.assertEqual(len(flavors), 2)
+        cached = list(rds.flavors(engine_name="mysql", version_name="5.7"))
+        self.assertEqual([f.spec_code for f in cached], [f.spec_code for f in flavors])
+        self.assertEqual(rds.cache_stats().hits, 1)
+        self.assertEqual(rds.cache_stats().misses, 1)
+
+        # explicit invalidation forces a new request
+        rds.invalidate_cache(_flavor.Flavor)
+        list(rds.flavors(engine_name="mysql", version_name="5.7"))
+        self.assertEqual(rds.cache_stats().misses, 2)
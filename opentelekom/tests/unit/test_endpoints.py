@@ -0,0 +1,60 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from opentelekom import otc_endpoints
+from opentelekom import connection as otc_connection
+
+from opentelekom.tests.functional import base
+
+
+class TestEndpointTable(base.BaseFunctionalTest):
+
+    def test_region_expansion(self):
+        table = otc_endpoints.EndpointTable()
+        settings = table.config_for('eu-nl')
+        self.assertEqual(settings['ccev2.0_endpoint_override'],
+            "https://cce.eu-nl.otc.t-systems.com/api/v3/projects/%(project_id)s")
+        self.assertEqual(settings['ccev2.0_api_version'], '3')
+
+    def test_unknown_region(self):
+        table = otc_endpoints.EndpointTable()
+        for region in ['xx-yy', None]:
+            settings = table.config_for(region)
+            # the fixed endpoints are kept, the others come from the catalog
+            self.assertEqual(settings['ccev2.0_endpoint_override'],
+                "https://cce.eu-de.otc.t-systems.com/api/v3/projects/%(project_id)s")
+            self.assertEqual(settings['peervpc_endpoint_override'],
+                "https://vpc.eu-de.otc.t-systems.com/v2.0")
+            self.assertNotIn('vpc_endpoint_override', settings)
+            self.assertEqual(settings['vpc_api_version'], '1')
+
+    def test_override_and_serialize(self):
+        table = otc_endpoints.EndpointTable()
+        table.override('ccev2.0', endpoint="https://cce.example.com/{region}", region='eu-de')
+        table.override('dns', api_version=2)
+        copy = otc_endpoints.EndpointTable.from_json(table.to_json())
+        settings = copy.config_for('eu-de')
+        self.assertEqual(settings['ccev2.0_endpoint_override'], "https://cce.example.com/eu-de")
+        self.assertEqual(settings['dns_api_version'], '2')
+        self.assertEqual(copy.config_for('eu-nl')['ccev2.0_endpoint_override'],
+            "https://cce.eu-nl.otc.t-systems.com/api/v3/projects/%(project_id)s")
+
+    def test_connection_config(self):
+        table = otc_endpoints.EndpointTable()
+        table.override('ccev2.0', endpoint="https://cce.example.com/v3/%(project_id)s")
+        config = self.config.get_one(cloud=self._demo_name)
+        config.config['vpc_api_version'] = "2"
+        conn = otc_connection.Connection(config=config, endpoint_table=table)
+        region = conn.config.region_name
+        self.assertEqual(conn.config.config['ccev2.0_endpoint_override'],
+            table.config_for(region)['ccev2.0_endpoint_override'])
+        # explicit configuration has priority
+        self.assertEqual(conn.config.config['vpc_api_version'], "2")
@@ -0,0 +1,74 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import requests
+from unittest import mock
+
+from openstack import exceptions
+
+from opentelekom import otc_fanout
+from opentelekom.vpc.vpc_service import VpcService
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+def _add_vpc(conn):
+    conn.add_service(VpcService("vpc", aliases=['vpc']))
+
+
+class TestFanout(base.BaseFunctionalTest):
+
+    class MockVpcList(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET",
+                        url_match="vpc",
+                        path="/v1/0391e4486e864c26be5654c522f440f2/vpcs",
+                        status_code=200,
+                        max_calls=2,
+                        json={"vpcs": [
+                            {"id": "7f4d8a07-df6c-4c86-919f-4fa201463d65", "name": "rbe-sdkunit-fanout-vpc1", "cidr": "10.248.0.0/16", "status": "OK", "routes": []},
+                            {"id": "8865cc93-36d5-410e-9865-57333f370e53", "name": "rbe-sdkunit-fanout-vpc2", "cidr": "10.19.0.0/16", "status": "OK", "routes": []}]}
+                        ),
+        ]
+
+    @mock.patch.object(requests.Session, "request", side_effect=MockVpcList().request)
+    def test_fanout_tagged(self, mock):
+        # a passed connection is used as it is
+        _add_vpc(self.user_cloud)
+        configs = [{'cloud': 'paas', 'region_name': 'eu-de'},
+                   self.user_cloud,
+                   {'cloud': 'nonexisting-cloud'}]
+        results, errors = otc_fanout.fanout_collect(configs, 'vpc.vpcs',
+            max_workers=2, setup=_add_vpc)
+
+        self.assertEqual(len(results), 4)
+        origins = set(result.origin for result in results)
+        self.assertEqual(origins,
+            set([otc_fanout.FanoutOrigin.from_connection(self.user_cloud)]))
+        self.assertEqual(len(errors), 1)
+        failed = list(errors.keys())[0]
+        self.assertEqual(failed.cloud, 'nonexisting-cloud')
+        self.assertIsInstance(errors[failed], exceptions.SDKException)
+
+    def test_fanout_early_close(self):
+        started = []
+
+        def _query(conn):
+            started.append(conn)
+            return [conn]
+
+        results = otc_fanout.fanout([self.user_cloud] * 10, _query, max_workers=1)
+        self.assertIs(next(results).resource, self.user_cloud)
+        results.close()
+        # the origins not started yet are cancelled
+        self.assertLess(len(started), 10)
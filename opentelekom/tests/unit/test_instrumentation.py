@@ -0,0 +1,91 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import requests
+from unittest import mock
+
+from opentelekom import otc_instrumentation
+from opentelekom.vpc.vpc_service import VpcService
+
+from opentelekom.tests.unit.otc_mockservice import OtcMockService, OtcMockResponse
+
+from opentelekom.tests.functional import base
+
+
+class TestInstrumentation(base.BaseFunctionalTest):
+
+    def setUp(self):
+        super().setUp()
+        self.user_cloud.add_service(VpcService("vpc", aliases=['vpc']))
+
+    def test_url_template(self):
+        self.assertEqual(otc_instrumentation.url_template(
+            "https://vpc.eu-de.otc.t-systems.com/v1/0391e4486e864c26be5654c522f440f2"
+            "/vpcs/7f4d8a07-df6c-4c86-919f-4fa201463d65?limit=10"),
+            "/v1/{id}/vpcs/{id}")
+
+    class MockVpc(OtcMockService):
+        responses = [
+            OtcMockResponse(method="GET",
+                        url_match="vpc",
+                        path="/v1/0391e4486e864c26be5654c522f440f2/vpcs/7f4d8a07-df6c-4c86-919f-4fa201463d65",
+                        status_code=200,
+                        max_calls=2,
+                        json={"vpc": {"id": "7f4d8a07-df6c-4c86-919f-4fa201463d65", "name": "rbe-sdkunit-instr-vpc",
+                            "cidr": "10.248.0.0/16", "status": "OK", "routes": []}}
+                        ),
+        ]
+
+    def _dispatching_mock(self):
+        # the raw request mock does not dispatch the requests hooks
+        service = self.MockVpc()
+
+        def _request(method, url, **kwargs):
+            response = service.request(method, url, **kwargs)
+            hooks = (kwargs.get('hooks') or {}).get('response', [])
+            for hook in hooks:
+                hook(response)
+            return response
+        return _request
+
+    def test_request_events(self):
+        events = []
+        stats = otc_instrumentation.RequestStatsCollector()
+        self.user_cloud.add_request_hook(stats)
+        self.user_cloud.vpc.add_request_hook(events.append)
+        with mock.patch.object(requests.Session, "request",
+                side_effect=self._dispatching_mock()):
+            self.user_cloud.vpc.get_vpc("7f4d8a07-df6c-4c86-919f-4fa201463d65")
+            self.user_cloud.vpc.get_vpc("7f4d8a07-df6c-4c86-919f-4fa201463d65")
+
+        self.assertEqual(len(events), 2)
+        event = events[0]
+        self.assertEqual(event.service_type, 'vpc')
+        self.assertEqual(event.method, 'GET')
+        self.assertEqual(event.url_template, "/v1/{id}/vpcs/{id}")
+        self.assertEqual(event.status_code, 200)
+        self.assertEqual(event.retries, 0)
+        self.assertGreater(event.response_bytes, 0)
+
+        key = ('vpc', 'GET', "/v1/{id}/vpcs/{id}")
+        self.assertEqual(stats.most_called(1)[0][0], key)
+        self.assertEqual(stats.stats[key]['count'], 2)
+        self.assertEqual(stats.stats[key]['response_bytes'],
+            2 * event.response_bytes)
+
+    def test_failing_hook(self):
+        def _broken(event):
+            raise ValueError("broken hook")
+        self.user_cloud.vpc.add_request_hook(_broken)
+        with mock.patch.object(requests.Session, "request",
+                side_effect=self._dispatching_mock()):
+            vpc = self.user_cloud.vpc.get_vpc("7f4d8a07-df6c-4c86-919f-4fa201463d65")
+        self.assertEqual(vpc.name, "rbe-sdkunit-instr-vpc")
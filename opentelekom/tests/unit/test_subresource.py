@@ -0,0 +1,71 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import copy
+
+from opentelekom.cce.v3 import cluster_node as _cluster_node
+
+from opentelekom.tests.functional import base
+
+
+class TestSubResource(base.BaseFunctionalTest):
+
+    def _spec(self, size=40):
+        return _cluster_node.NodeSpec(flavor="s2.large.1", availability_zone="eu-de-01",
+            root_volume=_cluster_node.VolumeSpec(size=size, type="SATA"))
+
+    def test_body_dict(self):
+        spec = self._spec()
+        self.assertEqual(spec.body_dict(), {"flavor": "s2.large.1", "az": "eu-de-01",
+            "rootVolume": {"size": 40, "volumetype": "SATA"}})
+        # memoized until a change
+        self.assertIs(spec.body_dict(), spec.body_dict())
+        self.assertEqual(spec.to_dict()["root_volume"], {"size": 40, "type": "SATA"})
+
+    def test_nested_change(self):
+        spec = self._spec()
+        before = spec.body_dict()
+        to_dict = spec.to_dict()
+        spec.root_volume.size = 100
+        self.assertEqual(spec.body_dict()["rootVolume"]["size"], 100)
+        self.assertEqual(spec.to_dict()["root_volume"]["size"], 100)
+        self.assertEqual(before["rootVolume"]["size"], 40)
+        # to_dict results are copies, changing them does not affect the cache
+        to_dict["flavor"] = "changed"
+        self.assertEqual(spec.to_dict()["flavor"], "s2.large.1")
+        spec.root_volume = {"size": 20, "volumetype": "SSD"}
+        spec.root_volume.size = 30
+        self.assertEqual(spec.body_dict()["rootVolume"], {"size": 30, "volumetype": "SSD"})
+
+    def test_request_body(self):
+        node = _cluster_node.ClusterNode.new(cluster_id="0aa55501-a3e8-11e9-9e49-0255ac101611",
+            name="rbe-sdkunit-node", spec=self._spec())
+        body = node._prepare_request(requires_id=False).body
+        self.assertEqual(body["spec"]["az"], "eu-de-01")
+        self.assertEqual(body["spec"]["rootVolume"], {"size": 40, "volumetype": "SATA"})
+
+    def test_equality(self):
+        spec = self._spec()
+        self.assertEqual(spec, self._spec())
+        self.assertNotEqual(spec, self._spec(size=41))
+        # raw and typed nested values are structurally equal
+        self.assertEqual(spec, _cluster_node.NodeSpec(flavor="s2.large.1",
+            availability_zone="eu-de-01", root_volume={"size": 40, "volumetype": "SATA"}))
+        self.assertNotEqual(spec, _cluster_node.VolumeSpec(size=40))
+
+    def test_copy(self):
+        spec = self._spec()
+        spec.body_dict()
+        clone = copy.deepcopy(spec)
+        clone.body_dict()
+        clone.root_volume.size = 50
+        self.assertEqual(clone.body_dict()["rootVolume"]["size"], 50)
+        self.assertEqual(spec.body_dict()["rootVolume"]["size"], 40)